@@ -0,0 +1,8 @@
+"""
+Benchmarks for the storage backends, the trackers' write paths and the API.
+
+Every benchmark writes synthetic days with ``benchmarks.generator`` into a
+temporary directory and prints its results as JSON. ``python -m benchmarks``
+runs the storage and API suites together and can compare the results with
+a saved baseline.
+"""
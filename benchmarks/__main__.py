@@ -0,0 +1,105 @@
+"""
+Run the storage and API benchmarks and compare them with a baseline.
+
+    python -m benchmarks --output results.json
+    python -m benchmarks --baseline results.json --threshold 1.25
+
+With --baseline, the p50 latencies and memory peaks that grew by more than
+--threshold times are listed, and the exit status is 1 if there are any.
+"""
+
+import sys
+import json
+import argparse
+import contextlib
+import io
+from pathlib import Path
+from typing import Any, Dict, Iterator, List, Tuple
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from benchmarks import bench_api, bench_storage
+from benchmarks.common import RESULTS_VERSION, environment
+
+# Leaf keys compared against the baseline
+COMPARED_KEYS = ('p50_ms', 'peak_kib')
+
+
+def run_quietly(main, argv: List[str]) -> Dict[str, Any]:
+    """Run a benchmark's main() and return its parsed JSON output."""
+    output = io.StringIO()
+    with contextlib.redirect_stdout(output):
+        main(argv)
+    return json.loads(output.getvalue())['results']
+
+
+def leaves(results: Dict[str, Any], prefix: str = '') -> Iterator[Tuple[str, float]]:
+    """Yield the compared values of nested results by dotted path."""
+    for key, value in results.items():
+        path = f'{prefix}.{key}' if prefix else key
+        if isinstance(value, dict):
+            yield from leaves(value, path)
+        elif key in COMPARED_KEYS and isinstance(value, (int, float)):
+            yield path, value
+
+
+def compare(baseline: Dict[str, Any], current: Dict[str, Any],
+            threshold: float) -> List[Dict[str, Any]]:
+    """
+    Find the values that regressed against a baseline.
+
+    Args:
+        baseline: Results of an earlier run
+        current: Results of this run
+        threshold: Ratio above which a value counts as regressed
+
+    Returns:
+        List[Dict[str, Any]]: Path, both values and their ratio of each regression
+    """
+    before = dict(leaves(baseline))
+    regressions = []
+    for path, value in leaves(current):
+        old = before.get(path)
+        if old and value / old > threshold:
+            regressions.append({'path': path, 'baseline': old, 'current': value,
+                                'ratio': round(value / old, 2)})
+    return regressions
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--days', type=int, default=365, help="days of generated history")
+    parser.add_argument('--events', type=int, default=200, help="events per generated day")
+    parser.add_argument('--output', help="write the combined JSON results to this file")
+    parser.add_argument('--baseline', help="JSON results of an earlier run to compare with")
+    parser.add_argument('--threshold', type=float, default=1.25,
+                        help="ratio over the baseline reported as a regression")
+    args = parser.parse_args(argv)
+
+    common = ['--days', str(args.days), '--events', str(args.events)]
+    document: Dict[str, Any] = {
+        'version': RESULTS_VERSION,
+        'benchmark': 'suite',
+        'environment': environment(),
+        'results': {
+            'storage': run_quietly(bench_storage.main, common),
+            'api': run_quietly(bench_api.main, common)
+        }
+    }
+
+    status = 0
+    if args.baseline:
+        baseline = json.loads(Path(args.baseline).read_text())
+        regressions = compare(baseline['results'], document['results'], args.threshold)
+        document['regressions'] = regressions
+        status = 1 if regressions else 0
+
+    text = json.dumps(document, indent=2)
+    if args.output:
+        Path(args.output).write_text(text + '\n')
+    print(text)
+    return status
+
+
+if __name__ == '__main__':
+    sys.exit(main())
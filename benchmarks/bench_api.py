@@ -0,0 +1,97 @@
+#!/usr/bin/env python3
+"""
+Benchmark the API routes of app.py through Flask's test client.
+
+The server is pointed at generated data through $SCREEN_TIME_CONFIG, and
+each route is timed with a full response, with a conditional request
+answered by 304 where the route supports it, and with the response size.
+
+    python -m benchmarks.bench_api --days 365 --events 200 --output api.json
+"""
+
+import os
+import sys
+import argparse
+import importlib
+import tempfile
+from datetime import datetime, timedelta
+from pathlib import Path
+from typing import Any, Dict
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from benchmarks.common import add_output_argument, emit, latencies, write_config
+from benchmarks.generator import write_days
+from src.tracker.utils.config import CONFIG_ENV_VAR
+
+
+def routes(days: int) -> Dict[str, str]:
+    """Get the benchmarked paths by name."""
+    today = datetime.now()
+    closed = (today - timedelta(days=1)).strftime('%Y-%m-%d')
+    start = (today - timedelta(days=days - 1)).strftime('%Y-%m-%d')
+    return {
+        'data_today': f"/api/data/{today.strftime('%Y-%m-%d')}",
+        'data_closed_day': f'/api/data/{closed}',
+        'data_window': f'/api/data/{closed}?from=17:00&types=LOCK,UNLOCK&limit=100',
+        f'data_range_{days}d': f'/api/data/range/{start}/{days}',
+        f'days_{days}d': f'/api/days?start={start}&days={days}',
+        f'summary_{days}d': f'/api/summary/range/{start}/{days}',
+        f'sessions_{days}d': f'/api/sessions/range/{start}/{days}',
+        'current_session': '/api/current-session',
+        'active_at': f"/api/active-at/{today.replace(hour=12).isoformat(timespec='seconds')}"
+    }
+
+
+def bench_route(client, path: str, repeat: int) -> Dict[str, Any]:
+    """Time one route, conditionally too if it sends an ETag."""
+    headers = {'Accept-Encoding': 'gzip'}
+    response = client.get(path, headers=headers)
+    result: Dict[str, Any] = {
+        'status': response.status_code,
+        'bytes': len(response.get_data()),
+        'full': latencies(lambda: client.get(path, headers=headers).get_data(), repeat)
+    }
+    etag = response.headers.get('ETag')
+    if etag:
+        conditional = dict(headers, **{'If-None-Match': etag})
+        result['not_modified'] = latencies(
+            lambda: client.get(path, headers=conditional).get_data(), repeat)
+    return result
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--days', type=int, default=365, help="days of generated history")
+    parser.add_argument('--events', type=int, default=200, help="events per generated day")
+    parser.add_argument('--range', type=int, default=30, help="days of the range routes")
+    parser.add_argument('--backend', default='json')
+    parser.add_argument('--repeat', type=int, default=50)
+    add_output_argument(parser)
+    args = parser.parse_args(argv)
+
+    results: Dict[str, Any] = {
+        'params': {'days': args.days, 'events_per_day': args.events,
+                   'range': args.range, 'backend': args.backend}
+    }
+    with tempfile.TemporaryDirectory() as tmp:
+        data_dir = Path(tmp) / 'data'
+        write_days(data_dir, datetime.now(), args.days, args.events)
+        os.environ[CONFIG_ENV_VAR] = str(write_config(Path(tmp) / 'config.json', data_dir,
+                                                      args.backend))
+        try:
+            server = importlib.import_module('src.server.app')
+        except ImportError as e:
+            results['skipped'] = f"the server's dependencies are not installed: {e}"
+        else:
+            client = server.app.test_client()
+            results['routes'] = {name: bench_route(client, path, args.repeat)
+                                 for name, path in routes(args.range).items()}
+            server.day_loader.shutdown()
+
+    emit('api', results, args.output)
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,92 @@
+#!/usr/bin/env python3
+"""
+Compare disk size and read time of JSON day files and columnar archives.
+
+A year of synthetic days is written as pretty-printed JSON (indent 4, as the
+legacy tracker does), measured, converted to archives and measured again.
+
+    python benchmarks/bench_archive.py --days 365 --events 200
+"""
+
+import sys
+import argparse
+import tempfile
+from datetime import datetime, timedelta
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from benchmarks.common import add_output_argument, emit, measure
+from benchmarks.generator import write_days
+from src.tracker.storage.archive import ArchiveReader
+from src.tracker.storage.day_files import (
+    archive_closed_days, archive_path, day_file_path, load_day, stored_dates
+)
+
+
+def total_size(paths) -> int:
+    """Return the combined size of files in bytes."""
+    return sum(path.stat().st_size for path in paths)
+
+
+def count_unlocks_json(data_dir: Path, dates):
+    """Count unlock events by parsing every JSON day."""
+    return sum(1 for date in dates for event in load_day(data_dir, date)['events']
+               if event['type'] == 'unlock')
+
+
+def count_unlocks_archive(data_dir: Path, dates):
+    """Count unlock events from the type column only."""
+    count = 0
+    for date in dates:
+        with ArchiveReader(archive_path(data_dir, date)) as reader:
+            if 'unlock' in reader.type_names:
+                count += reader.type_codes().count(reader.type_names.index('unlock'))
+    return count
+
+
+def evening_slice_archive(data_dir: Path, dates):
+    """Decode only the events after 18:00 of every day."""
+    for date in dates:
+        with ArchiveReader(archive_path(data_dir, date)) as reader:
+            reader.events(start=datetime.strptime(f"{date} 18:00", '%Y-%m-%d %H:%M'))
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--days', type=int, default=365)
+    parser.add_argument('--events', type=int, default=200, help="events per generated day")
+    parser.add_argument('--repeat', type=int, default=3)
+    add_output_argument(parser)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        data_dir = Path(tmp)
+        # End yesterday so every generated day counts as closed
+        write_days(data_dir, datetime.now() - timedelta(days=1), args.days, args.events, indent=4)
+        dates = stored_dates(data_dir)
+
+        json_bytes = total_size(day_file_path(data_dir, date) for date in dates)
+        json_load = measure(lambda: [load_day(data_dir, date) for date in dates], args.repeat)
+        json_count = measure(lambda: count_unlocks_json(data_dir, dates), args.repeat)
+
+        archive_closed_days(data_dir)
+        archive_bytes = total_size(archive_path(data_dir, date) for date in dates)
+        archive_load = measure(lambda: [load_day(data_dir, date) for date in dates], args.repeat)
+        archive_count = measure(lambda: count_unlocks_archive(data_dir, dates), args.repeat)
+        archive_slice = measure(lambda: evening_slice_archive(data_dir, dates), args.repeat)
+
+    emit('archive', {
+        'days': args.days,
+        'events_per_day': args.events,
+        'json_bytes': json_bytes,
+        'archive_bytes': archive_bytes,
+        'size_ratio': round(json_bytes / archive_bytes, 2),
+        'full_load_ms': {'json': round(json_load, 2), 'archive': round(archive_load, 2)},
+        'count_unlocks_ms': {'json': round(json_count, 2), 'archive': round(archive_count, 2)},
+        'evening_slice_ms': {'archive': round(archive_slice, 2)}
+    }, args.output)
+
+
+if __name__ == '__main__':
+    main()
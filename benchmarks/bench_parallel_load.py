@@ -0,0 +1,63 @@
+#!/usr/bin/env python3
+"""
+Benchmark serial and parallel day loading for multi-day API requests.
+
+Synthetic day files are written to a temporary directory unless --data-dir
+points at existing data (for example on a network home directory, where the
+difference is largest).
+
+    python benchmarks/bench_parallel_load.py --days 30 365 --workers 8
+"""
+
+import sys
+import argparse
+import tempfile
+from datetime import datetime, timedelta
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from benchmarks.common import add_output_argument, emit, measure
+from benchmarks.generator import write_days
+from src.server.loader import ParallelDayLoader
+from src.tracker.storage.base import date_range
+from src.tracker.storage.file_storage import JsonFileStorage
+from src.tracker.storage.writer import BatchedWriter
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--days', type=int, nargs='+', default=[30, 365])
+    parser.add_argument('--events', type=int, default=200, help="events per generated day")
+    parser.add_argument('--workers', type=int, default=8)
+    parser.add_argument('--repeat', type=int, default=5)
+    parser.add_argument('--data-dir', help="use existing day files instead of generating them")
+    add_output_argument(parser)
+    args = parser.parse_args()
+
+    end = datetime.now()
+    with tempfile.TemporaryDirectory() as tmp:
+        data_dir = Path(args.data_dir or tmp)
+        if not args.data_dir:
+            write_days(data_dir, end, max(args.days), args.events)
+
+        storage = JsonFileStorage(data_dir, BatchedWriter())
+        loader = ParallelDayLoader(storage, max_workers=args.workers)
+        results = []
+        for days in args.days:
+            dates = date_range((end - timedelta(days=days - 1)).strftime('%Y-%m-%d'), days)
+            serial = measure(lambda: [storage.load_day(date) for date in dates], args.repeat)
+            parallel = measure(lambda: loader.load(dates), args.repeat)
+            results.append({
+                'days': days,
+                'serial_ms': round(serial, 2),
+                'parallel_ms': round(parallel, 2),
+                'speedup': round(serial / parallel, 2) if parallel else None
+            })
+        loader.shutdown()
+
+    emit('parallel_load', {'workers': args.workers, 'results': results}, args.output)
+
+
+if __name__ == '__main__':
+    main()
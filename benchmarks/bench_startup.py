@@ -0,0 +1,129 @@
+#!/usr/bin/env python3
+"""
+Measure how long the legacy tracker takes from spawn until it is ready.
+
+A copy of the tracker is started against a generated day, once per storage
+backend, with ``NOTIFY_SOCKET`` pointing at a socket of this benchmark. The
+time until the tracker reports ``READY=1`` is compared with the startup of a
+bare interpreter and with the target of 200 ms.
+
+    python benchmarks/bench_startup.py --events 20000 --runs 10
+"""
+
+import os
+import sys
+import time
+import shutil
+import signal
+import socket
+import argparse
+import tempfile
+import subprocess
+from datetime import datetime
+from pathlib import Path
+from typing import Dict, List
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from benchmarks.common import REPO_ROOT, add_output_argument, emit, summarize, write_config
+from benchmarks.generator import write_days
+from src.tracker.storage.day_files import day_file_path, load_day, write_day_tail
+from src.tracker.utils.config import CONFIG_ENV_VAR
+
+TARGET_MS = 200
+BACKENDS = ('json', 'journal')
+
+
+def time_to_ready(script: Path, env: Dict[str, str], notify: socket.socket,
+                  timeout: float) -> float:
+    """
+    Start the tracker once and stop it after it reported readiness.
+
+    Args:
+        script: Tracker script
+        env: Environment with NOTIFY_SOCKET set
+        notify: Bound socket receiving the notifications
+        timeout: Seconds to wait for readiness
+
+    Returns:
+        float: Milliseconds from spawn to READY=1
+    """
+    start = time.perf_counter()
+    process = subprocess.Popen([sys.executable, str(script)], env=env,
+                               stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+    try:
+        notify.settimeout(timeout)
+        while True:
+            try:
+                message = notify.recv(4096).decode()
+            except socket.timeout:
+                raise RuntimeError(f"Tracker was not ready within {timeout} seconds")
+            if 'READY=1' in message.splitlines():
+                return (time.perf_counter() - start) * 1000
+    finally:
+        process.send_signal(signal.SIGTERM)
+        try:
+            process.wait(timeout=10)
+        except subprocess.TimeoutExpired:
+            process.kill()
+            process.wait()
+
+
+def interpreter_startup(runs: int) -> List[float]:
+    """Time spawning a bare interpreter that exits at once."""
+    timings = []
+    for _ in range(runs):
+        start = time.perf_counter()
+        subprocess.run([sys.executable, '-c', 'pass'], check=True)
+        timings.append((time.perf_counter() - start) * 1000)
+    return timings
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--events', type=int, default=20000, help="events of the current day")
+    parser.add_argument('--runs', type=int, default=10)
+    parser.add_argument('--timeout', type=float, default=10.0,
+                        help="seconds to wait for readiness")
+    add_output_argument(parser)
+    args = parser.parse_args(argv)
+
+    results = {'events': args.events, 'target_ms': TARGET_MS,
+               'interpreter': summarize(interpreter_startup(args.runs))}
+    with tempfile.TemporaryDirectory() as tmp:
+        root = Path(tmp)
+        # The tracker keeps its data and logs next to its own source tree
+        shutil.copytree(REPO_ROOT / 'src' / 'tracker', root / 'src' / 'tracker',
+                        ignore=shutil.ignore_patterns('__pycache__'))
+        script = root / 'src' / 'tracker' / 'screen_time_tracker.py'
+        data_dir = root / 'data' / 'screen_time_data'
+        notify_path = root / 'notify.sock'
+
+        with socket.socket(socket.AF_UNIX, socket.SOCK_DGRAM) as notify:
+            notify.bind(str(notify_path))
+            for backend in BACKENDS:
+                config = write_config(root / f'{backend}.json', data_dir, backend,
+                                      state_source='polling')
+                env = dict(os.environ, NOTIFY_SOCKET=str(notify_path))
+                env[CONFIG_ENV_VAR] = str(config)
+
+                timings = []
+                # The first run compiles the copied sources and is not timed
+                for run in range(args.runs + 1):
+                    shutil.rmtree(data_dir, ignore_errors=True)
+                    date, = write_days(data_dir, datetime.now(), 1, args.events, indent=4)
+                    # The trackers write a tail file next to every day file
+                    write_day_tail(day_file_path(data_dir, date), load_day(data_dir, date))
+                    elapsed = time_to_ready(script, env, notify, args.timeout)
+                    if run:
+                        timings.append(elapsed)
+
+                summary = summarize(timings)
+                summary['within_target'] = summary['p50_ms'] < TARGET_MS
+                results[backend] = summary
+
+    emit('startup', results, args.output)
+
+
+if __name__ == '__main__':
+    main()
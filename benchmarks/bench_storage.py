@@ -0,0 +1,193 @@
+#!/usr/bin/env python3
+"""
+Benchmark the write and read hot paths of the storage backends.
+
+A history of --days generated days with --events events each is written
+for every backend, then the script measures:
+
+- per-event write latency of the core tracker (_save_event) and of the
+  legacy tracker's save_data and state-only saves, plus the final flush
+- range query latency for --ranges days, with and without the day cache
+- current-session lookups as done by /api/current-session and the session
+  index behind /api/active-at
+- peak Python memory of a range load and of a burst of writes
+
+    python -m benchmarks.bench_storage --days 365 --events 200 --output storage.json
+"""
+
+import sys
+import argparse
+import tempfile
+import time
+from datetime import datetime, timedelta
+from pathlib import Path
+from typing import Any, Dict
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from benchmarks.common import (
+    add_output_argument, emit, latencies, peak_memory, write_config
+)
+from benchmarks.generator import write_days
+from src.server.cache import CachedStorage, DayCache
+from src.server.loader import ParallelDayLoader
+from src.tracker.core.screen_time_tracker import ScreenTimeTracker
+from src.tracker.events.event import Event
+from src.tracker.events.event_types import EventType
+from src.tracker.storage.base import date_range
+from src.tracker.storage.factory import BACKENDS, create_storage
+from src.tracker.storage.sessions import SessionIndex
+from src.tracker.storage.sqlite_storage import migrate_json_files
+from src.tracker.utils.config import Config
+
+WRITE_TYPES = (EventType.UNLOCK, EventType.LOCK)
+
+
+def prepare(root: Path, backend: str, days: int, events: int) -> Config:
+    """Write the history of one backend and return its configuration."""
+    data_dir = root / backend
+    write_days(data_dir, datetime.now(), days, events, indent=4)
+    config = Config(str(write_config(root / f'{backend}.json', data_dir, backend)))
+    if backend == 'sqlite':
+        storage = create_storage(config)
+        migrate_json_files(data_dir, storage)
+        storage.close()
+    return config
+
+
+def new_events(count: int):
+    """Yield alternating unlock/lock events after every generated event of today."""
+    start = datetime.now()
+    for index in range(count):
+        yield Event.at(WRITE_TYPES[index % 2], start + timedelta(milliseconds=index))
+
+
+def bench_core_writes(config: Config, writes: int) -> Dict[str, Any]:
+    """Time ScreenTimeTracker._save_event and the flush on close."""
+    tracker = ScreenTimeTracker(config)
+    tracker.storage.start()
+    events = iter(new_events(writes + 1))
+    result = latencies(lambda: tracker._save_event(next(events)), writes)
+    start = time.perf_counter()
+    tracker.storage.close()
+    result['close_ms'] = round((time.perf_counter() - start) * 1000, 3)
+    return result
+
+
+def bench_legacy_writes(config: Config, writes: int) -> Dict[str, Any]:
+    """Time the legacy tracker's save_data with and without a new event."""
+    storage = create_storage(config, json_indent=4)
+    storage.start()
+    date = datetime.now().strftime('%Y-%m-%d')
+    state = {'total_time': 0.0, 'current_session': {'is_active': True, 'start_time': None}}
+    events = iter(new_events(writes + 1))
+
+    def save_data():
+        storage.append_event(date, next(events).to_dict(legacy=True), state)
+
+    def save_state():
+        state['total_time'] += 1.0
+        storage.save_state(date, state)
+
+    result = {
+        'save_data': latencies(save_data, writes),
+        'save_state': latencies(save_state, writes)
+    }
+    start = time.perf_counter()
+    storage.close()
+    result['close_ms'] = round((time.perf_counter() - start) * 1000, 3)
+    return result
+
+
+def bench_ranges(config: Config, ranges, repeat: int) -> Dict[str, Any]:
+    """Time multi-day loads through the server's loader, cold and cached."""
+    storage = create_storage(config)
+    cached = CachedStorage(storage, DayCache())
+    today = datetime.now()
+    results = {}
+    for days in ranges:
+        dates = date_range((today - timedelta(days=days - 1)).strftime('%Y-%m-%d'), days)
+        loader = ParallelDayLoader(storage)
+        cached_loader = ParallelDayLoader(cached)
+        results[f'{days}d'] = {
+            'uncached': latencies(lambda: loader.load(dates), repeat),
+            'cached': latencies(lambda: cached_loader.load(dates), repeat)
+        }
+        loader.shutdown()
+        cached_loader.shutdown()
+    storage.close()
+    return results
+
+
+def bench_current_session(config: Config, repeat: int) -> Dict[str, Any]:
+    """Time the current-session lookups of the API."""
+    storage = create_storage(config)
+    cached = CachedStorage(storage, DayCache())
+    sessions = SessionIndex(cached)
+    types = ['STARTUP', 'UNLOCK', 'startup', 'unlock']
+    results = {
+        'last_event': latencies(lambda: storage.last_event(types=types, max_days=1), repeat),
+        'last_event_cached': latencies(lambda: cached.last_event(types=types, max_days=1), repeat),
+        'active_at': latencies(lambda: sessions.active_at(datetime.now()), repeat)
+    }
+    storage.close()
+    return results
+
+
+def bench_memory(config: Config, days: int, writes: int) -> Dict[str, Any]:
+    """Measure the peak memory of a range load and of a burst of writes."""
+    storage = create_storage(config)
+    dates = date_range((datetime.now() - timedelta(days=days - 1)).strftime('%Y-%m-%d'), days)
+    loader = ParallelDayLoader(storage)
+    result = {f'load_{days}d': peak_memory(lambda: loader.load(dates))}
+    loader.shutdown()
+    storage.close()
+
+    def write_burst():
+        tracker = ScreenTimeTracker(config)
+        tracker.storage.start()
+        for event in new_events(writes):
+            tracker._save_event(event)
+        tracker.storage.close()
+
+    result[f'write_{writes}_events'] = peak_memory(write_burst)
+    return result
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--backends', nargs='+', choices=BACKENDS, default=list(BACKENDS))
+    parser.add_argument('--days', type=int, default=365, help="days of generated history")
+    parser.add_argument('--events', type=int, default=200, help="events per generated day")
+    parser.add_argument('--writes', type=int, default=200, help="timed writes per path")
+    parser.add_argument('--ranges', type=int, nargs='+', default=[7, 30, 365])
+    parser.add_argument('--repeat', type=int, default=20, help="timed reads per query")
+    add_output_argument(parser)
+    args = parser.parse_args(argv)
+
+    ranges = [days for days in args.ranges if days <= args.days]
+    results: Dict[str, Any] = {
+        'params': {'days': args.days, 'events_per_day': args.events, 'writes': args.writes},
+        'backends': {}
+    }
+    with tempfile.TemporaryDirectory() as tmp:
+        for backend in args.backends:
+            # Writes go to a copy of the history so reads see the generated days only
+            write_side = prepare(Path(tmp) / 'write', backend, args.days, args.events)
+            read_side = prepare(Path(tmp) / 'read', backend, args.days, args.events)
+            results['backends'][backend] = {
+                'write': {
+                    'core_save_event': bench_core_writes(write_side, args.writes),
+                    'legacy': bench_legacy_writes(write_side, args.writes)
+                },
+                'range_query': bench_ranges(read_side, ranges, args.repeat),
+                'current_session': bench_current_session(read_side, args.repeat),
+                'memory': bench_memory(read_side, max(ranges or [1]), args.writes)
+            }
+
+    emit('storage', results, args.output)
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,154 @@
+#!/usr/bin/env python3
+"""
+Load test serve_viewer.py with concurrent 30-day dashboard loads.
+
+Each dashboard load fetches one file per day over a few parallel
+connections, like the viewer's Promise.all fan-out in a browser. The server
+runs in a separate process in each requested mode and the script prints p50
+and p99 of the full load and of single requests as JSON.
+
+    python benchmarks/bench_viewer_load.py --workers 1 16 --clients 4
+"""
+
+import sys
+import time
+import queue
+import socket
+import argparse
+import tempfile
+import threading
+import subprocess
+import statistics
+import http.client
+from datetime import datetime, timedelta
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from benchmarks.common import REPO_ROOT, add_output_argument, emit, percentile
+from benchmarks.generator import write_days
+
+SERVER_SCRIPT = """
+import sys
+from pathlib import Path
+sys.path.insert(0, {src!r})
+import server.serve_viewer as viewer
+viewer.CORSRequestHandler.base_dir = Path({root!r})
+with viewer.make_server({port}, {workers}, host='127.0.0.1') as httpd:
+    print('ready', flush=True)
+    httpd.serve_forever()
+"""
+
+
+def free_port() -> int:
+    """Return a port nobody listens on."""
+    with socket.socket() as sock:
+        sock.bind(('127.0.0.1', 0))
+        return sock.getsockname()[1]
+
+
+def start_server(root: Path, workers: int) -> (subprocess.Popen, int):
+    """Start serve_viewer in a subprocess serving `root`."""
+    port = free_port()
+    script = SERVER_SCRIPT.format(src=str(REPO_ROOT / 'src'), root=str(root),
+                                  port=port, workers=workers)
+    process = subprocess.Popen([sys.executable, '-c', script],
+                               stdout=subprocess.PIPE, stderr=subprocess.DEVNULL, text=True)
+    process.stdout.readline()
+    return process, port
+
+
+def dashboard_load(port: int, paths: list, connections: int, latencies: list) -> float:
+    """Fetch all paths over `connections` parallel connections, return ms."""
+    pending = queue.Queue()
+    for path in paths:
+        pending.put(path)
+
+    def fetch_all():
+        conn = http.client.HTTPConnection('127.0.0.1', port, timeout=30)
+        while True:
+            try:
+                path = pending.get_nowait()
+            except queue.Empty:
+                break
+            start = time.perf_counter()
+            conn.request('GET', path, headers={'Accept-Encoding': 'gzip'})
+            conn.getresponse().read()
+            latencies.append((time.perf_counter() - start) * 1000)
+        conn.close()
+
+    start = time.perf_counter()
+    threads = [threading.Thread(target=fetch_all) for _ in range(connections)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    return (time.perf_counter() - start) * 1000
+
+
+def run_mode(port: int, paths: list, args) -> dict:
+    """Run `loads` dashboard loads from `clients` concurrent dashboards."""
+    load_times = []
+    latencies = []
+
+    def client():
+        for _ in range(args.loads):
+            load_times.append(dashboard_load(port, paths, args.connections, latencies))
+
+    threads = [threading.Thread(target=client) for _ in range(args.clients)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    return {
+        'load_p50_ms': percentile(load_times, 50),
+        'load_p99_ms': percentile(load_times, 99),
+        'request_p50_ms': percentile(latencies, 50),
+        'request_p99_ms': percentile(latencies, 99),
+        'requests': len(latencies),
+        'mean_load_ms': round(statistics.mean(load_times), 2)
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--workers', type=int, nargs='+', default=[1, 16],
+                        help="server modes to compare (1 = single-threaded)")
+    parser.add_argument('--days', type=int, default=30)
+    parser.add_argument('--events', type=int, default=200, help="events per generated day")
+    parser.add_argument('--loads', type=int, default=20, help="dashboard loads per client")
+    parser.add_argument('--clients', type=int, default=2, help="concurrent dashboards")
+    parser.add_argument('--connections', type=int, default=6,
+                        help="parallel connections per dashboard, as in a browser")
+    add_output_argument(parser)
+    args = parser.parse_args()
+
+    end = datetime.now()
+    dates = [(end - timedelta(days=offset)).strftime('%Y-%m-%d') for offset in range(args.days)]
+    paths = [f'/data/screen_time_data/screen_time_{date}.json' for date in dates]
+
+    results = []
+    with tempfile.TemporaryDirectory() as tmp:
+        data_dir = Path(tmp) / 'data' / 'screen_time_data'
+        data_dir.mkdir(parents=True)
+        write_days(data_dir, end, args.days, args.events)
+
+        for workers in args.workers:
+            process, port = start_server(Path(tmp), workers)
+            try:
+                result = run_mode(port, paths, args)
+            finally:
+                process.terminate()
+                process.wait()
+            results.append({'workers': workers, **result})
+
+    emit('viewer_load', {
+        'days': args.days,
+        'clients': args.clients,
+        'connections': args.connections,
+        'results': results
+    }, args.output)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,165 @@
+"""
+Timing, memory and result helpers shared by the benchmarks.
+"""
+
+import json
+import time
+import platform
+import statistics
+import subprocess
+import tracemalloc
+from datetime import datetime
+from pathlib import Path
+from typing import Any, Callable, Dict, List, Optional
+
+REPO_ROOT = Path(__file__).resolve().parent.parent
+# Version of the result layout, bumped when keys change meaning
+RESULTS_VERSION = 1
+
+
+def measure(func: Callable[[], Any], repeat: int) -> float:
+    """Return the median wall time of func in milliseconds."""
+    timings = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        func()
+        timings.append((time.perf_counter() - start) * 1000)
+    return statistics.median(timings)
+
+
+def percentile(values: List[float], pct: float) -> float:
+    """Return the pct-th percentile of values."""
+    ordered = sorted(values)
+    index = min(len(ordered) - 1, int(round(pct / 100 * (len(ordered) - 1))))
+    return round(ordered[index], 3)
+
+
+def summarize(timings: List[float]) -> Dict[str, float]:
+    """
+    Summarize latencies in milliseconds.
+
+    Args:
+        timings: Latencies in milliseconds
+
+    Returns:
+        Dict[str, float]: Sample count, p50, p90, p99, mean and max
+    """
+    return {
+        'n': len(timings),
+        'p50_ms': percentile(timings, 50),
+        'p90_ms': percentile(timings, 90),
+        'p99_ms': percentile(timings, 99),
+        'mean_ms': round(statistics.mean(timings), 3),
+        'max_ms': round(max(timings), 3)
+    }
+
+
+def latencies(func: Callable[[], Any], count: int, warmup: int = 1) -> Dict[str, float]:
+    """
+    Time repeated calls of func.
+
+    Args:
+        func: Function to call
+        count: Number of timed calls
+        warmup: Untimed calls made first
+
+    Returns:
+        Dict[str, float]: Latency summary
+    """
+    for _ in range(warmup):
+        func()
+    timings = []
+    for _ in range(count):
+        start = time.perf_counter()
+        func()
+        timings.append((time.perf_counter() - start) * 1000)
+    return summarize(timings)
+
+
+def peak_memory(func: Callable[[], Any]) -> Dict[str, float]:
+    """
+    Measure the peak of memory allocated by Python while func runs.
+
+    Args:
+        func: Function to call once
+
+    Returns:
+        Dict[str, float]: Peak and retained allocations in KiB
+    """
+    tracemalloc.start()
+    try:
+        result = func()
+        current, peak = tracemalloc.get_traced_memory()
+    finally:
+        tracemalloc.stop()
+    del result
+    return {'peak_kib': round(peak / 1024, 1), 'retained_kib': round(current / 1024, 1)}
+
+
+def environment() -> Dict[str, Any]:
+    """Describe the machine and revision the results were measured on."""
+    try:
+        commit = subprocess.run(['git', 'rev-parse', '--short', 'HEAD'], cwd=REPO_ROOT,
+                                capture_output=True, text=True, timeout=5).stdout.strip()
+    except (OSError, subprocess.SubprocessError):
+        commit = None
+    return {
+        'python': platform.python_version(),
+        'platform': platform.platform(),
+        'machine': platform.machine(),
+        'commit': commit or None,
+        'measured_at': datetime.now().isoformat(timespec='seconds')
+    }
+
+
+def emit(name: str, results: Dict[str, Any], output: Optional[str] = None) -> Dict[str, Any]:
+    """
+    Print benchmark results as JSON and optionally write them to a file.
+
+    Args:
+        name: Benchmark name
+        results: Measured values
+        output: Optional path of a JSON file to write
+
+    Returns:
+        Dict[str, Any]: Results with the environment
+    """
+    document = {
+        'version': RESULTS_VERSION,
+        'benchmark': name,
+        'environment': environment(),
+        'results': results
+    }
+    text = json.dumps(document, indent=2)
+    if output:
+        Path(output).write_text(text + '\n')
+    print(text)
+    return document
+
+
+def write_config(path: Path, data_dir: Path, backend: str = 'json', **settings) -> Path:
+    """
+    Write a configuration file pointing the trackers and server at test data.
+
+    Args:
+        path: Path of the configuration file
+        data_dir: Data directory
+        backend: Storage backend
+        **settings: Further top-level settings
+
+    Returns:
+        Path: The configuration file
+    """
+    config = {
+        'data_dir': str(data_dir),
+        'log_dir': str(Path(data_dir) / 'logs'),
+        'storage': {'backend': backend},
+        **settings
+    }
+    Path(path).write_text(json.dumps(config, indent=2))
+    return Path(path)
+
+
+def add_output_argument(parser):
+    """Add the --output option of every benchmark to an argument parser."""
+    parser.add_argument('--output', help="also write the JSON results to this file")
@@ -0,0 +1,127 @@
+#!/usr/bin/env python3
+"""
+Generate synthetic screen time days in the day file format.
+
+Each day starts with a startup, alternates unlock/lock sessions with
+occasional idle/active pairs and ends with a shutdown once enough events
+are written. Days are generated from a seed and their date only, so the
+same day has the same events whatever range it is written in.
+
+    python -m benchmarks.generator /tmp/screen_time --days 365 --events 200
+"""
+
+import sys
+import json
+import random
+import argparse
+from datetime import datetime, timedelta
+from pathlib import Path
+from typing import Any, Dict, List
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from src.tracker.core.day_state import DayState
+from src.tracker.events.event_types import EventType
+from src.tracker.storage.day_files import day_file_path
+
+# Type names as written by the legacy tracker (lower case) or the core tracker
+NAME_STYLES = ('legacy', 'core')
+
+
+def generate_day(date: str, events_per_day: int, seed: int = 0,
+                 names: str = 'legacy') -> Dict[str, Any]:
+    """
+    Generate the data of one day.
+
+    Args:
+        date: Date string in YYYY-MM-DD format
+        events_per_day: Number of events
+        seed: Seed combined with the date
+        names: 'legacy' or 'core' type names
+
+    Returns:
+        Dict[str, Any]: Day data with events and total_time
+    """
+    rng = random.Random(f"{seed}-{date}")
+    current = datetime.strptime(date, '%Y-%m-%d').replace(hour=7)
+    current += timedelta(seconds=rng.randint(0, 3600))
+    # Spread the events over about 16 hours
+    gap = max(1, 16 * 3600 // max(events_per_day, 1))
+
+    types: List[EventType] = []
+    active = False
+    for index in range(events_per_day):
+        if index == 0:
+            event_type = EventType.STARTUP
+            active = True
+        elif index == events_per_day - 1 and events_per_day > 2:
+            event_type = EventType.SHUTDOWN
+        elif active and rng.random() < 0.1:
+            event_type = EventType.IDLE if types[-1] != EventType.IDLE else EventType.ACTIVE
+        elif types[-1] == EventType.IDLE:
+            event_type = EventType.ACTIVE
+        else:
+            event_type = EventType.LOCK if active else EventType.UNLOCK
+            active = not active
+        types.append(event_type)
+
+    events = []
+    for event_type in types:
+        current += timedelta(seconds=rng.randint(gap // 2, gap * 3 // 2),
+                             microseconds=rng.randint(0, 999999))
+        events.append({
+            'type': event_type.legacy_name if names == 'legacy' else event_type.name,
+            'timestamp': current.isoformat()
+        })
+
+    state = DayState.from_events(date, events)
+    return {'events': events, 'total_time': state.total_time}
+
+
+def write_days(data_dir: Path, end: datetime, days: int, events_per_day: int,
+               indent: int = 2, seed: int = 0, names: str = 'legacy') -> List[str]:
+    """
+    Write consecutive day files ending at a date.
+
+    Args:
+        data_dir: Directory to write the day files to
+        end: Last day
+        days: Number of days
+        events_per_day: Events of each day
+        indent: JSON indent, 4 like the legacy tracker or 2 like the core one
+        seed: Generator seed
+        names: 'legacy' or 'core' type names
+
+    Returns:
+        List[str]: Written dates in order
+    """
+    data_dir = Path(data_dir)
+    data_dir.mkdir(parents=True, exist_ok=True)
+    dates = [(end - timedelta(days=offset)).strftime('%Y-%m-%d') for offset in reversed(range(days))]
+    for date in dates:
+        with open(day_file_path(data_dir, date), 'w') as f:
+            json.dump(generate_day(date, events_per_day, seed, names), f, indent=indent)
+    return dates
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('data_dir', help="directory to write the day files to")
+    parser.add_argument('--days', type=int, default=30)
+    parser.add_argument('--events', type=int, default=200, help="events per day")
+    parser.add_argument('--end', help="last date (YYYY-MM-DD), default today")
+    parser.add_argument('--indent', type=int, default=2)
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument('--names', choices=NAME_STYLES, default='legacy')
+    args = parser.parse_args(argv)
+
+    end = datetime.strptime(args.end, '%Y-%m-%d') if args.end else datetime.now()
+    dates = write_days(Path(args.data_dir), end, args.days, args.events,
+                       args.indent, args.seed, args.names)
+    print(json.dumps({'data_dir': args.data_dir, 'first': dates[0], 'last': dates[-1],
+                      'days': len(dates), 'events_per_day': args.events}))
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -11,10 +11,15 @@ setup(
         "python-dateutil>=2.8.2",
         "typing-extensions>=4.9.0",
     ],
+    extras_require={
+        "analytics": ["numpy>=1.22"],
+    },
     entry_points={
         "console_scripts": [
             "screen-time-tracker=tracker.core.screen_time_tracker:main",
             "screen-time-server=server.app:run_server",
+            "screen-time-migrate=tracker.storage.migrate:main",
+            "screen-time-rollup=tracker.storage.rollup:main",
         ],
     },
     author="Your Name",
@@ -2,7 +2,7 @@ import { Navbar } from './components/navbar.js';
 import { Dashboard } from './components/dashboard.js';
 import { Timeline } from './components/timeline.js';
 import { Events } from './components/events.js';
-import { loadDataForDate, loadDataForDateRange, findCurrentSession, registerServiceWorker } from './services/dataService.js';
+import { loadDataForDate, loadDataForDateRange, loadSessionsForDateRange, findCurrentSession, registerServiceWorker } from './services/dataService.js';
 
 class App {
     constructor() {
@@ -49,6 +49,36 @@ class App {
             this.daysToShow = e.detail.days;
             await this.loadData();
         });
+
+        this.setupLiveUpdates();
+    }
+
+    /**
+     * Follow session changes and new events pushed by the server
+     */
+    setupLiveUpdates() {
+        if (!('EventSource' in window)) {
+            return;
+        }
+
+        const stream = new EventSource('/api/stream');
+        stream.addEventListener('session', (e) => {
+            const session = JSON.parse(e.data);
+            if (session.is_active) {
+                this.navbar.updateCurrentSession({ current_session: session });
+            } else {
+                this.navbar.clearCurrentSession();
+            }
+        });
+
+        // Coalesce bursts of events into one reload
+        let reloadTimer = null;
+        const scheduleReload = () => {
+            clearTimeout(reloadTimer);
+            reloadTimer = setTimeout(() => this.loadData(), 500);
+        };
+        stream.addEventListener('event', scheduleReload);
+        stream.addEventListener('reset', scheduleReload);
     }
 
     /**
@@ -56,11 +86,11 @@ class App {
      */
     async loadData() {
         try {
-            // Load data for the date range
-            const data = await loadDataForDateRange(
-                this.currentDate,
-                this.daysToShow
-            );
+            // Load data and sessions for the date range
+            const [data, sessions] = await Promise.all([
+                loadDataForDateRange(this.currentDate, this.daysToShow),
+                loadSessionsForDateRange(this.currentDate, this.daysToShow)
+            ]);
 
             // Find current session
             const currentSession = findCurrentSession(data.events);
@@ -76,7 +106,7 @@ class App {
 
             // Update components with new data
             this.dashboard.update(data);
-            this.timeline.update(data.events);
+            this.timeline.update(data.events, sessions);
             this.events.update(data.events);
 
             // Update header stats
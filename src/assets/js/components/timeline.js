@@ -86,24 +86,15 @@ export class Timeline {
     /**
      * Update timeline with new data
      * @param {Array} events - Array of events
+     * @param {Array} sessions - Sessions from the server, in time order
      */
-    update(events) {
+    update(events, sessions = []) {
         const timelineContent = document.getElementById('timelineContent');
         timelineContent.innerHTML = '';
 
         const eventsByDate = processTimelineData(events);
         const dates = Object.keys(eventsByDate).sort((a, b) => b.localeCompare(a));
 
-        // Add current session to today's events if active
-        const today = new Date().toISOString().split('T')[0];
-        if (this.currentSessionStart && dates.includes(today)) {
-            const now = new Date();
-            eventsByDate[today].push({
-                timestamp: now.toISOString(),
-                type: 'current'
-            });
-        }
-
         // Create timeline structure
         let timelineHTML = `
             <div class="timeline-grid">
@@ -124,46 +115,23 @@ export class Timeline {
 
         // Process each date
         dates.forEach(date => {
-            const dateEvents = eventsByDate[date];
-            let currentSession = null;
-
             timelineHTML += `
                 <div class="timeline-date-group">
                     <div class="timeline-line">
                         <div class="timeline-line-label">Work</div>
             `;
 
-            // Add work segments
-            for (let i = 0; i < dateEvents.length; i++) {
-                const event = dateEvents[i];
-                const eventTime = new Date(event.timestamp);
-            
-                if (event.type === 'startup' || event.type === 'unlock') {
-                    if (!currentSession) {
-                        currentSession = {
-                            start: eventTime,
-                            type: 'work'
-                        };
-                    }
-                } else if (event.type === 'current' && currentSession) {
-                    // Add current session segment with different style
-                    timelineHTML += this.createTimelineSegment(
-                        currentSession.start,
-                        eventTime,
-                        'work current',
-                        date
-                    );
-                    currentSession = null;
-                } else if ((event.type === 'lock' || event.type === 'system_shutdown' || event.type === 'logout') && currentSession) {
-                    timelineHTML += this.createTimelineSegment(
-                        currentSession.start,
-                        eventTime,
-                        'work',
-                        date
-                    );
-                    currentSession = null;
-                }
-            }
+            // Add work segments, drawing the running session up to now
+            const now = new Date();
+            const daySessions = this.sessionsOnDate(sessions, date);
+            daySessions.forEach(session => {
+                timelineHTML += this.createTimelineSegment(
+                    session.start,
+                    session.end || now.toISOString(),
+                    session.end ? 'work' : 'work current',
+                    date
+                );
+            });
 
             timelineHTML += `
                     </div>
@@ -171,19 +139,12 @@ export class Timeline {
                         <div class="timeline-line-label">Break</div>
             `;
 
-            // Add break segments
-            currentSession = null;
-            for (let i = 0; i < dateEvents.length; i++) {
-                const event = dateEvents[i];
-                const nextEvent = dateEvents[i + 1];
-                
-                if ((event.type === 'lock' || event.type === 'system_shutdown' || event.type === 'logout') && nextEvent) {
-                    timelineHTML += this.createTimelineSegment(
-                        event.timestamp,
-                        nextEvent.timestamp,
-                        'off',
-                        date
-                    );
+            // Add break segments between consecutive sessions
+            for (let i = 0; i < sessions.length - 1; i++) {
+                const breakStart = sessions[i].end;
+                const breakEnd = sessions[i + 1].start;
+                if (breakStart && this.overlapsDate(breakStart, breakEnd, date)) {
+                    timelineHTML += this.createTimelineSegment(breakStart, breakEnd, 'off', date);
                 }
             }
 
@@ -202,6 +163,32 @@ export class Timeline {
         timelineContent.innerHTML = timelineHTML;
     }
 
+    /**
+     * Get the sessions overlapping a date
+     * @param {Array} sessions - Sessions in time order
+     * @param {string} date - Date in YYYY-MM-DD format
+     * @returns {Array} Sessions overlapping the date
+     */
+    sessionsOnDate(sessions, date) {
+        return sessions.filter(session =>
+            this.overlapsDate(session.start, session.end || new Date().toISOString(), date)
+        );
+    }
+
+    /**
+     * Check whether an interval overlaps a date
+     * @param {string} start - Interval start
+     * @param {string} end - Interval end
+     * @param {string} date - Date in YYYY-MM-DD format
+     * @returns {boolean} True if the interval overlaps the date
+     */
+    overlapsDate(start, end, date) {
+        const dayStart = new Date(`${date}T00:00:00`);
+        const dayEnd = new Date(dayStart);
+        dayEnd.setDate(dayEnd.getDate() + 1);
+        return new Date(start) < dayEnd && new Date(end) > dayStart;
+    }
+
     /**
      * Format event date
      * @param {string} timestamp - Timestamp to format
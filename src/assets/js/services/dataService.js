@@ -23,6 +23,50 @@ export async function loadDataForDate(date) {
     }
 }
 
+// Days loaded through /api/days, by date, with the hash the server sent
+const dayCache = new Map();
+let batchSupported = true;
+
+/**
+ * Load several days with one batched request, reusing unchanged cached days
+ * @param {Array<string>} dates - Dates to load
+ * @returns {Promise<Array<Object>>} Data for each date
+ */
+export async function loadDataForDates(dates) {
+    const known = dates
+        .filter(date => dayCache.has(date))
+        .map(date => `${date}:${dayCache.get(date).hash}`);
+    const params = new URLSearchParams({ dates: dates.join(',') });
+    if (known.length) {
+        params.set('known', known.join(','));
+    }
+
+    const response = await fetch(`/api/days?${params}`, {
+        headers: {
+            'Accept': 'application/json'
+        }
+    });
+    if (!response.ok) {
+        const error = new Error(`Batch request failed with ${response.status}`);
+        error.status = response.status;
+        throw error;
+    }
+    const batch = await response.json();
+
+    // Unchanged days come without data and are taken from the cache
+    const days = new Map();
+    for (const day of batch.days) {
+        if (day.data) {
+            dayCache.set(day.date, { hash: day.hash, data: day.data });
+        }
+        if (dayCache.has(day.date)) {
+            days.set(day.date, dayCache.get(day.date).data);
+        }
+    }
+    batch.missing.forEach(date => dayCache.delete(date));
+    return dates.map(date => days.has(date) ? { date, ...days.get(date) } : { date, events: [] });
+}
+
 /**
  * Load data for multiple dates
  * @param {string} startDate - Start date
@@ -40,10 +84,23 @@ export async function loadDataForDateRange(startDate, days) {
             dates.push(d.toISOString().split('T')[0]);
         }
 
-        // Load data for all dates
-        const allData = await Promise.all(
-            dates.map(date => loadDataForDate(date))
-        );
+        // Load data for all dates, one request per day if batching is unavailable
+        let allData = null;
+        if (batchSupported) {
+            try {
+                allData = await loadDataForDates(dates);
+            } catch (error) {
+                console.warn('Batched loading failed, fetching days separately:', error);
+                if (error instanceof SyntaxError || error.status === 404) {
+                    batchSupported = false;
+                }
+            }
+        }
+        if (!allData) {
+            allData = await Promise.all(
+                dates.map(date => loadDataForDate(date))
+            );
+        }
 
         // Combine all events
         return {
@@ -56,6 +113,34 @@ export async function loadDataForDateRange(startDate, days) {
     }
 }
 
+/**
+ * Load the sessions overlapping a date range, reconstructed by the server
+ * @param {string} endDate - Last date of the range
+ * @param {number} days - Number of days to load
+ * @returns {Promise<Array<Object>>} Sessions in time order
+ */
+export async function loadSessionsForDateRange(endDate, days) {
+    const start = new Date(endDate);
+    start.setDate(start.getDate() - (days - 1));
+    const startDate = start.toISOString().split('T')[0];
+
+    try {
+        const response = await fetch(`/api/sessions/range/${startDate}/${days}`, {
+            headers: {
+                'Accept': 'application/json'
+            }
+        });
+        if (!response.ok) {
+            return [];
+        }
+        const data = await response.json();
+        return data.sessions;
+    } catch (error) {
+        console.error('Error loading sessions:', error);
+        return [];
+    }
+}
+
 /**
  * Find current session from events
  * @param {Array} events - Array of events
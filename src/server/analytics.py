@@ -0,0 +1,335 @@
+"""
+Module computing usage heatmaps from a range of days with NumPy.
+
+The events of the range are loaded into two arrays, timestamps (int64
+microseconds since 1970-01-01 in local time) and session kinds (+1 for
+STARTUP/UNLOCK, -1 for LOCK/SHUTDOWN/LOGOUT, 2 for IDLE, -2 for ACTIVE, 0
+otherwise). Sessions and their idle stretches are paired with array masks
+the same way ``SessionIndex`` pairs them, and the active seconds of every
+hour of the range are read off a cumulative usage function evaluated at the
+hour boundaries. Archived days are read straight
+from their timestamp and type columns.
+"""
+
+from datetime import datetime, timedelta
+from functools import lru_cache
+from pathlib import Path
+from typing import Any, Callable, Dict, Iterable, List, Optional, Sequence, Tuple
+
+try:
+    import numpy as np
+except ImportError:  # numpy is optional, install the 'analytics' extra
+    np = None
+
+from ..tracker.core.day_state import SESSION_END_TYPES, SESSION_START_TYPES
+from ..tracker.events.event_types import EventType
+from ..tracker.storage.archive import ArchiveReader
+from ..tracker.storage.base import date_range
+from ..tracker.storage.day_files import archive_path, day_file_path, journal_path
+
+MICROS_PER_HOUR = 3600 * 1000000
+# Upper bound on the days of one heatmap
+MAX_ANALYTICS_DAYS = 3660
+DEFAULT_PERCENTILES = (50, 90)
+
+START = 1
+END = -1
+IDLE = 2
+ACTIVE = -2
+
+
+def available() -> bool:
+    """Check whether NumPy is installed."""
+    return np is not None
+
+
+@lru_cache(maxsize=None)
+def session_kind(name: str) -> int:
+    """
+    Get the session kind of a stored event type.
+
+    Args:
+        name: Stored type name in core or legacy spelling
+
+    Returns:
+        int: START, END, IDLE, ACTIVE or 0 for types that do not affect sessions
+    """
+    try:
+        event_type = EventType.parse(name)
+    except KeyError:
+        return 0
+    if event_type in SESSION_START_TYPES:
+        return START
+    if event_type in SESSION_END_TYPES:
+        return END
+    if event_type == EventType.IDLE:
+        return IDLE
+    if event_type == EventType.ACTIVE:
+        return ACTIVE
+    return 0
+
+
+def _archive_arrays(path: Path) -> Tuple['np.ndarray', 'np.ndarray']:
+    """Read the timestamp and kind columns of a day archive."""
+    with ArchiveReader(path) as reader:
+        stamps = np.array(reader.timestamps(), dtype=np.int64)
+        kinds_by_code = np.array([session_kind(name) for name in reader.type_names] or [0],
+                                 dtype=np.int8)
+        kinds = kinds_by_code[np.frombuffer(reader.type_codes(), dtype=np.uint8)]
+    return stamps, kinds
+
+
+def _event_arrays(events: Sequence[Dict[str, Any]]) -> Tuple['np.ndarray', 'np.ndarray']:
+    """Parse the events of a day into timestamp and kind arrays."""
+    stamps = np.array([event['timestamp'] for event in events],
+                      dtype='datetime64[us]').astype(np.int64)
+    names, inverse = np.unique([event['type'] for event in events], return_inverse=True)
+    kinds = np.array([session_kind(name) for name in names], dtype=np.int8)[inverse]
+    return stamps, kinds
+
+
+def load_arrays(dates: List[str], data_dir: Optional[Path],
+                load_days: Callable[[List[str]], Iterable[Tuple[str, Optional[Dict[str, Any]]]]]
+                ) -> Tuple['np.ndarray', 'np.ndarray']:
+    """
+    Load the events of several days into arrays sorted by time.
+
+    Args:
+        dates: Date strings in YYYY-MM-DD format
+        data_dir: Data directory whose archives are read directly, None to
+            load every day through load_days
+        load_days: Function loading several days, returning (date, data) pairs
+
+    Returns:
+        Tuple[np.ndarray, np.ndarray]: Timestamps in microseconds and
+        session kinds
+    """
+    columns = {}
+    remaining = []
+    for date in dates:
+        path = archive_path(data_dir, date) if data_dir is not None else None
+        if (path is not None and path.exists() and not day_file_path(data_dir, date).exists()
+                and not journal_path(data_dir, date).exists()):
+            try:
+                columns[date] = _archive_arrays(path)
+                continue
+            except FileNotFoundError:
+                pass
+        remaining.append(date)
+
+    for date, data in load_days(remaining):
+        events = data.get('events', []) if data else []
+        if events:
+            columns[date] = _event_arrays(events)
+
+    parts = [columns[date] for date in dates if date in columns]
+    if not parts:
+        return np.empty(0, dtype=np.int64), np.empty(0, dtype=np.int8)
+    stamps = np.concatenate([part[0] for part in parts])
+    kinds = np.concatenate([part[1] for part in parts])
+    # Stable, so events with equal timestamps keep their stored order
+    order = np.argsort(stamps, kind='stable')
+    return stamps[order], kinds[order]
+
+
+def active_intervals(stamps: 'np.ndarray', kinds: 'np.ndarray',
+                     open_end: Optional[int] = None) -> Tuple['np.ndarray', 'np.ndarray']:
+    """
+    Pair sorted events into non-overlapping active intervals.
+
+    A start followed by an end gives a session up to that end. A start
+    followed by another start lost its end event and ends at the last event
+    before the new start. A trailing start ends at open_end, or at the last
+    event if it is None. The idle stretches of the sessions, from an IDLE
+    event to the next ACTIVE event or the session end, are cut out.
+
+    Args:
+        stamps: Sorted timestamps in microseconds
+        kinds: Session kinds of the events
+        open_end: End of a session still open after the last event
+
+    Returns:
+        Tuple[np.ndarray, np.ndarray]: Interval starts and ends
+    """
+    positions = np.flatnonzero((kinds == START) | (kinds == END))
+    session_kinds = kinds[positions]
+
+    is_start = session_kinds[:-1] == START
+    next_positions = positions[1:]
+    ends = np.where(session_kinds[1:] == END, stamps[next_positions], stamps[next_positions - 1])
+    start_positions = positions[:-1][is_start]
+    ends = ends[is_start]
+
+    if len(session_kinds) and session_kinds[-1] == START:
+        last_end = open_end if open_end is not None else stamps[-1]
+        start_positions = np.append(start_positions, positions[-1])
+        ends = np.append(ends, max(last_end, stamps[positions[-1]]))
+
+    starts = stamps[start_positions]
+    keep = ends > starts
+    start_positions, starts, ends = start_positions[keep], starts[keep], ends[keep]
+
+    idle_starts, idle_ends = idle_intervals(stamps, kinds, start_positions, ends)
+    if not len(idle_starts):
+        return starts, ends
+    # Idle stretches lie inside the sessions without overlapping, so the
+    # active pieces start at session starts and idle ends and end at idle
+    # starts and session ends
+    starts = np.sort(np.concatenate([starts, idle_ends]))
+    ends = np.sort(np.concatenate([idle_starts, ends]))
+    keep = ends > starts
+    return starts[keep], ends[keep]
+
+
+def idle_intervals(stamps: 'np.ndarray', kinds: 'np.ndarray', start_positions: 'np.ndarray',
+                   ends: 'np.ndarray') -> Tuple['np.ndarray', 'np.ndarray']:
+    """
+    Find the idle stretches of paired sessions.
+
+    A stretch starts at the first IDLE event of a session or the first one
+    after an ACTIVE event, and ends at the next ACTIVE, start or end event,
+    clipped to the end of its session.
+
+    Args:
+        stamps: Sorted timestamps in microseconds
+        kinds: Session kinds of the events
+        start_positions: Positions of the start events of the sessions
+        ends: Session ends
+
+    Returns:
+        Tuple[np.ndarray, np.ndarray]: Stretch starts and ends
+    """
+    if not len(start_positions):
+        return np.empty(0, dtype=np.int64), np.empty(0, dtype=np.int64)
+    positions = np.flatnonzero(kinds)
+    relevant = kinds[positions]
+    is_idle = relevant == IDLE
+    # An IDLE repeated before the next ACTIVE changes nothing
+    opens = is_idle & np.concatenate([[True], ~is_idle[:-1]])
+
+    # The stretch belongs to the session started by the last start or end
+    # event before it, if that session was kept
+    is_session = (relevant == START) | (relevant == END)
+    owners = np.maximum.accumulate(np.where(is_session, positions, -1))[opens]
+    session = np.minimum(np.searchsorted(start_positions, owners), len(start_positions) - 1)
+    found = start_positions[session] == owners
+
+    # It ends at the next event that is not an IDLE, or with its session
+    following = np.minimum.accumulate(np.where(is_idle, len(stamps), positions)[::-1])[::-1]
+    follows = following[opens]
+    idle_starts = stamps[positions[opens]]
+    idle_ends = np.where(follows < len(stamps), stamps[np.minimum(follows, len(stamps) - 1)],
+                         np.iinfo(np.int64).max)
+    idle_ends = np.minimum(idle_ends, ends[session])
+    inside = found & (idle_ends > idle_starts)
+    return idle_starts[inside], idle_ends[inside]
+
+
+def hourly_active(starts: 'np.ndarray', ends: 'np.ndarray', range_start: int,
+                  hours: int) -> 'np.ndarray':
+    """
+    Compute the active seconds of consecutive hours.
+
+    The cumulative active time up to t is the length of the intervals ended
+    before t plus the part of at most one running interval, so it is
+    evaluated at every hour boundary with two binary searches.
+
+    Args:
+        starts: Sorted interval starts in microseconds
+        ends: Interval ends in microseconds, sorted since intervals do not overlap
+        range_start: Start of the first hour in microseconds
+        hours: Number of hours
+
+    Returns:
+        np.ndarray: Active seconds of each hour
+    """
+    if not len(starts):
+        return np.zeros(hours)
+    bounds = range_start + MICROS_PER_HOUR * np.arange(hours + 1, dtype=np.int64)
+    lengths = np.concatenate([[0], np.cumsum(ends - starts)])
+    started = np.searchsorted(starts, bounds, side='left')
+    ended = np.searchsorted(ends, bounds, side='right')
+    running = started > ended
+    partial = np.where(running, bounds - starts[np.minimum(ended, len(starts) - 1)], 0)
+    cumulative = lengths[ended] + partial
+    return np.diff(cumulative) / 1000000.0
+
+
+def heatmap(start_date: str, days: int, data_dir: Optional[Path],
+            load_days: Callable[[List[str]], Iterable[Tuple[str, Optional[Dict[str, Any]]]]],
+            percentiles: Sequence[float] = DEFAULT_PERCENTILES) -> Dict[str, Any]:
+    """
+    Compute hour-of-day and weekday usage statistics for a range of days.
+
+    The days before and after the range are loaded too, so sessions crossing
+    midnight at either end are counted up to the bounds of the range.
+
+    Args:
+        start_date: First date in YYYY-MM-DD format
+        days: Number of days
+        data_dir: Data directory whose archives are read directly, or None
+        load_days: Function loading several days, returning (date, data) pairs
+        percentiles: Percentiles of active seconds to report, in 0..100
+
+    Returns:
+        Dict[str, Any]: Per hour of day and per weekday (Monday first) totals,
+        means and percentiles across the days of the range, a weekday by
+        hour matrix of mean active seconds and the daily totals
+
+    Raises:
+        RuntimeError: If NumPy is not installed
+        ValueError: If the range is empty or too long
+    """
+    if not available():
+        raise RuntimeError("numpy is required for analytics")
+    if not 0 < days <= MAX_ANALYTICS_DAYS:
+        raise ValueError(f"days must be between 1 and {MAX_ANALYTICS_DAYS}")
+
+    start = datetime.strptime(start_date, '%Y-%m-%d')
+    dates = date_range((start - timedelta(days=1)).strftime('%Y-%m-%d'), days + 2)
+    stamps, kinds = load_arrays(dates, data_dir, load_days)
+
+    # A session still open when the loaded days reach today is running now
+    epoch = datetime(1970, 1, 1)
+    range_start = (start - epoch) // timedelta(microseconds=1)
+    now = datetime.now()
+    open_end = None
+    if dates[-1] >= now.strftime('%Y-%m-%d'):
+        open_end = (now - epoch) // timedelta(microseconds=1)
+    starts, ends = active_intervals(stamps, kinds, open_end)
+
+    by_day = hourly_active(starts, ends, range_start, days * 24).reshape(days, 24)
+    daily = by_day.sum(axis=1)
+    weekdays = (start.weekday() + np.arange(days)) % 7
+    weekday_days = np.bincount(weekdays, minlength=7)
+    weekday_hours = np.zeros((7, 24))
+    np.add.at(weekday_hours, weekdays, by_day)
+
+    def stats(values: 'np.ndarray', groups: Optional['np.ndarray'] = None) -> Dict[str, List]:
+        if groups is None:
+            result = {'total': values.sum(axis=0), 'mean': values.mean(axis=0)}
+            for q in percentiles:
+                result[f"p{q:g}"] = np.percentile(values, q, axis=0)
+        else:
+            totals = np.bincount(groups, weights=values, minlength=7)
+            result = {'total': totals,
+                      'mean': np.divide(totals, weekday_days,
+                                        out=np.zeros(7), where=weekday_days > 0)}
+            for q in percentiles:
+                result[f"p{q:g}"] = np.array([
+                    np.percentile(values[groups == day], q) if weekday_days[day] else 0.0
+                    for day in range(7)
+                ])
+        return {key: np.round(value, 1).tolist() for key, value in result.items()}
+
+    return {
+        'start': start_date,
+        'days': days,
+        'total_time': round(float(daily.sum()), 1),
+        'hourly': stats(by_day),
+        'weekday': dict(stats(daily, weekdays), days=weekday_days.tolist()),
+        'heatmap': np.round(np.divide(weekday_hours, weekday_days[:, None],
+                                      out=np.zeros((7, 24)),
+                                      where=weekday_days[:, None] > 0), 1).tolist(),
+        'daily': np.round(daily, 1).tolist()
+    }
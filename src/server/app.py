@@ -2,21 +2,82 @@
 Server module for serving the web interface.
 """
 
-import os
 import json
+import time
 from datetime import datetime, timedelta
 from pathlib import Path
-from typing import Dict, List, Optional
+from typing import List, Optional
 
-from flask import Flask, jsonify, send_from_directory
+from flask import Flask, Response, g, jsonify, request, send_from_directory, stream_with_context
 from flask_cors import CORS
 
+from . import analytics
+from .batch import build_batch, parse_dates, parse_known
+from .cache import CachedStorage, DayCache
+from .http_cache import (GzipCache, accepts_gzip, etag_matches, http_date, make_etag,
+                         not_modified_since, signature_mtime)
+from .loader import ParallelDayLoader
+from .query import QUERY_ARGS, DayIndexCache, EventQuery, select_archived
+from .sse import SSE_MIMETYPE, sse_stream
+from ..tracker.storage.base import date_range
+from ..tracker.storage.factory import create_storage
+from ..tracker.storage.rollup import ROLLUP_FILE_NAME, RollupIndex
+from ..tracker.storage.sessions import SessionIndex, total_time
+from ..tracker.storage.watcher import DayWatcher
 from ..tracker.utils.config import Config
+from ..tracker.utils.logger import start_logging
+from ..tracker.utils.metrics import CONTENT_TYPE, registry
 
 app = Flask(__name__)
 CORS(app)
 
+NDJSON_MIMETYPE = 'application/x-ndjson'
+
 config = Config()
+day_cache = DayCache(config.server.get('cache_max_bytes', 64 * 1024 * 1024))
+storage = CachedStorage(create_storage(config), day_cache)
+gzip_cache = GzipCache(config.server.get('gzip_cache_max_bytes', 16 * 1024 * 1024))
+index_cache = DayIndexCache(config.server.get('query_index_max_days', 64))
+day_loader = ParallelDayLoader(storage, config.server.get('loader_workers', 8))
+rollup_index = RollupIndex(Path(config.data_dir) / ROLLUP_FILE_NAME, storage)
+session_index = SessionIndex(storage, config.server.get('session_lookback_days', 7))
+day_watcher = DayWatcher(storage, config.server.get('stream_interval', 1.0))
+
+request_seconds = registry.histogram(
+    'chronos_http_request_duration_seconds', "Time spent answering requests",
+    ('route', 'method', 'status'))
+response_bytes = registry.counter(
+    'chronos_http_response_bytes_total', "Bytes of response bodies sent", ('route',))
+# The caches keep their own counters; they are read when metrics are scraped
+cache_lookups = registry.counter(
+    'chronos_cache_lookups_total', "Cache lookups by cache and result", ('cache', 'result'))
+cache_evictions = registry.counter(
+    'chronos_cache_evictions_total', "Entries evicted to stay within the size limit", ('cache',))
+cache_bytes = registry.gauge('chronos_cache_bytes', "Bytes held by a cache", ('cache',))
+for cache_name, cache in (('day', day_cache), ('gzip', gzip_cache)):
+    cache_lookups.set_function(lambda cache=cache: cache.hits, cache=cache_name, result='hit')
+    cache_lookups.set_function(lambda cache=cache: cache.misses, cache=cache_name, result='miss')
+    cache_bytes.set_function(lambda cache=cache: cache.size, cache=cache_name)
+cache_evictions.set_function(lambda: day_cache.evictions, cache='day')
+
+@app.before_request
+def start_timer():
+    """Remember when the request started for its latency metric."""
+    g.request_start = time.perf_counter()
+
+@app.after_request
+def record_request(response: Response) -> Response:
+    """Record the latency and size of a response by route."""
+    # Route templates keep the label set small, unlike the request paths
+    route = request.url_rule.rule if request.url_rule is not None else 'unmatched'
+    start = g.get('request_start')
+    if start is not None:
+        request_seconds.observe(time.perf_counter() - start, route=route,
+                                method=request.method, status=response.status_code)
+    # Streamed responses have no length until they are sent
+    if response.content_length:
+        response_bytes.inc(response.content_length, route=route)
+    return response
 
 @app.route('/')
 def index():
@@ -36,18 +97,91 @@ def get_data(date: str):
     Args:
         date: Date string in YYYY-MM-DD format
 
+    Optional query arguments ``from`` and ``to`` (ISO timestamps or times of
+    day), ``types`` (comma separated) and ``limit`` select a slice of the
+    events. Pages after the first are requested with the ``next_cursor`` of
+    the previous one as ``cursor``.
+
     Returns:
         Dict: Screen time data for the date
     """
+    if any(request.args.get(name) for name in QUERY_ARGS):
+        return _query_day(date)
+
     try:
-        file_path = Path(config.data_dir) / f"screen_time_{date}.json"
-        if file_path.exists():
-            with open(file_path, 'r') as f:
-                return jsonify(json.load(f))
+        entry = storage.load_entry(date)
+        if entry is not None:
+            # Serve the pre-serialized body of the cached day
+            return _json_response(entry.body, entry.signature, date, _is_closed([date]),
+                                  signature_mtime(entry.signature))
         return jsonify({'events': [], 'total_time': 0})
     except Exception as e:
         return jsonify({'error': str(e)}), 500
 
+def _query_day(date: str) -> Response:
+    """
+    Answer a filtered or paginated query on one day.
+
+    Archived days are sliced in place; other days are answered from their
+    cached index.
+
+    Args:
+        date: Date string in YYYY-MM-DD format
+
+    Returns:
+        Response: Matching events, the day's total time and ``next_cursor``
+    """
+    try:
+        query = EventQuery.parse(date, request.args)
+    except ValueError as e:
+        return jsonify({'error': str(e)}), 400
+
+    try:
+        reader = storage.open_archive(date)
+        if reader is not None:
+            with reader:
+                return _query_response(date, query, storage.day_signature(date),
+                                       reader.day_fields.get('total_time', 0),
+                                       lambda: select_archived(reader, query))
+
+        entry = storage.load_entry(date)
+        if entry is None:
+            return jsonify({'events': [], 'total_time': 0, 'next_cursor': None})
+        return _query_response(
+            date, query, entry.signature, entry.data.get('total_time', 0),
+            lambda: index_cache.get(date, entry.signature, entry.data.get('events', [])).select(query))
+    except Exception as e:
+        return jsonify({'error': str(e)}), 500
+
+def _query_response(date: str, query: EventQuery, day_signature, total_time: float,
+                    select) -> Response:
+    """
+    Build the response of a query, running it only if the client's copy is stale.
+
+    Args:
+        date: Date string in YYYY-MM-DD format
+        query: Parsed query
+        day_signature: Storage signature of the day
+        total_time: Total time of the day
+        select: Callable returning the matching events and the next cursor
+
+    Returns:
+        Response: The response
+    """
+    signature = (day_signature, query)
+    mtime = signature_mtime(day_signature)
+    cached = _not_modified(signature, mtime)
+    if cached is not None:
+        return cached
+
+    events, next_cursor = select()
+    body = json.dumps({
+        'events': events,
+        'total_time': total_time,
+        'next_cursor': next_cursor
+    }).encode()
+    return _json_response(body, signature, (date, query), _is_closed([date]), mtime)
+
 @app.route('/api/data/range/<start_date>/<int:days>')
 def get_data_range(start_date: str, days: int):
     """
@@ -57,25 +191,292 @@ def get_data_range(start_date: str, days: int):
         start_date: Start date string in YYYY-MM-DD format
         days: Number of days to include
 
+    Clients sending ``Accept: application/x-ndjson`` (or ``?format=ndjson``)
+    receive one event per line, streamed day by day, followed by a
+    ``{"totals": ...}`` line.
+
     Returns:
         Dict: Combined screen time data for the date range
     """
     try:
-        start = datetime.strptime(start_date, '%Y-%m-%d')
+        if _wants_ndjson():
+            dates = date_range(start_date, days)
+            return Response(
+                stream_with_context(_stream_range(dates)),
+                mimetype=NDJSON_MIMETYPE
+            )
+
+        dates = date_range(start_date, days)
+        signature = tuple(storage.day_signature(date) for date in dates)
+        mtime = signature_mtime(*signature)
+        cached = _not_modified(signature, mtime)
+        if cached is not None:
+            return cached
+
         combined_data = {'events': [], 'total_time': 0}
 
-        for i in range(days):
-            current_date = start + timedelta(days=i)
-            date_str = current_date.strftime('%Y-%m-%d')
-            file_path = Path(config.data_dir) / f"screen_time_{date_str}.json"
-            
-            if file_path.exists():
-                with open(file_path, 'r') as f:
-                    data = json.load(f)
-                    combined_data['events'].extend(data.get('events', []))
-                    combined_data['total_time'] += data.get('total_time', 0)
-
-        return jsonify(combined_data)
+        for date_str, data in day_loader.load(dates):
+            if data is not None:
+                combined_data['events'].extend(data.get('events', []))
+                combined_data['total_time'] += data.get('total_time', 0)
+
+        body = json.dumps(combined_data).encode()
+        return _json_response(body, signature, (start_date, days), _is_closed(dates), mtime)
+    except Exception as e:
+        return jsonify({'error': str(e)}), 500
+
+@app.route('/api/days')
+def get_days():
+    """
+    Get the stored days of a date list or range in one response.
+
+    Query arguments are ``dates=YYYY-MM-DD,...`` or ``start=YYYY-MM-DD&days=N``,
+    and optionally ``known=YYYY-MM-DD:hash,...`` with the day hashes the
+    client already has. Those days are returned without their data.
+
+    Returns:
+        Dict: Stored days with their hashes and the missing dates
+    """
+    try:
+        dates = parse_dates(request.args)
+    except ValueError as e:
+        return jsonify({'error': str(e)}), 400
+
+    try:
+        signatures = {date: storage.day_signature(date) for date in dates}
+        known = parse_known(request.args.get('known'))
+        signature = (tuple(signatures.values()), tuple(sorted(known.items())))
+        cached = _not_modified(signature)
+        if cached is not None:
+            return cached
+
+        batch = build_batch(dates, signatures, known, day_loader.load)
+        body = json.dumps(batch).encode()
+        return _json_response(body, signature, tuple(dates), _is_closed(dates))
+    except Exception as e:
+        return jsonify({'error': str(e)}), 500
+
+def _is_closed(dates: List[str]) -> bool:
+    """Check whether all dates are before today and so no longer change."""
+    return bool(dates) and max(dates) < datetime.now().strftime('%Y-%m-%d')
+
+def _etag(signature) -> str:
+    """Get the ETag of the representation the client will receive."""
+    variant = 'gzip' if accepts_gzip(request.headers.get('Accept-Encoding')) else None
+    return make_etag(signature, variant)
+
+def _not_modified(signature, mtime: Optional[float] = None) -> Optional[Response]:
+    """
+    Answer a conditional request without reading the data.
+
+    If-Modified-Since is only used by clients that send no If-None-Match.
+
+    Args:
+        signature: Storage signature of the requested content
+        mtime: Optional modification time of the content
+
+    Returns:
+        Optional[Response]: 304 response if the client's copy is current
+    """
+    etag = _etag(signature)
+    if_none_match = request.headers.get('If-None-Match')
+    if not (etag_matches(if_none_match, etag) or
+            (if_none_match is None and mtime is not None and
+             not_modified_since(request.headers.get('If-Modified-Since'), mtime))):
+        return None
+    response = Response(status=304)
+    _set_validators(response, etag, mtime)
+    return response
+
+def _set_validators(response: Response, etag: str, mtime: Optional[float] = None):
+    """Add the cache validation headers to a response."""
+    response.headers['ETag'] = etag
+    if mtime is not None:
+        response.headers['Last-Modified'] = http_date(mtime)
+    # Clients may keep the body but must revalidate it on every use
+    response.headers['Cache-Control'] = 'no-cache'
+    response.headers['Vary'] = 'Accept-Encoding'
+
+def _json_response(body: bytes, signature, key, closed: bool,
+                   mtime: Optional[float] = None) -> Response:
+    """
+    Build a JSON response with validators, answering 304 or gzip when possible.
+
+    Args:
+        body: Serialized JSON body
+        signature: Storage signature the body was built from
+        key: Key of the content in the gzip cache
+        closed: Whether the content is immutable and its compressed bytes
+            may be cached
+        mtime: Optional modification time sent as Last-Modified
+
+    Returns:
+        Response: The response
+    """
+    not_modified = _not_modified(signature, mtime)
+    if not_modified is not None:
+        return not_modified
+
+    response = Response(body, mimetype='application/json')
+    if accepts_gzip(request.headers.get('Accept-Encoding')):
+        response.set_data(gzip_cache.compress((key, signature), body, cacheable=closed))
+        response.headers['Content-Encoding'] = 'gzip'
+    _set_validators(response, _etag(signature), mtime)
+    return response
+
+def _wants_ndjson() -> bool:
+    """Check whether the client asked for a streamed NDJSON response."""
+    if request.args.get('format') == 'ndjson':
+        return True
+    best = request.accept_mimetypes.best_match(['application/json', NDJSON_MIMETYPE])
+    return best == NDJSON_MIMETYPE
+
+def _stream_range(dates: List[str]):
+    """
+    Yield the events of consecutive days as NDJSON.
+
+    Days are read a few at a time ahead of the response, and each day is
+    sent as one chunk.
+
+    Args:
+        dates: Date strings in order
+
+    Yields:
+        str: NDJSON lines
+    """
+    total_time = 0
+    event_count = 0
+    for date, data in day_loader.iter(dates):
+        if data is None:
+            continue
+        events = data.get('events', [])
+        if events:
+            yield ''.join(json.dumps(event) + '\n' for event in events)
+        event_count += len(events)
+        total_time += data.get('total_time', 0)
+
+    yield json.dumps({'totals': {
+        'total_time': total_time,
+        'event_count': event_count,
+        'days': len(dates)
+    }}) + '\n'
+
+@app.route('/api/summary/range/<start_date>/<int:days>')
+def get_summary_range(start_date: str, days: int):
+    """
+    Get per-day summaries for a range of dates from the rollup index.
+
+    Args:
+        start_date: Start date string in YYYY-MM-DD format
+        days: Number of days to include
+
+    Returns:
+        Dict: Day summaries and the combined total time
+    """
+    try:
+        summaries = rollup_index.summarize_range(start_date, days)
+        return jsonify({
+            'days': summaries,
+            'total_time': sum(summary['total_time'] for summary in summaries)
+        })
+    except Exception as e:
+        return jsonify({'error': str(e)}), 500
+
+@app.route('/api/sessions/range/<start_date>/<int:days>')
+def get_sessions_range(start_date: str, days: int):
+    """
+    Get the sessions overlapping a range of dates.
+
+    Sessions crossing midnight or the bounds of the range are returned whole.
+    Sessions whose end event is missing end at their last event and have
+    ``complete: false``; the running session has ``end: null``.
+
+    Args:
+        start_date: Start date string in YYYY-MM-DD format
+        days: Number of days to include
+
+    Returns:
+        Dict: Sessions in time order and the time used within the range
+    """
+    try:
+        start = datetime.strptime(start_date, '%Y-%m-%d')
+    except ValueError as e:
+        return jsonify({'error': str(e)}), 400
+
+    try:
+        sessions = session_index.sessions(start_date, days)
+        return jsonify({
+            'sessions': [session.to_dict() for session in sessions],
+            'total_time': total_time(sessions, start, start + timedelta(days=days))
+        })
+    except Exception as e:
+        return jsonify({'error': str(e)}), 500
+
+@app.route('/api/active-at/<timestamp>')
+def get_active_at(timestamp: str):
+    """
+    Check whether the screen was in use at a time.
+
+    Args:
+        timestamp: Local ISO timestamp or seconds since the epoch
+
+    Returns:
+        Dict: Whether a session was running and that session
+    """
+    try:
+        try:
+            when = datetime.fromtimestamp(float(timestamp))
+        except ValueError:
+            when = datetime.fromisoformat(timestamp)
+            if when.tzinfo is not None:
+                when = when.astimezone().replace(tzinfo=None)
+    except ValueError as e:
+        return jsonify({'error': str(e)}), 400
+
+    try:
+        session = session_index.active_at(when)
+        return jsonify({
+            'timestamp': when.isoformat(),
+            'active': session is not None,
+            'session': session.to_dict() if session is not None else None
+        })
+    except Exception as e:
+        return jsonify({'error': str(e)}), 500
+
+@app.route('/api/analytics/heatmap')
+def get_heatmap():
+    """
+    Get hour-of-day and weekday usage statistics for a range of days.
+
+    Query arguments are ``start=YYYY-MM-DD`` and ``days=N`` (by default the
+    30 days up to today) and optionally ``percentiles=50,90``.
+
+    Returns:
+        Dict: Active seconds per hour of day and per weekday with totals,
+        means and percentiles, a weekday by hour matrix and daily totals
+    """
+    if not analytics.available():
+        return jsonify({'error': "numpy is not installed, install the 'analytics' extra"}), 501
+
+    try:
+        days = int(request.args.get('days', 30))
+        start_date = request.args.get('start') or (
+            datetime.now() - timedelta(days=days - 1)).strftime('%Y-%m-%d')
+        percentiles = analytics.DEFAULT_PERCENTILES
+        if request.args.get('percentiles'):
+            percentiles = [float(value) for value in request.args['percentiles'].split(',')]
+            if not all(0 <= value <= 100 for value in percentiles):
+                raise ValueError("percentiles must be between 0 and 100")
+        datetime.strptime(start_date, '%Y-%m-%d')
+        if not 0 < days <= analytics.MAX_ANALYTICS_DAYS:
+            raise ValueError(f"days must be between 1 and {analytics.MAX_ANALYTICS_DAYS}")
+    except ValueError as e:
+        return jsonify({'error': str(e)}), 400
+
+    try:
+        # Archives are only read directly next to the day files they replace
+        data_dir = Path(config.data_dir) if storage.name != 'sqlite' else None
+        return jsonify(analytics.heatmap(start_date, days, data_dir, day_loader.load, percentiles))
     except Exception as e:
         return jsonify({'error': str(e)}), 500
 
@@ -88,29 +489,65 @@ def get_current_session():
         Dict: Current session information
     """
     try:
-        today = datetime.now().strftime('%Y-%m-%d')
-        file_path = Path(config.data_dir) / f"screen_time_{today}.json"
-        
-        if file_path.exists():
-            with open(file_path, 'r') as f:
-                data = json.load(f)
-                events = data.get('events', [])
-                
-                # Find the last STARTUP or UNLOCK event
-                for event in reversed(events):
-                    if event['type'] in ['STARTUP', 'UNLOCK']:
-                        return jsonify({
-                            'start_time': event['timestamp'],
-                            'is_active': True
-                        })
+        # Find today's last STARTUP or UNLOCK event
+        event = storage.last_event(types=['STARTUP', 'UNLOCK'], max_days=1)
+        if event is not None:
+            return jsonify({
+                'start_time': event['timestamp'],
+                'is_active': True
+            })
         
         return jsonify({'is_active': False})
     except Exception as e:
         return jsonify({'error': str(e)}), 500
 
+@app.route('/api/stream')
+def stream_updates():
+    """
+    Push live session state and today's new events as Server-Sent Events.
+
+    Every client shares one watcher of today's data. The stream starts with
+    a ``session`` event and then sends ``event`` for each stored event,
+    ``session`` when a session starts or ends and ``reset`` when the day
+    changes.
+
+    Returns:
+        Response: ``text/event-stream`` response
+    """
+    return Response(
+        stream_with_context(sse_stream(day_watcher)),
+        mimetype=SSE_MIMETYPE,
+        headers={'Cache-Control': 'no-cache', 'X-Accel-Buffering': 'no'}
+    )
+
+@app.route('/api/cache-stats')
+def get_cache_stats():
+    """
+    Get day cache counters.
+
+    Returns:
+        Dict: Cache size and hit/miss/eviction counts, with the counters
+        of the compressed body cache under ``gzip``
+    """
+    stats = day_cache.stats()
+    stats['gzip'] = gzip_cache.stats()
+    return jsonify(stats)
+
+@app.route('/metrics')
+def get_metrics():
+    """
+    Get the server's metrics in the Prometheus text exposition format.
+
+    Returns:
+        Response: Request latencies, cache counters, bytes read from day
+        files and storage write metrics
+    """
+    return Response(registry.render(), content_type=CONTENT_TYPE)
+
 def run_server():
     """Run the Flask server."""
     server_config = config.server
+    start_logging(config.log_dir, 'server.log', config.logging)
     app.run(
         host=server_config.get('host', 'localhost'),
         port=server_config.get('port', 5000)
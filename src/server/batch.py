@@ -0,0 +1,118 @@
+"""
+Module for answering batched multi-day requests.
+
+A batch returns every stored day of a date list in one response, each with a
+hash of its storage signature. Clients send back the hashes they already
+have and receive only the days that changed.
+
+Only the standard library is used so that ``serve_viewer.py`` can import it
+without Flask installed.
+"""
+
+from datetime import datetime, timedelta
+from typing import Any, Callable, Dict, Iterable, List, Mapping, Optional, Tuple
+
+from .http_cache import make_etag
+
+# Upper bound on the days of one batch
+MAX_BATCH_DAYS = 366
+
+
+def parse_dates(args: Mapping[str, str]) -> List[str]:
+    """
+    Read the requested dates from query arguments.
+
+    Either ``dates`` (comma separated) or ``start`` and ``days`` must be given.
+
+    Args:
+        args: Query arguments
+
+    Returns:
+        List[str]: Date strings in YYYY-MM-DD format
+
+    Raises:
+        ValueError: If the arguments are missing, malformed or too many days
+            are requested
+    """
+    if args.get('dates'):
+        dates = [date.strip() for date in args['dates'].split(',') if date.strip()]
+        for date in dates:
+            datetime.strptime(date, '%Y-%m-%d')
+    elif args.get('start'):
+        start = datetime.strptime(args['start'], '%Y-%m-%d')
+        days = int(args.get('days', 1))
+        dates = [(start + timedelta(days=i)).strftime('%Y-%m-%d') for i in range(max(days, 0))]
+    else:
+        raise ValueError("Pass either dates=YYYY-MM-DD,... or start=YYYY-MM-DD&days=N")
+
+    if len(dates) > MAX_BATCH_DAYS:
+        raise ValueError(f"At most {MAX_BATCH_DAYS} days can be requested at once")
+    return dates
+
+
+def parse_known(value: Optional[str]) -> Dict[str, str]:
+    """
+    Read the ``known`` argument listing the day hashes a client already has.
+
+    Args:
+        value: Comma separated ``date:hash`` pairs
+
+    Returns:
+        Dict[str, str]: Hash by date
+    """
+    known = {}
+    for pair in (value or '').split(','):
+        date, _, digest = pair.strip().partition(':')
+        if date and digest:
+            known[date] = digest
+    return known
+
+
+def day_hash(signature: Tuple) -> str:
+    """
+    Get the hash a client uses to recognize a version of a day.
+
+    Args:
+        signature: Storage signature of the day
+
+    Returns:
+        str: Hash of the signature
+    """
+    return make_etag(signature).strip('"')
+
+
+def build_batch(dates: List[str], signatures: Mapping[str, Optional[Tuple]],
+                known: Mapping[str, str],
+                load_days: Callable[[List[str]], Iterable[Tuple[str, Optional[Dict[str, Any]]]]]
+                ) -> Dict[str, Any]:
+    """
+    Build the batch response for a list of dates.
+
+    Args:
+        dates: Requested date strings in order
+        signatures: Storage signature of each date, None if nothing is stored
+        known: Hash by date of the days the client already has
+        load_days: Function loading several days, returning (date, data) pairs
+
+    Returns:
+        Dict[str, Any]: ``days`` with ``date``, ``hash`` and either ``data``
+        or ``unchanged: true`` for each stored day, and the ``missing`` dates
+    """
+    hashes = {date: day_hash(signatures[date]) for date in dates
+              if signatures.get(date) is not None}
+    changed = [date for date in dates if date in hashes and known.get(date) != hashes[date]]
+    loaded = dict(load_days(changed))
+
+    days = []
+    missing = []
+    for date in dates:
+        if date not in hashes:
+            missing.append(date)
+        elif date not in loaded:
+            days.append({'date': date, 'hash': hashes[date], 'unchanged': True})
+        elif loaded[date] is None:
+            # Removed after its signature was read
+            missing.append(date)
+        else:
+            days.append({'date': date, 'hash': hashes[date], 'data': loaded[date]})
+    return {'days': days, 'missing': missing}
@@ -0,0 +1,166 @@
+"""
+Module for caching parsed day payloads in the server.
+"""
+
+import json
+from collections import OrderedDict
+from threading import Lock
+from typing import Any, Dict, Iterable, NamedTuple, Optional, Tuple
+
+from ..tracker.storage.archive import ArchiveReader
+from ..tracker.storage.base import Storage
+
+
+class CachedDay(NamedTuple):
+    """A parsed day together with its serialized JSON body."""
+
+    signature: Tuple
+    data: Dict[str, Any]
+    body: bytes
+
+
+class DayCache:
+    """Bounded LRU cache of day payloads keyed by date and signature."""
+
+    def __init__(self, max_bytes: int = 64 * 1024 * 1024):
+        """
+        Initialize the cache.
+
+        Args:
+            max_bytes: Total size of the cached JSON bodies before the least
+                recently used days are evicted
+        """
+        self.max_bytes = max_bytes
+        self.size = 0
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self._entries: 'OrderedDict[str, CachedDay]' = OrderedDict()
+        self._lock = Lock()
+
+    def get(self, key: str, signature: Tuple) -> Optional[CachedDay]:
+        """
+        Look up a day.
+
+        Args:
+            key: Cache key, usually the date
+            signature: Current signature of the stored day
+
+        Returns:
+            Optional[CachedDay]: Cached day if it is still current
+        """
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None or entry.signature != signature:
+                self.misses += 1
+                return None
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return entry
+
+    def put(self, key: str, signature: Tuple, data: Dict[str, Any],
+            body: Optional[bytes] = None) -> CachedDay:
+        """
+        Store a day, evicting least recently used days if needed.
+
+        Args:
+            key: Cache key, usually the date
+            signature: Signature of the stored day the data was read from
+            data: Parsed day data
+            body: Optional serialized JSON of the data
+
+        Returns:
+            CachedDay: The cached entry
+        """
+        if body is None:
+            body = json.dumps(data).encode()
+        entry = CachedDay(signature, data, body)
+
+        with self._lock:
+            old = self._entries.pop(key, None)
+            if old is not None:
+                self.size -= len(old.body)
+            if len(body) > self.max_bytes:
+                return entry
+            self._entries[key] = entry
+            self.size += len(body)
+            while self.size > self.max_bytes:
+                _, evicted = self._entries.popitem(last=False)
+                self.size -= len(evicted.body)
+                self.evictions += 1
+        return entry
+
+    def stats(self) -> Dict[str, int]:
+        """
+        Get cache counters.
+
+        Returns:
+            Dict[str, int]: Entries, size and hit/miss/eviction counters
+        """
+        with self._lock:
+            return {
+                'entries': len(self._entries),
+                'bytes': self.size,
+                'max_bytes': self.max_bytes,
+                'hits': self.hits,
+                'misses': self.misses,
+                'evictions': self.evictions
+            }
+
+
+class CachedStorage(Storage):
+    """Read-only storage wrapper serving days from a DayCache.
+
+    Returned day data is shared between requests and must not be mutated.
+    """
+
+    def __init__(self, storage: Storage, cache: DayCache):
+        """
+        Initialize the wrapper.
+
+        Args:
+            storage: Underlying storage
+            cache: Cache of parsed days
+        """
+        self.storage = storage
+        self.cache = cache
+        self.name = storage.name
+        self.indexed_lookups = storage.indexed_lookups
+
+    def load_entry(self, date: str) -> Optional[CachedDay]:
+        """
+        Load a day with its serialized body, re-reading it only if it changed.
+
+        Args:
+            date: Date string in YYYY-MM-DD format
+
+        Returns:
+            Optional[CachedDay]: Cached day or None if nothing is stored
+        """
+        signature = self.storage.day_signature(date)
+        if signature is None:
+            return None
+        entry = self.cache.get(date, signature)
+        if entry is None:
+            data = self.storage.load_day(date)
+            if data is None:
+                return None
+            entry = self.cache.put(date, signature, data)
+        return entry
+
+    def load_day(self, date: str) -> Optional[Dict[str, Any]]:
+        entry = self.load_entry(date)
+        return entry.data if entry else None
+
+    def day_signature(self, date: str) -> Optional[Tuple]:
+        return self.storage.day_signature(date)
+
+    def open_archive(self, date: str) -> Optional[ArchiveReader]:
+        return self.storage.open_archive(date)
+
+    def last_event(self, types: Optional[Iterable[str]] = None,
+                   max_days: int = 7) -> Optional[Dict[str, Any]]:
+        if self.indexed_lookups:
+            return self.storage.last_event(types, max_days)
+        # Scan the cached days instead of re-reading the files
+        return super().last_event(types, max_days)
@@ -0,0 +1,198 @@
+"""
+Module with HTTP validator and compression helpers shared by both servers.
+
+Only the standard library is used so that ``serve_viewer.py`` can import it
+without Flask installed.
+"""
+
+import gzip
+import hashlib
+from collections import OrderedDict
+from email.utils import formatdate, parsedate_to_datetime
+from threading import Lock
+from typing import Any, Dict, Hashable, Optional
+
+GZIP_LEVEL = 6
+
+
+def make_etag(signature: Any, variant: Optional[str] = None) -> str:
+    """
+    Build a strong ETag from a storage signature.
+
+    Args:
+        signature: Value that changes whenever the content changes
+        variant: Optional representation name, e.g. 'gzip'
+
+    Returns:
+        str: Quoted ETag
+    """
+    digest = hashlib.blake2b(repr(signature).encode(), digest_size=8).hexdigest()
+    return f'"{digest}-{variant}"' if variant else f'"{digest}"'
+
+
+def etag_matches(if_none_match: Optional[str], etag: str) -> bool:
+    """
+    Check an If-None-Match header against an ETag.
+
+    Args:
+        if_none_match: Header value
+        etag: Current ETag
+
+    Returns:
+        bool: True if the client's copy is current
+    """
+    if not if_none_match:
+        return False
+    if if_none_match.strip() == '*':
+        return True
+    for candidate in if_none_match.split(','):
+        candidate = candidate.strip()
+        if candidate.startswith('W/'):
+            candidate = candidate[2:]
+        if candidate == etag:
+            return True
+    return False
+
+
+def not_modified_since(if_modified_since: Optional[str], mtime: float) -> bool:
+    """
+    Check an If-Modified-Since header against a modification time.
+
+    Args:
+        if_modified_since: Header value
+        mtime: Modification time as a UNIX timestamp
+
+    Returns:
+        bool: True if the content did not change since the given date
+    """
+    if not if_modified_since:
+        return False
+    try:
+        since = parsedate_to_datetime(if_modified_since)
+    except (TypeError, ValueError):
+        return False
+    if since is None:
+        return False
+    return int(mtime) <= since.timestamp()
+
+
+def http_date(timestamp: float) -> str:
+    """
+    Format a UNIX timestamp as an HTTP date.
+
+    Args:
+        timestamp: UNIX timestamp
+
+    Returns:
+        str: HTTP date string
+    """
+    return formatdate(timestamp, usegmt=True)
+
+
+def signature_mtime(*signatures: Any) -> Optional[float]:
+    """
+    Get the last modification time recorded in day signatures.
+
+    Args:
+        signatures: Day signatures of file based storage, i.e. tuples of
+            (name, mtime_ns, size), or None for days without files
+
+    Returns:
+        Optional[float]: Latest modification time as a UNIX timestamp, or
+        None if no signature carries file times
+    """
+    mtimes = []
+    for signature in signatures:
+        if signature is None:
+            continue
+        try:
+            mtimes.extend(entry[1] for entry in signature)
+        except TypeError:
+            # Database signatures hold counters, not file times
+            return None
+    return max(mtimes) / 1e9 if mtimes else None
+
+
+def accepts_gzip(accept_encoding: Optional[str]) -> bool:
+    """
+    Check whether a client accepts gzip responses.
+
+    Args:
+        accept_encoding: Accept-Encoding header value
+
+    Returns:
+        bool: True if gzip is acceptable
+    """
+    if not accept_encoding:
+        return False
+    for part in accept_encoding.split(','):
+        coding, _, params = part.strip().partition(';')
+        if coding.strip().lower() in ('gzip', '*'):
+            return params.replace(' ', '') not in ('q=0', 'q=0.0')
+    return False
+
+
+class GzipCache:
+    """Bounded LRU cache of compressed bodies keyed by content signature."""
+
+    def __init__(self, max_bytes: int = 16 * 1024 * 1024):
+        """
+        Initialize the cache.
+
+        Args:
+            max_bytes: Total size of compressed bodies kept in memory
+        """
+        self.max_bytes = max_bytes
+        self.size = 0
+        self.hits = 0
+        self.misses = 0
+        self._entries: 'OrderedDict[Hashable, bytes]' = OrderedDict()
+        self._lock = Lock()
+
+    def compress(self, key: Hashable, body: bytes, cacheable: bool = True) -> bytes:
+        """
+        Get the gzip encoding of a body, reusing a cached copy if possible.
+
+        Args:
+            key: Key that identifies the content, including its signature
+            body: Uncompressed body
+            cacheable: Whether the content is immutable and may be cached
+
+        Returns:
+            bytes: Compressed body
+        """
+        if cacheable:
+            with self._lock:
+                cached = self._entries.get(key)
+                if cached is not None:
+                    self._entries.move_to_end(key)
+                    self.hits += 1
+                    return cached
+                self.misses += 1
+
+        compressed = gzip.compress(body, compresslevel=GZIP_LEVEL, mtime=0)
+        if cacheable and len(compressed) <= self.max_bytes:
+            with self._lock:
+                if key not in self._entries:
+                    self._entries[key] = compressed
+                    self.size += len(compressed)
+                while self.size > self.max_bytes:
+                    _, evicted = self._entries.popitem(last=False)
+                    self.size -= len(evicted)
+        return compressed
+
+    def stats(self) -> Dict[str, int]:
+        """
+        Get cache counters.
+
+        Returns:
+            Dict[str, int]: Entries, size and hit/miss counters
+        """
+        with self._lock:
+            return {
+                'entries': len(self._entries),
+                'bytes': self.size,
+                'max_bytes': self.max_bytes,
+                'hits': self.hits,
+                'misses': self.misses
+            }
@@ -0,0 +1,78 @@
+"""
+Module for loading several days concurrently.
+"""
+
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Dict, Iterator, List, Optional, Tuple
+
+from ..tracker.storage.base import Storage
+
+DayResult = Tuple[str, Optional[Dict[str, Any]]]
+
+
+class ParallelDayLoader:
+    """Loads days on a bounded thread pool while keeping date order."""
+
+    def __init__(self, storage: Storage, max_workers: int = 8):
+        """
+        Initialize the loader.
+
+        Args:
+            storage: Storage the days are read from
+            max_workers: Number of days read at the same time
+        """
+        self.storage = storage
+        self.max_workers = max_workers
+        self._executor = ThreadPoolExecutor(max_workers=max_workers,
+                                            thread_name_prefix='day-loader')
+
+    def load(self, dates: List[str]) -> List[DayResult]:
+        """
+        Load days concurrently.
+
+        Args:
+            dates: Date strings in the order the results should have
+
+        Returns:
+            List[DayResult]: (date, data) pairs in the order of dates
+        """
+        if len(dates) <= 1 or self.max_workers <= 1:
+            return [(date, self.storage.load_day(date)) for date in dates]
+        return list(zip(dates, self._executor.map(self.storage.load_day, dates)))
+
+    def iter(self, dates: List[str], window: Optional[int] = None) -> Iterator[DayResult]:
+        """
+        Yield days in order while reading at most `window` days ahead.
+
+        Args:
+            dates: Date strings in the order the results should have
+            window: Number of days in flight, defaults to max_workers
+
+        Yields:
+            DayResult: (date, data) pairs in the order of dates
+        """
+        if self.max_workers <= 1:
+            for date in dates:
+                yield date, self.storage.load_day(date)
+            return
+
+        window = window or self.max_workers
+        pending = deque()
+        remaining = iter(dates)
+
+        for date in remaining:
+            pending.append((date, self._executor.submit(self.storage.load_day, date)))
+            if len(pending) >= window:
+                break
+
+        while pending:
+            date, future = pending.popleft()
+            next_date = next(remaining, None)
+            if next_date is not None:
+                pending.append((next_date, self._executor.submit(self.storage.load_day, next_date)))
+            yield date, future.result()
+
+    def shutdown(self):
+        """Stop the worker threads."""
+        self._executor.shutdown(wait=True)
@@ -0,0 +1,297 @@
+"""
+Module for answering time-window, type and paginated queries on one day.
+
+A ``DayIndex`` holds the event timestamps of a day in sorted order and the
+sorted positions of each event type, so that ``from``/``to`` windows, type
+filters and cursors are resolved by binary search instead of scanning every
+event of the day.
+"""
+
+import base64
+import heapq
+from bisect import bisect_left, bisect_right
+from collections import OrderedDict
+from datetime import datetime
+from threading import Lock
+from typing import Any, Dict, Iterator, List, Mapping, NamedTuple, Optional, Sequence, Tuple
+
+from ..tracker.events.event_types import LEGACY_NAMES
+from ..tracker.storage.archive import ArchiveReader, from_micros, to_micros
+
+# Upper bound on the events of one page
+MAX_LIMIT = 10000
+# Query arguments that select the filtered response of /api/data/<date>
+QUERY_ARGS = ('from', 'to', 'types', 'cursor', 'limit')
+
+
+def normalize_type(name: str) -> str:
+    """
+    Map core and legacy spellings of an event type to one name.
+
+    Args:
+        name: Stored or requested type name, e.g. ``UNLOCK`` or ``unlock``
+
+    Returns:
+        str: Upper case enum name
+    """
+    name = str(name).upper()
+    return LEGACY_NAMES.get(name, name)
+
+
+def encode_cursor(position: int, micros: int) -> str:
+    """
+    Build the opaque cursor continuing after a returned event.
+
+    Args:
+        position: Sorted position of the next event
+        micros: Timestamp of the last returned event
+
+    Returns:
+        str: URL-safe cursor
+    """
+    raw = f"{position}.{micros}".encode()
+    return base64.urlsafe_b64encode(raw).decode().rstrip('=')
+
+
+def decode_cursor(cursor: str) -> Tuple[int, int]:
+    """
+    Read a cursor built by encode_cursor.
+
+    Args:
+        cursor: URL-safe cursor
+
+    Returns:
+        Tuple[int, int]: Sorted position of the next event and the timestamp
+        of the last returned event
+
+    Raises:
+        ValueError: If the cursor is malformed
+    """
+    try:
+        raw = base64.urlsafe_b64decode(cursor + '=' * (-len(cursor) % 4)).decode()
+        position, micros = raw.split('.')
+        return int(position), int(micros)
+    except (ValueError, UnicodeDecodeError):
+        raise ValueError(f"Invalid cursor: {cursor}") from None
+
+
+def resume_position(stamps: Sequence[int], cursor: Tuple[int, int]) -> int:
+    """
+    Find the sorted position a cursor continues from.
+
+    Args:
+        stamps: Sorted timestamps of the day in microseconds
+        cursor: Decoded cursor
+
+    Returns:
+        int: Position of the first event of the next page
+    """
+    position, micros = cursor
+    if 0 < position <= len(stamps) and stamps[position - 1] == micros:
+        return position
+    # The day was rewritten since; continue after the last returned time
+    return bisect_right(stamps, micros)
+
+
+class EventQuery(NamedTuple):
+    """Filters and page of an event query on one day."""
+
+    # Inclusive lower and exclusive upper bound in microseconds
+    start: Optional[int] = None
+    end: Optional[int] = None
+    # Normalized type names to keep, None for all types
+    types: Optional[Tuple[str, ...]] = None
+    cursor: Optional[Tuple[int, int]] = None
+    limit: Optional[int] = None
+
+    @classmethod
+    def parse(cls, date: str, args: Mapping[str, str]) -> 'EventQuery':
+        """
+        Read a query from request arguments.
+
+        ``from`` and ``to`` are either full ISO timestamps or times of day
+        (``HH:MM`` or ``HH:MM:SS``) on the requested date. ``types`` is a
+        comma separated list of event types, ``limit`` the page size and
+        ``cursor`` the ``next_cursor`` of the previous page.
+
+        Args:
+            date: Date string in YYYY-MM-DD format
+            args: Query arguments
+
+        Returns:
+            EventQuery: Parsed query
+
+        Raises:
+            ValueError: If an argument is malformed
+        """
+        day = datetime.strptime(date, '%Y-%m-%d')
+
+        def bound(name: str) -> Optional[int]:
+            value = args.get(name)
+            if not value:
+                return None
+            if 'T' in value or ' ' in value:
+                return to_micros(datetime.fromisoformat(value))
+            clock = datetime.strptime(value, '%H:%M:%S' if value.count(':') == 2 else '%H:%M')
+            return to_micros(datetime.combine(day.date(), clock.time()))
+
+        types = None
+        if args.get('types'):
+            types = tuple(sorted({normalize_type(name.strip())
+                                  for name in args['types'].split(',') if name.strip()}))
+
+        limit = None
+        if args.get('limit'):
+            limit = int(args['limit'])
+            if not 0 < limit <= MAX_LIMIT:
+                raise ValueError(f"limit must be between 1 and {MAX_LIMIT}")
+
+        cursor = decode_cursor(args['cursor']) if args.get('cursor') else None
+        return cls(bound('from'), bound('to'), types, cursor, limit)
+
+
+class DayIndex:
+    """Sorted timestamp and per-type position index of one day's events."""
+
+    def __init__(self, events: List[Dict[str, Any]]):
+        """
+        Build the index.
+
+        Args:
+            events: Events in the day file format, in any order
+        """
+        stamps = [to_micros(datetime.fromisoformat(event['timestamp'])) for event in events]
+        if all(a <= b for a, b in zip(stamps, stamps[1:])):
+            self.events = events
+            self.stamps = stamps
+        else:
+            # Stable, so events with equal timestamps keep their stored order
+            order = sorted(range(len(events)), key=stamps.__getitem__)
+            self.events = [events[row] for row in order]
+            self.stamps = [stamps[row] for row in order]
+
+        self.positions: Dict[str, List[int]] = {}
+        for position, event in enumerate(self.events):
+            self.positions.setdefault(normalize_type(event['type']), []).append(position)
+
+    def __len__(self) -> int:
+        return len(self.stamps)
+
+    def _matches(self, low: int, high: int, types: Optional[Tuple[str, ...]]) -> Iterator[int]:
+        """Yield the sorted positions in [low, high) of the wanted types."""
+        if types is None:
+            return iter(range(low, high))
+
+        def in_window(positions: List[int]) -> Iterator[int]:
+            first = bisect_left(positions, low)
+            last = bisect_left(positions, high, first)
+            return (positions[i] for i in range(first, last))
+
+        return heapq.merge(*(in_window(self.positions[name])
+                             for name in types if name in self.positions))
+
+    def select(self, query: EventQuery) -> Tuple[List[Dict[str, Any]], Optional[str]]:
+        """
+        Get the events matching a query.
+
+        Args:
+            query: Filters and page
+
+        Returns:
+            Tuple[List[Dict[str, Any]], Optional[str]]: Matching events in
+            time order and the cursor of the next page, None on the last page
+        """
+        low = bisect_left(self.stamps, query.start) if query.start is not None else 0
+        high = bisect_left(self.stamps, query.end) if query.end is not None else len(self.stamps)
+        if query.cursor is not None:
+            low = max(low, resume_position(self.stamps, query.cursor))
+
+        events = []
+        last = None
+        for position in self._matches(low, high, query.types):
+            if query.limit is not None and len(events) == query.limit:
+                # More events match, continue after the last returned one
+                return events, encode_cursor(last + 1, self.stamps[last])
+            events.append(self.events[position])
+            last = position
+        return events, None
+
+
+def select_archived(reader: ArchiveReader,
+                    query: EventQuery) -> Tuple[List[Dict[str, Any]], Optional[str]]:
+    """
+    Get the events of an archived day matching a query.
+
+    Sorted archives are sliced by binary search on their timestamp column and
+    only the rows of the page are decoded. Their rows are the sorted
+    positions a DayIndex would use, so cursors stay valid either way.
+
+    Args:
+        reader: Open archive of the day
+        query: Filters and page
+
+    Returns:
+        Tuple[List[Dict[str, Any]], Optional[str]]: Matching events in
+        time order and the cursor of the next page, None on the last page
+    """
+    if not reader.header['sorted']:
+        return DayIndex(reader.events()).select(query)
+
+    stamps = reader.timestamps()
+    start = from_micros(query.start) if query.start is not None else None
+    end = from_micros(query.end) if query.end is not None else None
+    first_row = resume_position(stamps, query.cursor) if query.cursor is not None else 0
+    types = None
+    if query.types is not None:
+        types = [name for name in reader.type_names if normalize_type(name) in query.types]
+
+    events = []
+    last = None
+    for row, event in reader.iter_events(start, end, types, first_row):
+        if query.limit is not None and len(events) == query.limit:
+            return events, encode_cursor(last + 1, stamps[last])
+        events.append(event)
+        last = row
+    return events, None
+
+
+class DayIndexCache:
+    """Bounded LRU cache of day indexes keyed by date and signature."""
+
+    def __init__(self, max_days: int = 64):
+        """
+        Initialize the cache.
+
+        Args:
+            max_days: Number of day indexes kept before the least recently
+                used ones are evicted
+        """
+        self.max_days = max_days
+        self._entries: 'OrderedDict[str, Tuple[Tuple, DayIndex]]' = OrderedDict()
+        self._lock = Lock()
+
+    def get(self, key: str, signature: Tuple, events: List[Dict[str, Any]]) -> DayIndex:
+        """
+        Get the index of a day, building it if the day changed.
+
+        Args:
+            key: Cache key, usually the date
+            signature: Current signature of the stored day
+            events: Events of the day, indexed on a miss
+
+        Returns:
+            DayIndex: Index of the events
+        """
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None and entry[0] == signature:
+                self._entries.move_to_end(key)
+                return entry[1]
+
+        index = DayIndex(events)
+        with self._lock:
+            self._entries[key] = (signature, index)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_days:
+                self._entries.popitem(last=False)
+        return index
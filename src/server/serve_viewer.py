@@ -2,23 +2,62 @@
 import http.server
 import socketserver
 import os
+import io
+import sys
+import json
+import time
+import argparse
+import itertools
 import logging
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from http import HTTPStatus
 from pathlib import Path
 from datetime import datetime
+from urllib.parse import parse_qs, urlsplit
+
+# Make the tracker package importable when run as a script
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from server.batch import build_batch, parse_dates, parse_known
+from server.http_cache import (GzipCache, accepts_gzip, etag_matches, http_date,
+                               make_etag, not_modified_since, signature_mtime)
+from server.sse import SSE_MIMETYPE, sse_stream
+from tracker.storage.day_files import date_from_path, day_signature, journal_path, load_day
+from tracker.storage.file_storage import JournalStorage
+from tracker.storage.journal import EventJournal
+from tracker.storage.watcher import DayWatcher
+from tracker.utils.logger import start_logging
+from tracker.utils.metrics import CONTENT_TYPE, registry
 
-# Set up logging
 log_dir = Path(__file__).parent.parent.parent / 'logs'
-log_dir.mkdir(exist_ok=True)
-logging.basicConfig(
-    level=logging.INFO,
-    format='%(asctime)s - %(levelname)s - %(message)s',
-    handlers=[
-        logging.FileHandler(log_dir / 'viewer_server.log'),
-        logging.StreamHandler()
-    ]
-)
+
+PORT = 4567
+DEFAULT_WORKERS = 16
+# Seconds an idle keep-alive connection may hold a worker
+KEEP_ALIVE_TIMEOUT = 5
+# Successful requests are logged once per this many requests
+DEFAULT_LOG_EVERY = 100
+
+gzip_cache = GzipCache()
+
+request_seconds = registry.histogram(
+    'chronos_http_request_duration_seconds', "Time spent answering requests",
+    ('route', 'method', 'status'))
+cache_lookups = registry.counter(
+    'chronos_cache_lookups_total', "Cache lookups by cache and result", ('cache', 'result'))
+cache_lookups.set_function(lambda: gzip_cache.hits, cache='gzip', result='hit')
+cache_lookups.set_function(lambda: gzip_cache.misses, cache='gzip', result='miss')
 
 class CORSRequestHandler(http.server.SimpleHTTPRequestHandler):
+    base_dir = Path(__file__).parent.parent.parent
+    log_every = DEFAULT_LOG_EVERY
+    request_counter = itertools.count(1)
+    # Set by make_server(); shared by every /api/stream client
+    day_watcher = None
+    # A stream holds its connection open, which only the threaded server allows
+    supports_streaming = False
+
     def end_headers(self):
         # Add CORS headers
         self.send_header('Access-Control-Allow-Origin', '*')
@@ -28,11 +67,184 @@ class CORSRequestHandler(http.server.SimpleHTTPRequestHandler):
 
     def do_OPTIONS(self):
         self.send_response(200)
+        self.send_header('Content-Length', '0')
+        self.end_headers()
+
+    def log_request(self, code='-', size='-'):
+        # Sample successful requests so a dashboard load does not write one
+        # line per day file
+        count = next(self.request_counter)
+        if self.log_every and count % self.log_every == 0:
+            if isinstance(code, HTTPStatus):
+                code = code.value
+            self.log_message('"%s" %s %s (%d requests served)',
+                             self.requestline, code, size, count)
+
+    def log_error(self, format, *args):
+        # Days without data and idle keep-alive connections timing out are
+        # routine, so they are only debug output
+        routine = ((args and args[0] == HTTPStatus.NOT_FOUND) or
+                   format.startswith('Request timed out'))
+        level = logging.DEBUG if routine else logging.WARNING
+        if logging.getLogger().isEnabledFor(level):
+            logging.log(level, f"{self.address_string()} - {format % args}")
+
+    def log_message(self, format, *args):
+        logging.info(f"{self.address_string()} - {format % args}")
+
+    def do_GET(self):
+        start = time.perf_counter()
+        self.status_code = 0
+        route = urlsplit(self.path).path
+        if route == '/api/stream':
+            self.send_stream()
+        elif route == '/api/days':
+            self.send_batch()
+        elif route == '/metrics':
+            self.send_metrics()
+        else:
+            super().do_GET()
+            # Day files and assets are grouped to keep the label set small
+            route = 'data' if route.startswith('/data/') else 'static'
+        request_seconds.observe(time.perf_counter() - start, route=route,
+                                method='GET', status=self.status_code)
+
+    def send_response(self, code, message=None):
+        self.status_code = int(code)
+        super().send_response(code, message)
+
+    def send_metrics(self):
+        """Serve the metrics in the Prometheus text exposition format."""
+        body = registry.render().encode()
+        self.send_response(200)
+        self.send_header('Content-Type', CONTENT_TYPE)
+        self.send_header('Content-Length', str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def send_stream(self):
+        """Push live session updates as Server-Sent Events."""
+        if not self.supports_streaming or self.day_watcher is None:
+            self.send_error(404, "Live updates need the threaded server")
+            return
+
+        self.close_connection = True
+        self.send_response(200)
+        self.send_header('Content-Type', SSE_MIMETYPE)
+        self.send_header('Cache-Control', 'no-cache')
+        self.send_header('Connection', 'close')
+        self.end_headers()
+        # A stream lasts as long as its tab is open, so it gets a thread of
+        # its own and the worker goes back to answering ordinary requests
+        self.server.detach(self.request, self.client_address, self.write_stream)
+
+    def write_stream(self):
+        """Write live updates to the connection until the client goes away."""
+        stream = sse_stream(self.day_watcher)
+        try:
+            for chunk in stream:
+                self.request.sendall(chunk.encode())
+        except OSError:
+            pass
+        finally:
+            stream.close()
+
+    def send_head(self):
+        path = Path(self.translate_path(self.path))
+        date = date_from_path(path) if path.suffix == '.json' else None
+        if date:
+            return self.send_day(path, date)
+        return super().send_head()
+
+    def send_day(self, path, date):
+        """Serve a day file with validators, 304 responses and gzip."""
+        signature = day_signature(path.parent, date)
+        if signature is None:
+            self.send_error(404, "File not found")
+            return None
+
+        mtime = signature_mtime(signature)
+        if self.send_not_modified(signature, mtime):
+            return None
+
+        # Days with a pending journal are served as the merged JSON document,
+        # and archived days are decoded back into it
+        body = None
+        if not journal_path(path.parent, date).exists():
+            try:
+                body = path.read_bytes()
+            except FileNotFoundError:
+                pass
+        if body is None:
+            body = json.dumps(load_day(path.parent, date)).encode()
+        # Past days no longer change, so their compressed bytes are kept
+        closed = date < datetime.now().strftime('%Y-%m-%d')
+        return self.send_json(body, signature, date, closed, mtime)
+
+    def send_batch(self):
+        """Serve the stored days of a date list or range in one response."""
+        args = {key: values[-1] for key, values in parse_qs(urlsplit(self.path).query).items()}
+        try:
+            dates = parse_dates(args)
+        except ValueError as e:
+            self.send_error(400, str(e))
+            return
+
+        data_dir = self.base_dir / 'data' / 'screen_time_data'
+        signatures = {date: day_signature(data_dir, date) for date in dates}
+        known = parse_known(args.get('known'))
+        signature = (tuple(signatures.values()), tuple(sorted(known.items())))
+        if self.send_not_modified(signature):
+            return
+
+        batch = build_batch(dates, signatures, known,
+                            lambda changed: [(date, load_day(data_dir, date)) for date in changed])
+        body = json.dumps(batch).encode()
+        closed = bool(dates) and max(dates) < datetime.now().strftime('%Y-%m-%d')
+        self.copyfile(self.send_json(body, signature, tuple(dates), closed), self.wfile)
+
+    def send_not_modified(self, signature, mtime=None):
+        """Answer 304 if the client's copy matches the signature."""
+        etag = self.etag_for(signature)
+        if_none_match = self.headers.get('If-None-Match')
+        if not (etag_matches(if_none_match, etag) or
+                (if_none_match is None and mtime is not None and
+                 not_modified_since(self.headers.get('If-Modified-Since'), mtime))):
+            return False
+        self.send_response(304)
+        self.send_validators(etag, mtime)
+        self.end_headers()
+        return True
+
+    def send_json(self, body, signature, key, closed, mtime=None):
+        """Send the headers of a JSON body, gzip encoded if accepted."""
+        use_gzip = accepts_gzip(self.headers.get('Accept-Encoding'))
+        if use_gzip:
+            body = gzip_cache.compress((key, signature), body, cacheable=closed)
+
+        self.send_response(200)
+        self.send_header('Content-Type', 'application/json')
+        self.send_header('Content-Length', str(len(body)))
+        if use_gzip:
+            self.send_header('Content-Encoding', 'gzip')
+        self.send_validators(self.etag_for(signature), mtime)
         self.end_headers()
+        return io.BytesIO(body)
+
+    def etag_for(self, signature):
+        variant = 'gzip' if accepts_gzip(self.headers.get('Accept-Encoding')) else None
+        return make_etag(signature, variant)
+
+    def send_validators(self, etag, mtime=None):
+        self.send_header('ETag', etag)
+        if mtime is not None:
+            self.send_header('Last-Modified', http_date(mtime))
+        # Let browsers keep the file but revalidate it on every load
+        self.send_header('Cache-Control', 'no-cache')
+        self.send_header('Vary', 'Accept-Encoding')
 
     def translate_path(self, path):
-        # Get the base directory (where the script is located)
-        base_dir = Path(__file__).parent.parent.parent
+        base_dir = self.base_dir
         
         # Remove leading slash and split path
         path = path.lstrip('/')
@@ -43,11 +255,7 @@ class CORSRequestHandler(http.server.SimpleHTTPRequestHandler):
         elif path.startswith('static/'):
             return str(base_dir / path)
         elif path.startswith('data/'):
-            full_path = base_dir / path
-            logging.info(f"Serving data file: {full_path}")
-            if not full_path.exists():
-                logging.error(f"Data file not found: {full_path}")
-            return str(full_path)
+            return str(base_dir / path)
         elif path == 'manifest.json':
             return str(base_dir / path)
         elif path == 'sw.js':
@@ -58,8 +266,115 @@ class CORSRequestHandler(http.server.SimpleHTTPRequestHandler):
         # For any other path, serve the main HTML file
         return str(base_dir / 'screen_time_viewer.html')
 
-def main():
-    PORT = 4567
+class KeepAliveRequestHandler(CORSRequestHandler):
+    """Request handler that keeps HTTP/1.1 connections open between requests."""
+
+    protocol_version = 'HTTP/1.1'
+    timeout = KEEP_ALIVE_TIMEOUT
+    supports_streaming = True
+    # Headers and body are written separately, so don't let Nagle's
+    # algorithm hold back the body on a kept-alive connection
+    disable_nagle_algorithm = True
+
+
+class BoundedThreadingHTTPServer(http.server.HTTPServer):
+    """HTTP server handling connections on a bounded pool of worker threads.
+
+    Connections beyond the worker count wait in the pool's queue instead of
+    starting new threads. Live update streams are detached from the pool, so
+    open dashboards never hold its workers.
+    """
+
+    allow_reuse_address = True
+    # A dashboard opens many connections at once; a short backlog makes the
+    # kernel drop SYNs and the client retry a second later
+    request_queue_size = 128
+
+    def __init__(self, server_address, handler_class, max_workers=DEFAULT_WORKERS):
+        super().__init__(server_address, handler_class)
+        self.executor = ThreadPoolExecutor(max_workers=max_workers,
+                                           thread_name_prefix='viewer')
+        self._detached = set()
+        self._detached_lock = threading.Lock()
+
+    def process_request(self, request, client_address):
+        self.executor.submit(self.process_request_thread, request, client_address)
+
+    def process_request_thread(self, request, client_address):
+        try:
+            self.finish_request(request, client_address)
+        except Exception:
+            self.handle_error(request, client_address)
+        finally:
+            with self._detached_lock:
+                detached = request in self._detached
+            if not detached:
+                self.shutdown_request(request)
+
+    def detach(self, request, client_address, target):
+        """
+        Hand a connection over to a thread outside the pool.
+
+        The worker returns without closing the connection; it is closed once
+        target returns.
+
+        Args:
+            request: Connection socket
+            client_address: Address of the client
+            target: Callable writing to the connection
+        """
+        with self._detached_lock:
+            self._detached.add(request)
+        threading.Thread(target=self._run_detached, args=(request, client_address, target),
+                         name='viewer-stream', daemon=True).start()
+
+    def _run_detached(self, request, client_address, target):
+        try:
+            target()
+        except Exception:
+            self.handle_error(request, client_address)
+        finally:
+            with self._detached_lock:
+                self._detached.discard(request)
+            self.shutdown_request(request)
+
+    def server_close(self):
+        super().server_close()
+        self.executor.shutdown(wait=False)
+
+
+def make_server(port=PORT, workers=DEFAULT_WORKERS, host=""):
+    """
+    Create the viewer server.
+
+    Args:
+        port: Port to listen on, 0 picks a free port
+        workers: Number of connections handled at the same time; 1 runs the
+            original single-threaded HTTP/1.0 server
+        host: Address to bind
+
+    Returns:
+        socketserver.TCPServer: Server ready for serve_forever()
+    """
+    # Read-only access; load_day merges journals for either file backend
+    data_dir = CORSRequestHandler.base_dir / 'data' / 'screen_time_data'
+    CORSRequestHandler.day_watcher = DayWatcher(JournalStorage(data_dir, EventJournal(data_dir)))
+    if workers <= 1:
+        return socketserver.TCPServer((host, port), CORSRequestHandler)
+    return BoundedThreadingHTTPServer((host, port), KeepAliveRequestHandler, workers)
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Serve the screen time viewer.")
+    parser.add_argument('--port', type=int, default=PORT)
+    parser.add_argument('--workers', type=int, default=DEFAULT_WORKERS,
+                        help="connections handled concurrently (1 = single-threaded)")
+    parser.add_argument('--log-every', type=int, default=DEFAULT_LOG_EVERY,
+                        help="log one in N successful requests (0 = none)")
+    args = parser.parse_args(argv)
+    CORSRequestHandler.log_every = args.log_every
+    # Request threads only queue their records; one thread writes them
+    start_logging(log_dir, 'viewer_server.log')
+
     try:
         # Change to the project root directory
         root_dir = Path(__file__).parent.parent.parent
@@ -69,13 +384,13 @@ def main():
         logging.info(f"Server root directory: {root_dir}")
         logging.info(f"Data directory: {root_dir / 'data' / 'screen_time_data'}")
         
-        with socketserver.TCPServer(("", PORT), CORSRequestHandler) as httpd:
-            logging.info(f"Starting server on port {PORT}")
-            logging.info(f"View the screen time tracker at http://localhost:{PORT}/")
+        with make_server(args.port, args.workers) as httpd:
+            logging.info(f"Starting server on port {args.port} with {args.workers} workers")
+            logging.info(f"View the screen time tracker at http://localhost:{args.port}/")
             httpd.serve_forever()
     except Exception as e:
         logging.error(f"Error starting server: {e}")
         raise
 
 if __name__ == "__main__":
-    main() 
\ No newline at end of file
+    main()
@@ -0,0 +1,56 @@
+"""
+Module for formatting live updates as Server-Sent Events.
+
+Only the standard library is used so that ``serve_viewer.py`` can import it
+without Flask installed.
+"""
+
+import json
+from typing import Any, Iterator
+
+SSE_MIMETYPE = 'text/event-stream'
+# Seconds between comment lines that keep idle connections and proxies open
+KEEPALIVE_INTERVAL = 15.0
+# Milliseconds the browser waits before reconnecting
+RETRY_MS = 3000
+
+
+def format_sse(event: str, data: Any) -> str:
+    """
+    Format one Server-Sent Event.
+
+    Args:
+        event: Event name
+        data: JSON-serializable payload
+
+    Returns:
+        str: Event block including the terminating blank line
+    """
+    return f"event: {event}\ndata: {json.dumps(data)}\n\n"
+
+
+def sse_stream(watcher, keepalive: float = KEEPALIVE_INTERVAL) -> Iterator[str]:
+    """
+    Yield the live updates of a DayWatcher until the client goes away.
+
+    The subscription is released when the generator is closed, which happens
+    once writing to a disconnected client fails.
+
+    Args:
+        watcher: DayWatcher to subscribe to
+        keepalive: Seconds of silence before a keep-alive comment is sent
+
+    Yields:
+        str: Event blocks
+    """
+    subscription = watcher.subscribe()
+    try:
+        yield f"retry: {RETRY_MS}\n\n"
+        while not subscription.closed:
+            message = subscription.get(timeout=keepalive)
+            if message is None:
+                yield ": keepalive\n\n"
+            else:
+                yield format_sse(*message)
+    finally:
+        watcher.unsubscribe(subscription)
@@ -0,0 +1,150 @@
+"""
+Module for incremental per-day session accounting.
+"""
+
+from datetime import datetime
+from typing import Dict, Iterable, Optional, Union
+
+from ..events.event import Event
+from ..events.event_types import EventType
+
+SESSION_START_TYPES = frozenset([EventType.STARTUP, EventType.UNLOCK])
+SESSION_END_TYPES = frozenset([EventType.LOCK, EventType.SHUTDOWN, EventType.LOGOUT])
+
+
+class DayState:
+    """Running session state and totals for one day of events."""
+
+    def __init__(self, date: str):
+        """
+        Initialize an empty day.
+
+        Args:
+            date: Date string in YYYY-MM-DD format
+        """
+        self.date = date
+        self.total_time = 0.0
+        self.idle_time = 0.0
+        self.event_count = 0
+        self.session_start: Optional[datetime] = None
+        self.idle_start: Optional[datetime] = None
+        # Idle seconds of the open session that ended before idle_start
+        self.session_idle = 0.0
+        self.last_event: Optional[Union[Event, Dict]] = None
+        self.last_time: Optional[datetime] = None
+        self.last_type: Optional[EventType] = None
+        self._last_by_type: Dict[EventType, Union[Event, Dict]] = {}
+        self._last_time_by_type: Dict[EventType, datetime] = {}
+
+    @classmethod
+    def from_events(cls, date: str, events: Iterable[Dict]) -> 'DayState':
+        """
+        Rebuild the state of a day from its stored events.
+
+        Args:
+            date: Date string in YYYY-MM-DD format
+            events: Events in the order they were stored
+
+        Returns:
+            DayState: State after applying every event
+        """
+        state = cls(date)
+        for event in events:
+            state.apply(event)
+        return state
+
+    @property
+    def session_active(self) -> bool:
+        """Check whether a session is open."""
+        return self.session_start is not None
+
+    def apply(self, event: Union[Event, Dict]) -> float:
+        """
+        Account for one event.
+
+        A session starts at the latest STARTUP/UNLOCK and ends at the next
+        LOCK/SHUTDOWN/LOGOUT, matching how day totals have always been counted.
+        Time between IDLE and the next ACTIVE (or the session end) within a
+        session is not counted.
+
+        Args:
+            event: Event record, or event dictionary with type and timestamp
+
+        Returns:
+            float: Active seconds of the session the event ended, or 0
+        """
+        if isinstance(event, Event):
+            # Already parsed where it entered the tracker
+            timestamp = event.local_time
+            event_type = event.type
+        else:
+            timestamp = datetime.fromisoformat(event['timestamp'])
+            try:
+                event_type = EventType.parse(event['type'])
+            except KeyError:
+                # Unknown types are kept in the day but do not affect sessions
+                event_type = None
+
+        self.event_count += 1
+        self.last_event = event
+        self.last_time = timestamp
+        self.last_type = event_type
+        if event_type is None:
+            return 0.0
+        self._last_by_type[event_type] = event
+        self._last_time_by_type[event_type] = timestamp
+
+        if event_type in SESSION_START_TYPES:
+            self.session_start = timestamp
+            self.session_idle = 0.0
+            self.idle_start = None
+        elif self.session_start is None:
+            return 0.0
+        elif event_type == EventType.IDLE:
+            if self.idle_start is None:
+                self.idle_start = timestamp
+        elif event_type == EventType.ACTIVE:
+            self._end_idle(timestamp)
+        elif event_type in SESSION_END_TYPES:
+            self._end_idle(timestamp)
+            duration = (timestamp - self.session_start).total_seconds() - self.session_idle
+            duration = max(0.0, duration)
+            self.total_time += duration
+            self.session_start = None
+            self.session_idle = 0.0
+            return duration
+        return 0.0
+
+    def _end_idle(self, timestamp: datetime):
+        """Close the idle stretch of the open session, if any."""
+        if self.idle_start is None:
+            return
+        idle = max(0.0, (timestamp - max(self.idle_start, self.session_start)).total_seconds())
+        self.session_idle += idle
+        self.idle_time += idle
+        self.idle_start = None
+
+    def last_of(self, event_type: EventType) -> Optional[Union[Event, Dict]]:
+        """
+        Get the most recent event of a type.
+
+        Args:
+            event_type: Event type
+
+        Returns:
+            Optional[Union[Event, Dict]]: Most recent event of the type, in
+            the form it was applied
+        """
+        return self._last_by_type.get(event_type)
+
+    def last_time_of(self, event_type: EventType) -> Optional[datetime]:
+        """
+        Get the time of the most recent event of a type.
+
+        Args:
+            event_type: Event type
+
+        Returns:
+            Optional[datetime]: Timestamp of the most recent event of the type
+        """
+        return self._last_time_by_type.get(event_type)
@@ -3,18 +3,24 @@
 Core module for tracking screen time events.
 """
 
-import os
-import json
 import time
-import logging
+import signal
 from datetime import datetime
-from typing import Dict, List, Optional
+from typing import Dict, Optional
 from pathlib import Path
 
-from ..events.event_types import EventType
+from .day_state import SESSION_END_TYPES, SESSION_START_TYPES, DayState
+from ..events.event import Event
 from ..events.event_handler import EventHandler
+from ..storage.day_files import empty_day
+from ..storage.factory import create_storage
 from ..utils.config import Config
 from ..utils.logger import setup_logger
+from ..utils.metrics import MetricsExporter
+from ..utils.scheduler import PeriodicScheduler
+
+# Longest time the event loop blocks waiting for an event
+EVENT_WAIT_TIMEOUT = 60.0
 
 class ScreenTimeTracker:
     """Main class for tracking screen time events."""
@@ -27,17 +33,30 @@ class ScreenTimeTracker:
             config: Configuration object containing settings
         """
         self.config = config
-        self.logger = setup_logger('screen_time_tracker')
-        self.event_handler = EventHandler(config)
+        self.logger = setup_logger('screen_time_tracker', config.log_dir, config.logging)
+        # Event checks and metrics exports share one timer thread
+        self.scheduler = PeriodicScheduler(name='tracker-timer', logger=self.logger)
+        self.event_handler = EventHandler(config, scheduler=self.scheduler)
         self.current_session: Optional[Dict] = None
         self.data_dir = Path(config.data_dir)
         self.data_dir.mkdir(parents=True, exist_ok=True)
 
+        # Running totals of the day being written; storage only persists events
+        self.day_state: Optional[DayState] = None
+
+        self.storage = create_storage(config, data_dir=self.data_dir, logger=self.logger)
+        self.metrics = MetricsExporter.from_config(config.metrics, logger=self.logger,
+                                                   scheduler=self.scheduler)
+
     def start(self):
         """Start the screen time tracker."""
         self.logger.info("Starting screen time tracker...")
+        signal.signal(signal.SIGTERM, self._handle_signal)
         try:
+            self.storage.start()
+            self.metrics.start()
             self.event_handler.start()
+            self.scheduler.start()
             self._run_event_loop()
         except KeyboardInterrupt:
             self.logger.info("Stopping screen time tracker...")
@@ -46,42 +65,44 @@ class ScreenTimeTracker:
 
     def stop(self):
         """Stop the screen time tracker."""
+        # Let a running check finish before its sources are closed
+        self.scheduler.stop()
         self.event_handler.stop()
         if self.current_session:
             self._end_current_session()
+        self.storage.close()
+        self.metrics.stop()
         self.logger.info("Screen time tracker stopped")
 
+    def _handle_signal(self, signum, frame):
+        """Turn SIGTERM into a clean stop that flushes pending writes."""
+        raise KeyboardInterrupt
+
     def _run_event_loop(self):
         """Main event loop for processing events."""
         while True:
             try:
-                event = self.event_handler.get_next_event()
+                # Sleeps until an event arrives; the timeout only bounds how
+                # long a signal may wait to be handled on older Pythons
+                event = self.event_handler.get_next_event(timeout=EVENT_WAIT_TIMEOUT)
                 if event:
                     self._process_event(event)
-                time.sleep(1)  # Prevent CPU overuse
             except Exception as e:
                 self.logger.error(f"Error in event loop: {e}")
                 time.sleep(5)  # Wait before retrying
 
-    def _process_event(self, event: Dict):
+    def _process_event(self, event: Event):
         """
         Process a screen time event.
 
         Args:
-            event: Event dictionary containing type and timestamp
+            event: Event record
         """
-        event_type = event.get('type')
-        timestamp = event.get('timestamp')
-
-        if not event_type or not timestamp:
-            self.logger.warning(f"Invalid event received: {event}")
-            return
-
         try:
-            if event_type in [EventType.STARTUP, EventType.UNLOCK]:
-                self._start_new_session(timestamp)
-            elif event_type in [EventType.LOCK, EventType.SHUTDOWN, EventType.LOGOUT]:
-                self._end_current_session(timestamp)
+            if event.type in SESSION_START_TYPES:
+                self._start_new_session(event.isoformat())
+            elif event.type in SESSION_END_TYPES:
+                self._end_current_session(event.isoformat())
             
             self._save_event(event)
         except Exception as e:
@@ -115,63 +136,43 @@ class ScreenTimeTracker:
             self.logger.info(f"Session ended at {end_time}")
             self.current_session = None
 
-    def _save_event(self, event: Dict):
+    def _save_event(self, event: Event):
         """
-        Save an event to the appropriate JSON file.
+        Save an event to the appropriate day.
 
         Args:
-            event: Event dictionary to save
+            event: Event record to save
         """
         try:
-            date = datetime.fromisoformat(event['timestamp']).strftime('%Y-%m-%d')
-            file_path = self.data_dir / f"screen_time_{date}.json"
-            
-            # Load existing data or create new structure
-            if file_path.exists():
-                with open(file_path, 'r') as f:
-                    data = json.load(f)
-            else:
-                data = {'events': [], 'total_time': 0}
-
-            # Add new event
-            data['events'].append(event)
+            date = event.date
+            day_state = self._get_day_state(date)
+            day_state.apply(event)
             
             # Update total time if session ended
-            if event['type'] in [EventType.LOCK, EventType.SHUTDOWN, EventType.LOGOUT]:
-                self._update_total_time(data)
+            state = None
+            if event.type in SESSION_END_TYPES:
+                state = {'total_time': day_state.total_time, 'idle_time': day_state.idle_time}
 
-            # Save updated data
-            with open(file_path, 'w') as f:
-                json.dump(data, f, indent=2)
+            self.storage.append_event(date, event.to_dict(), state)
 
-            self.logger.debug(f"Event saved to {file_path}")
+            self.logger.debug(f"Event saved for {date}")
         except Exception as e:
             self.logger.error(f"Error saving event: {e}")
 
-    def _update_total_time(self, data: Dict):
+    def _get_day_state(self, date: str) -> DayState:
         """
-        Update total time in the data file.
+        Get the running state of a day, rebuilding it from storage on first use.
 
         Args:
-            data: Data dictionary to update
+            date: Date string in YYYY-MM-DD format
+
+        Returns:
+            DayState: Day state
         """
-        try:
-            total_time = 0
-            current_session = None
-
-            for event in data['events']:
-                if event['type'] in [EventType.STARTUP, EventType.UNLOCK]:
-                    current_session = event
-                elif event['type'] in [EventType.LOCK, EventType.SHUTDOWN, EventType.LOGOUT] and current_session:
-                    start_time = datetime.fromisoformat(current_session['timestamp'])
-                    end_time = datetime.fromisoformat(event['timestamp'])
-                    duration = (end_time - start_time).total_seconds()
-                    total_time += duration
-                    current_session = None
-
-            data['total_time'] = total_time
-        except Exception as e:
-            self.logger.error(f"Error updating total time: {e}")
+        if self.day_state is None or self.day_state.date != date:
+            data = self.storage.load_day(date) or empty_day()
+            self.day_state = DayState.from_events(date, data['events'])
+        return self.day_state
 
 def main():
     """Main entry point for the screen time tracker."""
@@ -0,0 +1,107 @@
+"""
+Module defining the in-memory screen time event record.
+"""
+
+from datetime import datetime
+from typing import Any, Dict, NamedTuple, Optional
+
+from .event_types import EventType
+
+# Keys of the stored event format that are held in dedicated fields
+CORE_KEYS = ('type', 'timestamp')
+
+
+class Event(NamedTuple):
+    """Immutable screen time event.
+
+    Events are parsed once where they enter the tracker and converted back to
+    the stored ``{'type': ..., 'timestamp': ...}`` format only when written.
+    """
+
+    type: EventType
+    # Seconds since the epoch
+    timestamp: float
+    # Other stored fields, kept as they were read; must not be mutated
+    extra: Optional[Dict[str, Any]] = None
+
+    @classmethod
+    def now(cls, event_type: EventType) -> 'Event':
+        """
+        Create an event happening now.
+
+        Args:
+            event_type: Event type
+
+        Returns:
+            Event: New event
+        """
+        return cls(event_type, datetime.now().timestamp())
+
+    @classmethod
+    def at(cls, event_type: EventType, when: datetime) -> 'Event':
+        """
+        Create an event at a given time.
+
+        Args:
+            event_type: Event type
+            when: Local time of the event
+
+        Returns:
+            Event: New event
+        """
+        return cls(event_type, when.timestamp())
+
+    @classmethod
+    def from_dict(cls, data: Dict[str, Any]) -> 'Event':
+        """
+        Parse an event in the stored format.
+
+        Args:
+            data: Event dictionary with type and timestamp
+
+        Returns:
+            Event: Parsed event
+
+        Raises:
+            KeyError: If the type is unknown or a key is missing
+            ValueError: If the timestamp is not in ISO format
+        """
+        extra = {key: value for key, value in data.items() if key not in CORE_KEYS}
+        return cls(
+            EventType.parse(data['type']),
+            datetime.fromisoformat(data['timestamp']).timestamp(),
+            extra or None
+        )
+
+    @property
+    def local_time(self) -> datetime:
+        """Local time of the event."""
+        return datetime.fromtimestamp(self.timestamp)
+
+    @property
+    def date(self) -> str:
+        """Date string of the day the event belongs to."""
+        return self.local_time.strftime('%Y-%m-%d')
+
+    def isoformat(self) -> str:
+        """Local time of the event in the stored ISO format."""
+        return self.local_time.isoformat()
+
+    def to_dict(self, legacy: bool = False) -> Dict[str, Any]:
+        """
+        Convert the event to the stored format.
+
+        Args:
+            legacy: Write the lower case type names of the legacy tracker
+                instead of the enum names
+
+        Returns:
+            Dict[str, Any]: Event dictionary
+        """
+        data = {
+            'type': self.type.legacy_name if legacy else self.type.name,
+            'timestamp': self.isoformat()
+        }
+        if self.extra:
+            data.update(self.extra)
+        return data
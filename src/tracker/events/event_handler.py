@@ -2,79 +2,95 @@
 Module for handling screen time events.
 """
 
-import os
 import time
-import logging
-from datetime import datetime
-from typing import Dict, Optional
-from queue import Queue
-from threading import Thread, Event
+from typing import Optional
+from queue import Empty, Queue
 
+from .event import Event as ScreenTimeEvent
 from .event_types import EventType
+from .idle import IdleDetector, create_activity_source
 from ..utils.config import Config
 from ..utils.logger import setup_logger
+from ..utils.scheduler import AdaptiveInterval, PeriodicScheduler
+
+# Event types after which nothing is expected to happen for a while
+QUIET_TYPES = frozenset({EventType.LOCK, EventType.IDLE, EventType.LOGOUT})
 
 class EventHandler:
-    """Class for handling screen time events."""
+    """Class for handling screen time events.
+
+    The checks run as a job on a scheduler, shared with the tracker's other
+    periodic work when one is passed in.
+    """
+
+    job_name = 'event-checks'
 
-    def __init__(self, config: Config):
+    def __init__(self, config: Config, scheduler: Optional[PeriodicScheduler] = None):
         """
         Initialize the event handler.
 
         Args:
             config: Configuration object containing settings
+            scheduler: Optional shared scheduler, by default a private one
         """
         self.config = config
         self.logger = setup_logger('event_handler')
         self.event_queue = Queue()
-        self.stop_event = Event()
-        self.event_thread: Optional[Thread] = None
+        self.interval = AdaptiveInterval.from_config(config.polling, 1.0)
+        self.idle_detector: Optional[IdleDetector] = None
+        self._owns_scheduler = scheduler is None
+        self.scheduler = scheduler or PeriodicScheduler(name='event-handler', logger=self.logger)
 
     def start(self):
-        """Start the event handler thread."""
+        """Start running the checks."""
         self.logger.info("Starting event handler...")
-        self.stop_event.clear()
-        self.event_thread = Thread(target=self._event_loop)
-        self.event_thread.daemon = True
-        self.event_thread.start()
+        self._start_idle_detection()
+        self.scheduler.add(self.job_name, self._run_checks, self.interval.next, run_now=True)
+        if self._owns_scheduler:
+            self.scheduler.start()
 
     def stop(self):
-        """Stop the event handler thread."""
+        """Stop running the checks."""
         self.logger.info("Stopping event handler...")
-        self.stop_event.set()
-        if self.event_thread:
-            self.event_thread.join()
+        self.scheduler.remove(self.job_name)
+        if self._owns_scheduler:
+            self.scheduler.stop()
+        if self.idle_detector:
+            self.idle_detector.source.close()
+            self.idle_detector = None
         self.logger.info("Event handler stopped")
 
-    def get_next_event(self) -> Optional[Dict]:
+    def get_next_event(self, timeout: Optional[float] = 0) -> Optional[ScreenTimeEvent]:
         """
         Get the next event from the queue.
 
+        Args:
+            timeout: Seconds to wait for an event, 0 to return at once or
+                None to wait until one arrives
+
         Returns:
-            Optional[Dict]: Next event or None if queue is empty
+            Optional[ScreenTimeEvent]: Next event or None if none arrived in time
         """
         try:
-            return self.event_queue.get_nowait()
-        except:
+            if timeout == 0:
+                return self.event_queue.get_nowait()
+            return self.event_queue.get(timeout=timeout)
+        except Empty:
             return None
 
-    def _event_loop(self):
-        """Main event loop for detecting and queueing events."""
-        while not self.stop_event.is_set():
-            try:
-                # Check for system events
-                self._check_system_events()
-                
-                # Check for user events
-                self._check_user_events()
-                
-                # Check for idle state
-                self._check_idle_state()
-                
-                time.sleep(1)  # Prevent CPU overuse
-            except Exception as e:
-                self.logger.error(f"Error in event loop: {e}")
-                time.sleep(5)  # Wait before retrying
+    def _run_checks(self):
+        """Detect and queue events; the interval backs off while locked or idle."""
+        try:
+            # Check for system events
+            self._check_system_events()
+
+            # Check for user events
+            self._check_user_events()
+
+            # Check for idle state
+            self._check_idle_state()
+        except Exception as e:
+            self.logger.error(f"Error checking for events: {e}")
 
     def _check_system_events(self):
         """Check for system-related events."""
@@ -88,23 +104,43 @@ class EventHandler:
         # This is a placeholder for the actual implementation
         pass
 
+    def _start_idle_detection(self):
+        """Pick the activity source used by _check_idle_state."""
+        settings = self.config.idle
+        source = create_activity_source(settings.get('source', 'auto'), settings, self.logger)
+        if source is None:
+            return
+        self.idle_detector = IdleDetector(
+            source,
+            threshold=self.config.idle_threshold,
+            confirm_checks=settings.get('confirm_checks', 2),
+            min_dwell=settings.get('min_dwell', 30)
+        )
+        self.logger.info(f"Detecting idle time from {source.name} after "
+                         f"{self.config.idle_threshold} seconds without input")
+
     def _check_idle_state(self):
-        """Check if the system is idle."""
-        # Implementation will depend on the operating system
-        # This is a placeholder for the actual implementation
-        pass
+        """Queue IDLE or ACTIVE when the user's activity changes."""
+        if self.idle_detector is None:
+            return
+        transition = self.idle_detector.check()
+        if transition is not None:
+            event_type, timestamp = transition
+            self._queue_event(event_type, timestamp)
+        elif self.idle_detector.confirming:
+            # Confirm returning input quickly instead of after a backed off wait
+            self.interval.changed()
 
-    def _queue_event(self, event_type: EventType, timestamp: Optional[str] = None):
+    def _queue_event(self, event_type: EventType, timestamp: Optional[float] = None):
         """
         Queue a new event.
 
         Args:
             event_type: Type of the event
-            timestamp: Optional timestamp for the event
+            timestamp: Optional time of the event in seconds since the epoch
         """
-        event = {
-            'type': event_type,
-            'timestamp': timestamp or datetime.now().isoformat()
-        }
+        event = ScreenTimeEvent(event_type, timestamp if timestamp is not None else time.time())
         self.event_queue.put(event)
+        self.interval.changed()
+        self.interval.set_quiet(event_type in QUIET_TYPES)
         self.logger.debug(f"Queued event: {event}") 
\ No newline at end of file
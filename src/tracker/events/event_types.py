@@ -15,4 +15,42 @@ class EventType(Enum):
     UNLOCK = auto()       # Screen unlock
     IDLE = auto()         # System idle
     ACTIVE = auto()       # System active
-    ERROR = auto()        # Error event 
\ No newline at end of file
+    ERROR = auto()        # Error event
+
+    @classmethod
+    def parse(cls, value) -> 'EventType':
+        """
+        Convert a stored event type to an EventType.
+
+        Accepts enum members, upper case names written by the core tracker
+        and the lower case names written by the legacy tracker.
+
+        Args:
+            value: Event type value
+
+        Returns:
+            EventType: Matching event type
+        """
+        if isinstance(value, cls):
+            return value
+        name = str(value).upper()
+        return cls[LEGACY_NAMES.get(name, name)]
+
+    @property
+    def legacy_name(self) -> str:
+        """Name of the type as written by the legacy tracker."""
+        for legacy, name in LEGACY_NAMES.items():
+            if name == self.name:
+                return legacy.lower()
+        return self.name.lower()
+
+    @property
+    def stored_names(self) -> frozenset:
+        """Spellings of the type found in stored events."""
+        return frozenset((self.name, self.legacy_name))
+
+
+# Legacy tracker names that differ from the enum member names
+LEGACY_NAMES = {
+    'SYSTEM_SHUTDOWN': 'SHUTDOWN'
+}
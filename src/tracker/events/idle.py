@@ -0,0 +1,296 @@
+"""
+Module for detecting when the user goes idle and comes back.
+
+Activity is read from cheap signals instead of external commands: logind's
+``IdleHint`` over a long-lived system bus connection, or the interrupt
+counters of input devices in ``/proc/interrupts``.  ``IdleDetector`` turns
+the readings into IDLE/ACTIVE transitions with hysteresis, so a bumped mouse
+or a burst of keystrokes does not write a pair of events each time.
+"""
+
+import os
+import time
+import logging
+from typing import Any, Callable, Dict, Optional, Sequence, Tuple
+
+try:
+    import dbus
+except ImportError:  # dbus-python is optional
+    dbus = None
+
+from .event_types import EventType
+
+LOGIND_BUS_NAME = 'org.freedesktop.login1'
+LOGIND_PATH = '/org/freedesktop/login1'
+MANAGER_IFACE = 'org.freedesktop.login1.Manager'
+SESSION_IFACE = 'org.freedesktop.login1.Session'
+USER_IFACE = 'org.freedesktop.login1.User'
+PROPERTIES_IFACE = 'org.freedesktop.DBus.Properties'
+
+PROC_INTERRUPTS = '/proc/interrupts'
+# Interrupt names of built-in keyboards, touchpads and I2C/USB HID devices.
+# USB host controllers (xhci_hcd) also count unrelated traffic and are left out.
+DEFAULT_INTERRUPT_PATTERNS = ('i8042', 'hid', 'elan', 'syna', 'keyboard', 'mouse', 'touchpad')
+
+IDLE_SOURCES = ('auto', 'logind', 'interrupts', 'none')
+# Seconds the last input time must move to count as new input
+INPUT_TOLERANCE = 0.5
+
+
+class ActivitySource:
+    """Base class for sources of user activity."""
+
+    name = 'base'
+
+    def idle_seconds(self) -> Optional[float]:
+        """
+        Get the time since the user's last input.
+
+        Returns:
+            Optional[float]: Seconds since the last input, or None if unknown
+        """
+        raise NotImplementedError
+
+    def close(self):
+        """Release resources held by the source."""
+
+
+class InterruptActivitySource(ActivitySource):
+    """Activity read from the interrupt counters of input devices.
+
+    The counters only tell whether input happened between two readings, so
+    the time of the last input is the time of the reading that saw it.
+    """
+
+    name = 'interrupts'
+
+    def __init__(self, patterns: Sequence[str] = DEFAULT_INTERRUPT_PATTERNS,
+                 path: str = PROC_INTERRUPTS, clock: Callable[[], float] = time.monotonic):
+        """
+        Initialize the source.
+
+        Args:
+            patterns: Case-insensitive substrings of the interrupt lines to count
+            path: Path of the interrupts table
+            clock: Monotonic clock
+        """
+        self.patterns = tuple(pattern.lower() for pattern in patterns)
+        self.path = path
+        self.clock = clock
+        self._count = self.read_count()
+        self._last_input = self.clock()
+
+    def available(self) -> bool:
+        """Check whether any input device interrupt was found."""
+        return self._count is not None
+
+    def read_count(self) -> Optional[int]:
+        """
+        Sum the interrupt counts of the matching lines over all CPUs.
+
+        Returns:
+            Optional[int]: Total count, or None if no line matches
+        """
+        try:
+            with open(self.path, 'r') as f:
+                lines = f.readlines()
+        except OSError:
+            return None
+
+        total = None
+        for line in lines[1:]:
+            label, _, rest = line.partition(':')
+            if not rest or not any(pattern in rest.lower() for pattern in self.patterns):
+                continue
+            count = 0
+            for field in rest.split():
+                if not field.isdigit():
+                    # Per-CPU counts come first, then the chip and device names
+                    break
+                count += int(field)
+            total = (total or 0) + count
+        return total
+
+    def idle_seconds(self) -> Optional[float]:
+        count = self.read_count()
+        if count is None:
+            return None
+        now = self.clock()
+        if count != self._count:
+            self._count = count
+            self._last_input = now
+        return now - self._last_input
+
+
+class LogindActivitySource(ActivitySource):
+    """Activity read from the ``IdleHint`` of the user's logind session.
+
+    The desktop sets the hint after its own idle delay, so short pauses are
+    never reported by this source.
+    """
+
+    name = 'logind'
+
+    def __init__(self, session_id: Optional[str] = None):
+        """
+        Initialize the source and resolve the session.
+
+        Args:
+            session_id: Optional logind session id, resolved when omitted
+
+        Raises:
+            RuntimeError: If the bus bindings or the session are unavailable
+        """
+        if dbus is None:
+            raise RuntimeError("dbus-python is required")
+        self._bus = dbus.SystemBus(private=True)
+        manager = dbus.Interface(self._bus.get_object(LOGIND_BUS_NAME, LOGIND_PATH),
+                                 MANAGER_IFACE)
+        session_id = session_id or os.getenv('XDG_SESSION_ID')
+        if session_id:
+            path = manager.GetSession(session_id)
+        else:
+            user = self._bus.get_object(LOGIND_BUS_NAME, manager.GetUser(os.getuid()))
+            _, path = dbus.Interface(user, PROPERTIES_IFACE).Get(USER_IFACE, 'Display')
+            if not path or path == '/':
+                raise RuntimeError("No graphical logind session found")
+        self._properties = dbus.Interface(self._bus.get_object(LOGIND_BUS_NAME, path),
+                                          PROPERTIES_IFACE)
+
+    def idle_seconds(self) -> Optional[float]:
+        try:
+            if not self._properties.Get(SESSION_IFACE, 'IdleHint'):
+                return 0.0
+            since = self._properties.Get(SESSION_IFACE, 'IdleSinceHint') / 1e6
+        except dbus.DBusException:
+            return None
+        return max(0.0, time.time() - since)
+
+    def close(self):
+        self._bus.close()
+
+
+class IdleDetector:
+    """Turns activity readings into IDLE and ACTIVE transitions.
+
+    The user becomes idle once there was no input for ``threshold`` seconds,
+    and active again after input was seen in ``confirm_checks`` consecutive
+    checks.  No transition happens within ``min_dwell`` seconds of the last
+    one.  IDLE is dated back to the last input, and ACTIVE to the first input
+    that confirmed it, so totals do not depend on the check interval.
+    """
+
+    def __init__(self, source: ActivitySource, threshold: float = 300.0,
+                 confirm_checks: int = 2, min_dwell: float = 30.0,
+                 clock: Callable[[], float] = time.monotonic,
+                 wall_clock: Callable[[], float] = time.time):
+        """
+        Initialize the detector.
+
+        Args:
+            source: Activity source
+            threshold: Seconds without input after which the user is idle
+            confirm_checks: Consecutive checks with input that end idleness
+            min_dwell: Seconds a state is kept at least
+            clock: Monotonic clock
+            wall_clock: Clock of the event timestamps
+        """
+        self.source = source
+        self.threshold = threshold
+        self.confirm_checks = max(1, confirm_checks)
+        self.min_dwell = min_dwell
+        self.clock = clock
+        self.wall_clock = wall_clock
+        self.idle = False
+        self._changed_at = float('-inf')
+        self._changed_wall = float('-inf')
+        self._last_input: Optional[float] = None
+        self._active_checks = 0
+        self._first_input: Optional[float] = None
+
+    @property
+    def confirming(self) -> bool:
+        """Check whether input was seen while idle and awaits confirmation."""
+        return self.idle and self._active_checks > 0
+
+    def check(self) -> Optional[Tuple[EventType, float]]:
+        """
+        Read the source once.
+
+        Returns:
+            Optional[Tuple[EventType, float]]: IDLE or ACTIVE and the time of
+            the transition in seconds since the epoch, or None if nothing changed
+        """
+        idle_seconds = self.source.idle_seconds()
+        if idle_seconds is None:
+            return None
+        now = self.clock()
+        last_input = self.wall_clock() - idle_seconds
+        new_input = (self._last_input is not None
+                     and last_input - self._last_input > INPUT_TOLERANCE)
+        self._last_input = last_input
+        dwelled = now - self._changed_at >= self.min_dwell
+
+        if not self.idle:
+            if idle_seconds >= self.threshold and dwelled:
+                return self._change(True, EventType.IDLE, last_input, now)
+            return None
+
+        if not new_input:
+            # No input since the previous check
+            self._active_checks = 0
+            self._first_input = None
+            return None
+        self._active_checks += 1
+        if self._first_input is None:
+            self._first_input = last_input
+        if self._active_checks >= self.confirm_checks and dwelled:
+            return self._change(False, EventType.ACTIVE, self._first_input, now)
+        return None
+
+    def _change(self, idle: bool, event_type: EventType, timestamp: float,
+                now: float) -> Tuple[EventType, float]:
+        """Record a transition and return its event type and time."""
+        # Never date a transition before the previous one
+        timestamp = max(timestamp, self._changed_wall)
+        self.idle = idle
+        self._changed_at = now
+        self._changed_wall = timestamp
+        self._active_checks = 0
+        self._first_input = None
+        return event_type, timestamp
+
+
+def create_activity_source(preference: str = 'auto', settings: Optional[Dict[str, Any]] = None,
+                           logger: Optional[logging.Logger] = None) -> Optional[ActivitySource]:
+    """
+    Create the preferred activity source that works on this host.
+
+    Args:
+        preference: 'auto', 'logind', 'interrupts' or 'none'
+        settings: Optional ``idle`` configuration section
+        logger: Optional logger
+
+    Returns:
+        Optional[ActivitySource]: The source, or None if idle detection is off
+        or nothing usable was found
+    """
+    logger = logger or logging.getLogger(__name__)
+    settings = settings or {}
+
+    if preference in ('auto', 'logind'):
+        try:
+            return LogindActivitySource()
+        except Exception as e:
+            logger.info(f"logind idle hint unavailable: {e}")
+
+    if preference in ('auto', 'interrupts'):
+        source = InterruptActivitySource(
+            settings.get('interrupt_patterns', DEFAULT_INTERRUPT_PATTERNS))
+        if source.available():
+            return source
+        logger.info(f"No input device interrupts found in {PROC_INTERRUPTS}")
+
+    if preference != 'none':
+        logger.warning("No idle source available, idle time will be counted as active")
+    return None
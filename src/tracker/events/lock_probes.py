@@ -0,0 +1,301 @@
+"""
+Module implementing the adaptive chain of screen lock probes.
+
+The polling fallback asks several desktop tools whether the screen is locked.
+Most hosts only have one or two of them, so the chain learns which methods
+work here: binaries that are not installed are remembered as missing, methods
+that keep failing are benched, and both are only retried every
+``reprobe_interval`` seconds.  The remaining methods run in order of how often
+they detected a lock, how reliable they are and how fast they answer.
+
+The screen counts as locked as soon as one method reports it, like the fixed
+chain this replaces, so reordering only changes how early a lock is seen.
+"""
+
+import time
+import shutil
+import logging
+from threading import Lock
+from typing import Callable, Dict, List, Optional, Sequence
+
+from ..utils.metrics import registry
+
+# Outcomes of running one method
+LOCKED = 'locked'
+UNLOCKED = 'unlocked'
+MISSING = 'missing'
+FAILED = 'failed'
+
+method_seconds = registry.histogram(
+    'chronos_lock_method_duration_seconds', "Time spent running a screen lock method",
+    ('method',))
+method_failures = registry.counter(
+    'chronos_lock_method_failures_total', "Screen lock methods that failed or were missing",
+    ('method', 'reason'))
+
+
+class LockMethod:
+    """One way of asking the desktop whether the screen is locked."""
+
+    def __init__(self, name: str, command: Sequence[str], is_locked: Callable[[str], bool]):
+        """
+        Initialize the method.
+
+        Args:
+            name: Short name used in logs and metrics
+            command: Command line to run
+            is_locked: Returns True if the command's stdout means locked
+        """
+        self.name = name
+        self.command = list(command)
+        self.is_locked = is_locked
+
+    @property
+    def binary(self) -> str:
+        """Name of the executable the method runs."""
+        return self.command[0]
+
+    def run(self, timeout: float) -> str:
+        """
+        Run the method once.
+
+        Args:
+            timeout: Seconds the command may take
+
+        Returns:
+            str: LOCKED, UNLOCKED, MISSING or FAILED
+        """
+        # Only needed once polling starts, not on the tracker's startup path
+        import subprocess
+        try:
+            result = subprocess.run(self.command, capture_output=True, text=True,
+                                    timeout=timeout)
+        except FileNotFoundError:
+            return MISSING
+        except (OSError, subprocess.SubprocessError):
+            return FAILED
+        # Without a display or a screensaver service the tools exit non-zero
+        if result.returncode != 0:
+            return FAILED
+        return LOCKED if self.is_locked(result.stdout) else UNLOCKED
+
+
+def _loginctl_locked(stdout: str) -> bool:
+    # `-p LockedHint` prints "LockedHint=yes"; `--value` would print "yes"
+    return stdout.strip().rpartition('=')[2] == 'yes'
+
+
+DEFAULT_METHODS = (
+    LockMethod('loginctl', ['loginctl', 'show-session', 'self', '-p', 'LockedHint'],
+               _loginctl_locked),
+    LockMethod('gnome-screensaver', ['gnome-screensaver-command', '-q'],
+               lambda stdout: 'is active' in stdout.lower()),
+    LockMethod('dbus-gnome', ['dbus-send', '--session', '--dest=org.gnome.ScreenSaver',
+                              '--type=method_call', '--print-reply', '/org/gnome/ScreenSaver',
+                              'org.gnome.ScreenSaver.GetActive'],
+               lambda stdout: 'boolean true' in stdout.lower()),
+    LockMethod('xdg-screensaver', ['xdg-screensaver', 'status'],
+               lambda stdout: 'is active' in stdout.lower()),
+    LockMethod('xset', ['xset', 'q'],
+               lambda stdout: 'monitor is off' in stdout.lower())
+)
+
+
+class MethodStats:
+    """What the chain has learned about one method."""
+
+    def __init__(self):
+        """Initialize empty statistics."""
+        self.runs = 0
+        self.failures = 0
+        self.consecutive_failures = 0
+        self.hits = 0
+        self.seconds = 0.0
+        self.missing = False
+        # Monotonic time before which the method is skipped
+        self.benched_until = 0.0
+
+    @property
+    def failure_rate(self) -> float:
+        """Share of runs that failed."""
+        return self.failures / self.runs if self.runs else 0.0
+
+    @property
+    def mean_seconds(self) -> float:
+        """Mean duration of a run."""
+        return self.seconds / self.runs if self.runs else 0.0
+
+
+class LockProbeChain:
+    """Screen lock probe that adapts its methods to the host."""
+
+    def __init__(self, methods: Sequence[LockMethod] = DEFAULT_METHODS,
+                 reprobe_interval: float = 300.0, max_failures: int = 3,
+                 timeout: float = 2.0, logger: Optional[logging.Logger] = None,
+                 clock: Callable[[], float] = time.monotonic):
+        """
+        Initialize the chain.
+
+        Args:
+            methods: Methods to choose from
+            reprobe_interval: Seconds before a missing or failing method is retried
+            max_failures: Consecutive failures after which a method is benched
+            timeout: Seconds a method may take
+            logger: Optional logger
+            clock: Monotonic clock, replaceable for benchmarks
+        """
+        self.methods = list(methods)
+        self.reprobe_interval = reprobe_interval
+        self.max_failures = max_failures
+        self.timeout = timeout
+        self.logger = logger or logging.getLogger(__name__)
+        self.clock = clock
+        self.stats: Dict[str, MethodStats] = {method.name: MethodStats() for method in methods}
+        self._order = list(self.methods)
+        self._lock = Lock()
+
+    @classmethod
+    def from_config(cls, settings: Dict, logger: Optional[logging.Logger] = None) -> 'LockProbeChain':
+        """
+        Create a chain from the ``lock_probes`` configuration section.
+
+        Args:
+            settings: Section with ``reprobe_interval``, ``max_failures`` and ``timeout``
+            logger: Optional logger
+
+        Returns:
+            LockProbeChain: The chain
+        """
+        return cls(
+            reprobe_interval=settings.get('reprobe_interval', 300.0),
+            max_failures=settings.get('max_failures', 3),
+            timeout=settings.get('timeout', 2.0),
+            logger=logger
+        )
+
+    def is_locked(self) -> bool:
+        """
+        Check whether any usable method reports the screen as locked.
+
+        Returns:
+            bool: True if the screen is locked
+        """
+        with self._lock:
+            now = self.clock()
+            for method in self._order:
+                stats = self.stats[method.name]
+                if stats.benched_until > now:
+                    continue
+                if self._run(method, stats, now) == LOCKED:
+                    self._reorder()
+                    return True
+            self._reorder()
+            return False
+
+    def calibrate(self) -> List[Dict]:
+        """
+        Run every method once, then log and return the learned profile.
+
+        Returns:
+            List[Dict]: Profile of each method in probing order
+        """
+        with self._lock:
+            now = self.clock()
+            for method in self.methods:
+                self._run(method, self.stats[method.name], now)
+            self._reorder()
+        profile = self.profile()
+        usable = [entry['method'] for entry in profile if entry['status'] == 'active']
+        self.logger.info(f"Lock probe order: {', '.join(usable) or 'none usable'}")
+        for entry in profile:
+            self.logger.info(
+                f"Lock probe {entry['method']}: {entry['status']}, "
+                f"{entry['mean_ms']} ms, {entry['failures']}/{entry['runs']} failed"
+            )
+        return profile
+
+    def profile(self) -> List[Dict]:
+        """
+        Describe what has been learned about each method.
+
+        Returns:
+            List[Dict]: Method name, status, runs, failures, hits and mean
+            duration in probing order
+        """
+        now = self.clock()
+        profile = []
+        for method in self._order:
+            stats = self.stats[method.name]
+            if stats.missing:
+                status = 'missing'
+            elif stats.benched_until > now:
+                status = 'benched'
+            else:
+                status = 'active'
+            profile.append({
+                'method': method.name,
+                'status': status,
+                'runs': stats.runs,
+                'failures': stats.failures,
+                'hits': stats.hits,
+                'mean_ms': round(stats.mean_seconds * 1000, 1)
+            })
+        return profile
+
+    def _run(self, method: LockMethod, stats: MethodStats, now: float) -> str:
+        """
+        Run a method and learn from its outcome.
+
+        Args:
+            method: Method to run
+            stats: Statistics of the method
+            now: Current monotonic time
+
+        Returns:
+            str: Outcome of the run
+        """
+        # A missing binary costs a failed fork; checking PATH is much cheaper
+        if shutil.which(method.binary) is None:
+            outcome = MISSING
+        else:
+            start = time.perf_counter()
+            outcome = method.run(self.timeout)
+            elapsed = time.perf_counter() - start
+            method_seconds.observe(elapsed, method=method.name)
+            stats.runs += 1
+            stats.seconds += elapsed
+
+        if outcome in (LOCKED, UNLOCKED):
+            if stats.missing or stats.benched_until:
+                self.logger.info(f"Lock probe {method.name} is usable again")
+            stats.missing = False
+            stats.consecutive_failures = 0
+            stats.benched_until = 0.0
+            stats.hits += outcome == LOCKED
+            return outcome
+
+        method_failures.inc(method=method.name, reason=outcome)
+        if outcome == MISSING:
+            if not stats.missing:
+                self.logger.debug(f"Lock probe {method.name}: {method.binary} is not installed")
+            stats.missing = True
+            stats.benched_until = now + self.reprobe_interval
+            return outcome
+
+        stats.failures += 1
+        stats.consecutive_failures += 1
+        if stats.consecutive_failures >= self.max_failures:
+            if not stats.benched_until:
+                self.logger.info(f"Lock probe {method.name} failed {stats.consecutive_failures} "
+                                 f"times, retrying every {self.reprobe_interval:g} seconds")
+            stats.benched_until = now + self.reprobe_interval
+        return outcome
+
+    def _reorder(self):
+        """Sort methods by lock detections, reliability and speed."""
+        self._order.sort(key=lambda method: (
+            self.stats[method.name].missing,
+            -min(self.stats[method.name].hits, 1),
+            round(self.stats[method.name].failure_rate, 1),
+            self.stats[method.name].mean_seconds
+        ))
@@ -0,0 +1,378 @@
+"""
+Module providing sources of screen lock and session state changes.
+
+A state source reports changes to the lock, logout and shutdown state of the
+user's session through a callback.  The logind source listens for signals on a
+single long-lived system bus connection, while the polling source wraps the
+tracker's subprocess probes and is used whenever the bus is unavailable.
+"""
+
+import os
+import logging
+from threading import Thread
+from typing import Callable, Dict, Optional, Union
+
+try:
+    import dbus
+    from dbus.mainloop.glib import DBusGMainLoop
+    from gi.repository import GLib
+except ImportError:  # dbus-python and PyGObject are optional
+    dbus = None
+
+from ..utils.scheduler import AdaptiveInterval, PeriodicScheduler
+
+# State keys reported to callbacks
+LOCKED = 'locked'
+LOGGED_OUT = 'logged_out'
+SHUTTING_DOWN = 'shutting_down'
+
+StateCallback = Callable[[str, bool], None]
+Probe = Callable[[], bool]
+
+LOGIND_BUS_NAME = 'org.freedesktop.login1'
+LOGIND_PATH = '/org/freedesktop/login1'
+MANAGER_IFACE = 'org.freedesktop.login1.Manager'
+SESSION_IFACE = 'org.freedesktop.login1.Session'
+USER_IFACE = 'org.freedesktop.login1.User'
+PROPERTIES_IFACE = 'org.freedesktop.DBus.Properties'
+
+
+class StateSource:
+    """Base class for screen lock and session state sources."""
+
+    name = 'base'
+    event_driven = False
+
+    def __init__(self, logger: Optional[logging.Logger] = None):
+        """
+        Initialize the state source.
+
+        Args:
+            logger: Optional logger, defaults to the module logger
+        """
+        self.logger = logger or logging.getLogger(__name__)
+        self.state: Dict[str, bool] = {
+            LOCKED: False,
+            LOGGED_OUT: False,
+            SHUTTING_DOWN: False
+        }
+        self._callback: Optional[StateCallback] = None
+
+    def start(self, callback: StateCallback):
+        """
+        Start delivering state changes.
+
+        Args:
+            callback: Called with (state key, new value) on every change
+        """
+        self._callback = callback
+        self._start()
+
+    def stop(self):
+        """Stop delivering state changes."""
+        self._stop()
+        self._callback = None
+
+    def _start(self):
+        """Backend specific start hook."""
+        raise NotImplementedError
+
+    def _stop(self):
+        """Backend specific stop hook."""
+
+    def _emit(self, key: str, value: bool) -> bool:
+        """
+        Record a state value and notify the callback if it changed.
+
+        Args:
+            key: State key
+            value: New state value
+
+        Returns:
+            bool: True if the value changed
+        """
+        value = bool(value)
+        if self.state.get(key) == value:
+            return False
+        self.state[key] = value
+        self.logger.debug(f"{self.name} state change: {key}={value}")
+        if self._callback:
+            self._callback(key, value)
+        return True
+
+
+class PollingStateSource(StateSource):
+    """State source that periodically runs probe functions.
+
+    Probes run as a job on a shared scheduler. They repeat quickly after a
+    change, at the base interval while unlocked and less and less often while
+    the screen stays locked.
+    """
+
+    name = 'polling'
+    job_name = 'state-poll'
+
+    def __init__(self, lock_probe: Probe, logout_probe: Probe,
+                 interval: Union[float, AdaptiveInterval] = 2.0,
+                 logger: Optional[logging.Logger] = None,
+                 scheduler: Optional[PeriodicScheduler] = None):
+        """
+        Initialize the polling source.
+
+        Args:
+            lock_probe: Returns True when the screen is locked
+            logout_probe: Returns True when the user has logged out
+            interval: Seconds between probes while unlocked, or an adaptive interval
+            logger: Optional logger
+            scheduler: Optional shared scheduler, by default a private one
+        """
+        super().__init__(logger)
+        self.lock_probe = lock_probe
+        self.logout_probe = logout_probe
+        if not isinstance(interval, AdaptiveInterval):
+            interval = AdaptiveInterval(interval)
+        self.interval = interval
+        self._owns_scheduler = scheduler is None
+        self.scheduler = scheduler or PeriodicScheduler(name='state-poll', logger=self.logger)
+
+    def _start(self):
+        # Seed the lock state without reporting it as a change
+        self.state[LOCKED] = bool(self.lock_probe())
+        self.interval.set_quiet(self.state[LOCKED])
+        self.scheduler.add(self.job_name, self._poll, self.interval.next)
+        if self._owns_scheduler:
+            self.scheduler.start()
+
+    def _stop(self):
+        self.scheduler.remove(self.job_name)
+        if self._owns_scheduler:
+            self.scheduler.stop()
+
+    def _poll(self):
+        """Run the probes once and adapt the interval to the result."""
+        try:
+            changed = self._emit(LOCKED, self.lock_probe())
+            changed |= self._emit(LOGGED_OUT, self.logout_probe())
+        except Exception as e:
+            self.logger.error(f"Error polling session state: {e}")
+            return
+        if changed:
+            self.interval.changed()
+        self.interval.set_quiet(self.state[LOCKED])
+
+
+class BusStateSource(StateSource):
+    """Base class for sources driven by logind bus signals."""
+
+    event_driven = True
+
+    def _handle_signal(self, member: str, *args):
+        """
+        Translate a logind signal into state changes.
+
+        Args:
+            member: Signal name
+            *args: Signal arguments
+        """
+        if member == 'Lock':
+            self._emit(LOCKED, True)
+        elif member == 'Unlock':
+            self._emit(LOCKED, False)
+        elif member == 'PropertiesChanged':
+            interface, changed = args[0], args[1]
+            if interface != SESSION_IFACE:
+                return
+            if 'LockedHint' in changed:
+                self._emit(LOCKED, changed['LockedHint'])
+            if changed.get('State') == 'closing' or ('Active' in changed and not changed['Active']):
+                self._emit(LOGGED_OUT, True)
+        elif member == 'SessionRemoved':
+            self._emit(LOGGED_OUT, True)
+        elif member == 'PrepareForShutdown':
+            self._emit(SHUTTING_DOWN, args[0])
+
+
+class LogindStateSource(BusStateSource):
+    """State source subscribed to logind signals over the system bus."""
+
+    name = 'logind'
+
+    def __init__(self, session_id: Optional[str] = None,
+                 logger: Optional[logging.Logger] = None):
+        """
+        Initialize the logind source.
+
+        Args:
+            session_id: Optional logind session id, resolved when omitted
+            logger: Optional logger
+        """
+        super().__init__(logger)
+        self.session_id = session_id or os.getenv('XDG_SESSION_ID')
+        self._bus = None
+        self._loop = None
+        self._thread: Optional[Thread] = None
+        self._session_path: Optional[str] = None
+
+    @staticmethod
+    def available() -> bool:
+        """Check whether the bus bindings are installed."""
+        return dbus is not None
+
+    def _start(self):
+        if not self.available():
+            raise RuntimeError("dbus-python and PyGObject are required")
+
+        DBusGMainLoop(set_as_default=True)
+        self._bus = dbus.SystemBus(private=True)
+        manager = dbus.Interface(
+            self._bus.get_object(LOGIND_BUS_NAME, LOGIND_PATH), MANAGER_IFACE
+        )
+        self._session_path = self._resolve_session_path(manager)
+
+        session = self._bus.get_object(LOGIND_BUS_NAME, self._session_path)
+        properties = dbus.Interface(session, PROPERTIES_IFACE)
+        self.state[LOCKED] = bool(properties.Get(SESSION_IFACE, 'LockedHint'))
+
+        for member in ('Lock', 'Unlock'):
+            self._subscribe(member, SESSION_IFACE, self._session_path)
+        self._subscribe('PropertiesChanged', PROPERTIES_IFACE, self._session_path)
+        self._subscribe('PrepareForShutdown', MANAGER_IFACE, LOGIND_PATH)
+        self._bus.add_signal_receiver(
+            self._on_session_removed,
+            signal_name='SessionRemoved',
+            dbus_interface=MANAGER_IFACE,
+            bus_name=LOGIND_BUS_NAME,
+            path=LOGIND_PATH
+        )
+
+        self._loop = GLib.MainLoop()
+        self._thread = Thread(target=self._loop.run, daemon=True)
+        self._thread.start()
+        self.logger.info(f"Listening for logind signals on {self._session_path}")
+
+    def _stop(self):
+        if self._loop:
+            self._loop.quit()
+        if self._thread:
+            self._thread.join()
+            self._thread = None
+        if self._bus:
+            self._bus.close()
+            self._bus = None
+
+    def _resolve_session_path(self, manager) -> str:
+        """
+        Find the object path of the session to watch.
+
+        Args:
+            manager: logind manager interface
+
+        Returns:
+            str: Session object path
+        """
+        if self.session_id:
+            return str(manager.GetSession(self.session_id))
+
+        # Fall back to the user's display session, like `loginctl show-user self`
+        user = self._bus.get_object(LOGIND_BUS_NAME, manager.GetUser(os.getuid()))
+        _, path = dbus.Interface(user, PROPERTIES_IFACE).Get(USER_IFACE, 'Display')
+        if not path or path == '/':
+            raise RuntimeError("No graphical logind session found")
+        return str(path)
+
+    def _subscribe(self, member: str, interface: str, path: str):
+        """
+        Route a bus signal to the shared signal handler.
+
+        Args:
+            member: Signal name
+            interface: Interface emitting the signal
+            path: Object path emitting the signal
+        """
+        def handler(*args):
+            self._handle_signal(member, *args)
+
+        self._bus.add_signal_receiver(
+            handler,
+            signal_name=member,
+            dbus_interface=interface,
+            bus_name=LOGIND_BUS_NAME,
+            path=path
+        )
+
+    def _on_session_removed(self, session_id, path):
+        if str(path) == self._session_path:
+            self._handle_signal('SessionRemoved', session_id, path)
+
+
+class FakeBusStateSource(BusStateSource):
+    """In-process bus source for exercising the tracker without a desktop session."""
+
+    name = 'fake'
+
+    def __init__(self, locked: bool = False, logger: Optional[logging.Logger] = None):
+        """
+        Initialize the fake source.
+
+        Args:
+            locked: Initial lock state
+            logger: Optional logger
+        """
+        super().__init__(logger)
+        self.state[LOCKED] = locked
+        self.running = False
+
+    def _start(self):
+        self.running = True
+
+    def _stop(self):
+        self.running = False
+
+    def send(self, member: str, *args):
+        """
+        Deliver a signal as if it had arrived from logind.
+
+        Args:
+            member: Signal name, e.g. 'Lock' or 'PrepareForShutdown'
+            *args: Signal arguments
+        """
+        if self.running:
+            self._handle_signal(member, *args)
+
+
+def start_state_source(preference: str, callback: StateCallback,
+                       lock_probe: Probe, logout_probe: Probe,
+                       poll_interval: Union[float, AdaptiveInterval] = 2.0,
+                       logger: Optional[logging.Logger] = None,
+                       scheduler: Optional[PeriodicScheduler] = None) -> StateSource:
+    """
+    Start the preferred state source, falling back to polling.
+
+    Args:
+        preference: 'auto', 'logind' or 'polling'
+        callback: Called with (state key, new value) on every change
+        lock_probe: Probe used by the polling fallback for the lock state
+        logout_probe: Probe used by the polling fallback for the logout state
+        poll_interval: Seconds between probes for the polling fallback, or
+            an adaptive interval
+        logger: Optional logger
+        scheduler: Optional shared scheduler for the polling fallback
+
+    Returns:
+        StateSource: The started source
+    """
+    logger = logger or logging.getLogger(__name__)
+
+    if preference in ('auto', 'logind'):
+        source = LogindStateSource(logger=logger)
+        try:
+            source.start(callback)
+            return source
+        except Exception as e:
+            source.stop()
+            logger.warning(f"logind state source unavailable, falling back to polling: {e}")
+
+    source = PollingStateSource(lock_probe, logout_probe, poll_interval, logger=logger,
+                                scheduler=scheduler)
+    source.start(callback)
+    return source
@@ -1,42 +1,62 @@
 #!/usr/bin/env python3
-import json
 import os
 from datetime import datetime
 import time
 from pathlib import Path
-import subprocess
 import signal
 import sys
 import logging
-import psutil
-import socket
+import queue
 
-# Set up logging
-log_dir = Path(__file__).parent.parent.parent / 'logs'
-log_dir.mkdir(exist_ok=True)
-logging.basicConfig(
-    level=logging.INFO,
-    format='%(asctime)s - %(levelname)s - %(message)s',
-    handlers=[
-        logging.FileHandler(log_dir / 'screen_time_tracker.log'),
-        logging.StreamHandler()
-    ]
+# Make the tracker package importable when run as a script
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from tracker.core.day_state import DayState
+from tracker.events.event import Event
+from tracker.events.event_types import EventType
+from tracker.events.lock_probes import LockProbeChain
+from tracker.events.state_sources import (
+    LOCKED, LOGGED_OUT, SHUTTING_DOWN, start_state_source
 )
+from tracker.storage.factory import create_storage
+from tracker.utils.config import Config
+from tracker.utils.logger import start_logging
+from tracker.utils.metrics import MetricsExporter, registry
+from tracker.utils.scheduler import AdaptiveInterval, PeriodicScheduler
+from tracker.utils.systemd import sd_notify
+
+# Logs are kept next to the data directory, like the tracker has always done
+log_dir = Path(__file__).parent.parent.parent / 'logs'
+
+probe_seconds = registry.histogram(
+    'chronos_probe_duration_seconds', "Time spent checking the lock or session state", ('probe',))
+probe_failures = registry.counter(
+    'chronos_probe_failures_total', "Lock or session state checks that failed", ('probe',))
 
 class ScreenTimeTracker:
-    def __init__(self):
+    POLL_INTERVAL = 2  # Seconds between probes when polling, unless configured
+
+    def __init__(self, config=None, base_dir=None):
         try:
+            self.config = config or Config()
+
             # Set up paths
-            self.base_dir = Path(__file__).parent.parent.parent
+            self.base_dir = Path(base_dir) if base_dir else Path(__file__).parent.parent.parent
             self.data_dir = self.base_dir / 'data' / 'screen_time_data'
             self.data_dir.mkdir(parents=True, exist_ok=True)
-            self.current_file = self.data_dir / f"screen_time_{datetime.now().strftime('%Y-%m-%d')}.json"
+            self.current_date = datetime.now().strftime('%Y-%m-%d')
+            self.current_file = self.data_dir / f"screen_time_{self.current_date}.json"
             
             logging.info("Initializing ScreenTimeTracker")
             logging.info(f"Base directory: {self.base_dir}")
             logging.info(f"Data directory: {self.data_dir}")
             logging.info(f"Current file: {self.current_file}")
             
+            # Events are persisted by the configured storage backend
+            self.storage = create_storage(self.config, data_dir=self.data_dir, json_indent=4)
+            self.storage.start()
+            logging.info(f"Using {self.storage.name} storage")
+            
             self.load_data()
             
             # Track current session
@@ -45,6 +65,13 @@ class ScreenTimeTracker:
                 'start_time': None
             }
             self.last_event_time = None
+            self.state_source = None
+            self.state_changes = queue.Queue()
+            self.lock_probes = LockProbeChain.from_config(self.config.lock_probes)
+            # Polling and metrics exports share one timer thread
+            self.scheduler = PeriodicScheduler(name='tracker-timer')
+            self.metrics = MetricsExporter.from_config(self.config.metrics, scheduler=self.scheduler)
+            self.shutdown_logged = False
             
             logging.info("ScreenTimeTracker initialized successfully")
         except Exception as e:
@@ -55,9 +82,10 @@ class ScreenTimeTracker:
         
     def load_data(self):
         try:
-            if self.current_file.exists():
-                with open(self.current_file, 'r') as f:
-                    self.data = json.load(f)
+            # Startup only needs the totals and the latest events of the day
+            data = self.storage.load_tail(self.current_date)
+            if data is not None:
+                self.data = data
                 logging.info(f"Loaded existing data from {self.current_file}")
             else:
                 self.data = {
@@ -70,6 +98,9 @@ class ScreenTimeTracker:
                 }
                 logging.info(f"Created new data file at {self.current_file}")
             
+            # Index the day once instead of scanning its events on every lookup
+            self.day_state = DayState.from_events(self.current_date, self.data["events"])
+            
             # Initialize current_session from data
             self.current_session = self.data.get("current_session", {
                 "is_active": False,
@@ -79,13 +110,20 @@ class ScreenTimeTracker:
             logging.error(f"Error loading data: {str(e)}")
             raise
     
-    def save_data(self):
+    def save_data(self, event=None):
         try:
             # Update data with current session before saving
             self.data["current_session"] = self.current_session
-            with open(self.current_file, 'w') as f:
-                json.dump(self.data, f, indent=4)
-            logging.debug("Data saved successfully")
+            state = {
+                "total_time": self.data["total_time"],
+                "current_session": self.current_session
+            }
+            # A new event and the updated totals are persisted together
+            if event is not None:
+                self.storage.append_event(self.current_date, event, state)
+            else:
+                self.storage.save_state(self.current_date, state)
+            logging.debug("Data queued for saving")
         except Exception as e:
             logging.error(f"Error saving data: {str(e)}")
             raise
@@ -100,19 +138,17 @@ class ScreenTimeTracker:
                 
             # Prevent duplicate startup events within 5 minutes
             if event_type == 'startup':
-                for event in reversed(self.data["events"]):
-                    if event["type"] == "startup":
-                        event_time = datetime.fromisoformat(event["timestamp"])
-                        if (current_time - event_time).total_seconds() < 300:  # 5 minutes
-                            logging.warning(f"Skipping duplicate startup event within 5 minutes")
-                            return
+                last_startup = self.day_state.last_time_of(EventType.STARTUP)
+                if last_startup and (current_time - last_startup).total_seconds() < 300:  # 5 minutes
+                    logging.warning(f"Skipping duplicate startup event within 5 minutes")
+                    return
             
             self.last_event_time = current_time
-            event = {
-                "timestamp": current_time.isoformat(),
-                "type": event_type
-            }
-            self.data["events"].append(event)
+            # Parsed once here; the dict is only built for storage
+            event = Event.at(EventType.parse(event_type), current_time)
+            record = event.to_dict(legacy=True)
+            self.data["events"].append(record)
+            self.day_state.apply(event)
             
             # Update current session
             if event_type == 'unlock' or event_type == 'startup':
@@ -121,7 +157,7 @@ class ScreenTimeTracker:
                         'is_active': True,
                         'start_time': current_time.isoformat()
                     }
-                    logging.info(f"Session started at {self.current_session['start_time']}")
+                    logging.debug(f"Session started at {self.current_session['start_time']}")
             elif event_type in ['lock', 'logout', 'system_shutdown']:
                 if self.current_session['is_active']:
                     start_time = datetime.fromisoformat(self.current_session['start_time'])
@@ -133,12 +169,18 @@ class ScreenTimeTracker:
                     'start_time': None
                 }
             
-            self.save_data()
+            self.save_data(record)
             logging.info(f"Logged event: {event_type}")
         except Exception as e:
             logging.error(f"Error logging event: {str(e)}")
             raise
     
+    def close(self):
+        # Make sure pending events reach the disk before exiting
+        self.storage.close()
+        self.metrics.stop()
+        self.scheduler.stop()
+
     def calculate_total_time(self):
         try:
             events = self.data["events"]
@@ -173,6 +215,9 @@ class ScreenTimeTracker:
             raise
 
     def is_system_shutting_down(self):
+        # Rarely called, so their import stays off the startup path
+        import psutil
+        import subprocess
         try:
             # Check for shutdown processes
             for proc in psutil.process_iter(['name']):
@@ -191,13 +236,16 @@ class ScreenTimeTracker:
             return False
 
     def is_network_available(self):
+        import socket
         try:
             socket.create_connection(("8.8.8.8", 53), timeout=3)
             return True
         except OSError:
             return False
 
+    @probe_seconds.time(probe='user_logged_out')
     def is_user_logged_out(self):
+        import subprocess
         try:
             # Get current session ID
             session_id = subprocess.run(['loginctl', 'show-user', 'self', '-p', 'Display'], 
@@ -225,110 +273,97 @@ class ScreenTimeTracker:
 
         except Exception as e:
             logging.error(f"Error checking user logout status: {e}")
+            probe_failures.inc(probe='user_logged_out')
             # Default to false to prevent false positives
             return False
 
+    @probe_seconds.time(probe='screen_locked')
     def is_screen_locked(self):
         try:
-            # Method 1: Check using loginctl
-            result = subprocess.run(['loginctl', 'show-session', 'self', '-p', 'LockedHint'], 
-                                 capture_output=True, text=True)
-            if result.stdout.strip() == 'yes':
-                return True
-
-            # Method 2: Check using gnome-screensaver-command
-            try:
-                result = subprocess.run(['gnome-screensaver-command', '-q'], 
-                                     capture_output=True, text=True)
-                if 'is active' in result.stdout.lower():
-                    return True
-            except:
-                pass
-
-            # Method 3: Check using dbus
-            try:
-                result = subprocess.run(['dbus-send', '--session', '--dest=org.gnome.ScreenSaver', 
-                                      '--type=method_call', '--print-reply', '/org/gnome/ScreenSaver', 
-                                      'org.gnome.ScreenSaver.GetActive'], 
-                                     capture_output=True, text=True)
-                if 'boolean true' in result.stdout.lower():
-                    return True
-            except:
-                pass
-
-            # Method 4: Check using xdg-screensaver
-            try:
-                result = subprocess.run(['xdg-screensaver', 'status'], 
-                                     capture_output=True, text=True)
-                if 'is active' in result.stdout.lower():
-                    return True
-            except:
-                pass
-
-            # Method 5: Check using xset
-            try:
-                result = subprocess.run(['xset', 'q'], 
-                                     capture_output=True, text=True)
-                if 'monitor is off' in result.stdout.lower():
-                    return True
-            except:
-                pass
-
-            return False
-
+            # Tries the lock methods that work on this host, fastest first
+            return self.lock_probes.is_locked()
         except Exception as e:
             logging.error(f"Error checking screen lock status: {e}")
+            probe_failures.inc(probe='screen_locked')
             # If we can't determine the lock status, assume it's not locked
             return False
 
     def handle_signal(self, signum, frame):
         logging.info("Received shutdown signal, saving data...")
-        self.log_event('system_shutdown')
+        if self.state_source:
+            self.state_source.stop()
+        if not self.shutdown_logged:
+            self.log_event('system_shutdown')
         self.calculate_total_time()
+        self.close()
         sys.exit(0)
 
+    def handle_state_change(self, key, value):
+        # Called from the state source thread; the main loop does the work
+        self.state_changes.put((key, value))
+
     def run(self):
         # Set up signal handlers
         signal.signal(signal.SIGTERM, self.handle_signal)
         signal.signal(signal.SIGINT, self.handle_signal)
         
         logging.info("Starting screen time tracker...")
-        last_lock_state = self.is_screen_locked()
-        last_check_time = datetime.now()
-        last_logout_check = False
+        self.scheduler.start()
+        self.metrics.start()
+        self.state_source = start_state_source(
+            self.config.state_source,
+            self.handle_state_change,
+            self.is_screen_locked,
+            self.is_user_logged_out,
+            poll_interval=AdaptiveInterval.from_config(self.config.polling, self.POLL_INTERVAL),
+            scheduler=self.scheduler
+        )
+        logging.info(f"Using {self.state_source.name} state source")
+        # Ready once the startup event is recorded and state changes are watched
+        if sd_notify('READY=1'):
+            logging.info("Reported readiness to systemd")
+        if self.state_source.name == 'polling':
+            # Learn which lock methods work here before the first interval passes
+            self.lock_probes.calibrate()
         
         while True:
             try:
-                current_time = datetime.now()
-                current_lock_state = self.is_screen_locked()
-                current_logout_state = self.is_user_logged_out()
-                
-                # Only process state changes if enough time has passed (2 seconds minimum)
-                if (current_time - last_check_time).total_seconds() >= 2:
-                    # Handle lock state changes
-                    if current_lock_state != last_lock_state:
-                        if current_lock_state:
-                            logging.info("Screen locked detected")
-                            self.log_event('lock')
-                        else:
-                            logging.info("Screen unlocked detected")
-                            self.log_event('unlock')
-                        last_lock_state = current_lock_state
-                        last_check_time = current_time
-                    
-                    # Handle logout state changes
-                    if current_logout_state and not last_logout_check:
-                        self.log_event('logout')
-                        self.calculate_total_time()
-                        sys.exit(0)
-                    last_logout_check = current_logout_state
-                
-                time.sleep(2)  # Check every 2 seconds
+                # Block until the state source reports a change
+                key, value = self.state_changes.get()
+                self.apply_state_change(key, value)
             except Exception as e:
                 logging.error(f"Error in main loop: {e}")
                 time.sleep(2)
 
+    def apply_state_change(self, key, value):
+        # Handle lock state changes
+        if key == LOCKED:
+            if value:
+                logging.debug("Screen locked detected")
+                self.log_event('lock')
+            else:
+                logging.debug("Screen unlocked detected")
+                self.log_event('unlock')
+        
+        # Handle logout state changes
+        elif key == LOGGED_OUT and value:
+            if self.state_source:
+                self.state_source.stop()
+            self.log_event('logout')
+            self.calculate_total_time()
+            self.close()
+            sys.exit(0)
+        
+        # Record the shutdown before systemd sends SIGTERM
+        elif key == SHUTTING_DOWN and value and not self.shutdown_logged:
+            logging.info("System shutdown detected")
+            self.log_event('system_shutdown')
+            self.shutdown_logged = True
+
 def main():
+    config = Config()
+    # Records are written by a background thread, never by the tracking loop
+    start_logging(log_dir, 'screen_time_tracker.log', config.logging)
     try:
         logging.info("Starting screen time tracker")
         logging.info(f"Python version: {sys.version}")
@@ -336,31 +371,32 @@ def main():
         logging.info(f"Display: {os.getenv('DISPLAY')}")
         logging.info(f"Working directory: {os.getcwd()}")
         
-        tracker = ScreenTimeTracker()
+        tracker = ScreenTimeTracker(config)
         
         # Check if we should log a startup event
         should_log_startup = True
         current_time = datetime.now()
 
         # Look at recent events
-        if tracker.data["events"]:
-            last_event = tracker.data["events"][-1]
-            last_event_time = datetime.fromisoformat(last_event["timestamp"])
+        if tracker.day_state.last_event:
+            last_type = tracker.day_state.last_type
+            last_event_time = tracker.day_state.last_time
             time_since_last = (current_time - last_event_time).total_seconds()
+            last_name = last_type.legacy_name if last_type else 'unknown'
 
-            logging.info(f"Last event: {last_event['type']} at {last_event_time}")
+            logging.info(f"Last event: {last_name} at {last_event_time}")
             logging.info(f"Time since last event: {time_since_last} seconds")
 
             # If last event was a startup and it was recent (within 5 minutes)
-            if last_event["type"] == "startup" and time_since_last < 300:
+            if last_type == EventType.STARTUP and time_since_last < 300:
                 logging.info("Skipping startup event - last startup was too recent")
                 should_log_startup = False
             # If last event was shutdown/logout, always allow new startup regardless of time
-            elif last_event["type"] in ["system_shutdown", "logout"]:
+            elif last_type in (EventType.SHUTDOWN, EventType.LOGOUT):
                 logging.info("Last event was shutdown/logout - allowing new startup")
                 should_log_startup = True
             else:
-                logging.info(f"Last event was {last_event['type']} - allowing new startup")
+                logging.info(f"Last event was {last_name} - allowing new startup")
             
         if should_log_startup:
             logging.info("Logging startup event")
@@ -370,14 +406,6 @@ def main():
             tracker.save_data()
             logging.info("Startup event logged successfully")
         
-        # Add a small delay after startup to ensure system is stable
-        time.sleep(5)
-        
-        # Verify the service is still running after startup
-        if not os.path.exists('/proc/self'):
-            logging.error("Service process no longer exists after startup")
-            return
-            
         logging.info("Starting main tracking loop")
         tracker.run()
     except Exception as e:
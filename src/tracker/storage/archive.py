@@ -0,0 +1,354 @@
+"""
+Module implementing the columnar archive format for closed days.
+
+An archive ``screen_time_YYYY-MM-DD.bin`` holds one day in three parts:
+
+- ``MAGIC`` and the little-endian uint32 length of a JSON header that carries
+  the day fields (``total_time``, ...), the event count, the table of event
+  type names and any per-event fields besides ``type`` and ``timestamp``
+- the timestamps as little-endian int64 microseconds since 1970-01-01 in
+  local time, starting at an 8 byte aligned offset
+- one uint8 index into the type table per event
+
+Reads go through ``mmap``, so looking at a time slice or counting types only
+decodes the rows that are needed. Archives round-trip to exactly the JSON
+structure they were written from.
+"""
+
+import os
+import sys
+import json
+import mmap
+import struct
+import tempfile
+from array import array
+from bisect import bisect_left
+from datetime import datetime, timedelta
+from pathlib import Path
+from typing import Any, Dict, Iterable, Iterator, List, Optional, Sequence, Tuple, Union
+
+MAGIC = b'STDA'
+ARCHIVE_VERSION = 1
+HEADER_PREFIX = struct.Struct('<4sI')
+EPOCH = datetime(1970, 1, 1)
+MICROSECOND = timedelta(microseconds=1)
+MICROS_PER_DAY = 86400 * 1000000
+
+
+def to_micros(timestamp: datetime) -> int:
+    """
+    Convert a timestamp to microseconds since the epoch in local time.
+
+    Args:
+        timestamp: Naive local timestamp, or an aware one which is converted
+            to local time first
+
+    Returns:
+        int: Microseconds since 1970-01-01 00:00
+    """
+    if timestamp.tzinfo is not None:
+        timestamp = timestamp.astimezone().replace(tzinfo=None)
+    return (timestamp - EPOCH) // MICROSECOND
+
+
+def from_micros(micros: int) -> datetime:
+    """
+    Convert microseconds since the epoch in local time to a timestamp.
+
+    Args:
+        micros: Microseconds since 1970-01-01 00:00
+
+    Returns:
+        datetime: Naive local timestamp
+    """
+    return EPOCH + timedelta(microseconds=micros)
+
+
+def encode_day(date: str, data: Dict[str, Any]) -> bytes:
+    """
+    Encode a day in the archive format.
+
+    Args:
+        date: Date string in YYYY-MM-DD format
+        data: Day data in the day file format
+
+    Returns:
+        bytes: Archive contents
+
+    Raises:
+        ValueError: If the day has more than 256 event types or an event
+            without a parseable timestamp
+    """
+    events = data.get('events', [])
+    type_codes: Dict[str, int] = {}
+    timestamps = array('q')
+    codes = array('B')
+    extras: Dict[str, Dict[str, Any]] = {}
+
+    for index, event in enumerate(events):
+        timestamp = event['timestamp']
+        micros = to_micros(datetime.fromisoformat(timestamp))
+        timestamps.append(micros)
+
+        event_type = event['type']
+        if event_type not in type_codes:
+            if len(type_codes) > 255:
+                raise ValueError(f"Too many event types to archive {date}")
+            type_codes[event_type] = len(type_codes)
+        codes.append(type_codes[event_type])
+
+        extra = {key: value for key, value in event.items() if key not in ('type', 'timestamp')}
+        # Keep the original text when it would not be reproduced exactly
+        if from_micros(micros).isoformat() != timestamp:
+            extra['timestamp'] = timestamp
+        if extra:
+            extras[str(index)] = extra
+
+    header = {
+        'version': ARCHIVE_VERSION,
+        'date': date,
+        'count': len(events),
+        'sorted': all(a <= b for a, b in zip(timestamps, timestamps[1:])),
+        'types': list(type_codes),
+        'day': {key: value for key, value in data.items() if key != 'events'},
+        'extras': extras
+    }
+    header_bytes = json.dumps(header, separators=(',', ':')).encode()
+    # Pad the header so the timestamp column starts 8 byte aligned
+    padding = -(HEADER_PREFIX.size + len(header_bytes)) % 8
+    header_bytes += b' ' * padding
+
+    if sys.byteorder != 'little':
+        timestamps.byteswap()
+    return b''.join([
+        HEADER_PREFIX.pack(MAGIC, len(header_bytes)),
+        header_bytes,
+        timestamps.tobytes(),
+        codes.tobytes()
+    ])
+
+
+def write_archive(path: Union[str, Path], date: str, data: Dict[str, Any]):
+    """
+    Write a day archive so readers never observe a partially written file.
+
+    Args:
+        path: Destination path
+        date: Date string in YYYY-MM-DD format
+        data: Day data in the day file format
+    """
+    contents = encode_day(date, data)
+    path = Path(path)
+    fd, tmp_path = tempfile.mkstemp(dir=path.parent, prefix=f".{path.name}.", suffix='.tmp')
+    try:
+        with os.fdopen(fd, 'wb') as f:
+            f.write(contents)
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(tmp_path, path)
+    except BaseException:
+        try:
+            os.unlink(tmp_path)
+        except OSError:
+            pass
+        raise
+
+
+class ArchiveReader:
+    """Memory-mapped reader of one day archive."""
+
+    def __init__(self, path: Union[str, Path]):
+        """
+        Open an archive and parse its header.
+
+        Args:
+            path: Archive path
+
+        Raises:
+            ValueError: If the file is not an archive of a known version
+        """
+        self.path = Path(path)
+        with open(self.path, 'rb') as f:
+            self._mmap = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+
+        try:
+            magic, header_size = HEADER_PREFIX.unpack_from(self._mmap, 0)
+            if magic != MAGIC:
+                raise ValueError(f"Not a day archive: {self.path}")
+            start = HEADER_PREFIX.size
+            self.header = json.loads(self._mmap[start:start + header_size])
+            if self.header.get('version') != ARCHIVE_VERSION:
+                raise ValueError(f"Unsupported archive version in {self.path}")
+        except BaseException:
+            self._mmap.close()
+            raise
+
+        self.count: int = self.header['count']
+        self.type_names: List[str] = self.header['types']
+        self._extras = {int(row): extra for row, extra in self.header['extras'].items()}
+        self._timestamps_offset = start + header_size
+        self._types_offset = self._timestamps_offset + 8 * self.count
+        self._views: List[memoryview] = []
+        self._timestamps: Optional[Sequence[int]] = None
+
+    def __enter__(self) -> 'ArchiveReader':
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+    def close(self):
+        """Release the mapping."""
+        # Derived views go first, they keep their source exported
+        for view in reversed(self._views):
+            view.release()
+        self._views.clear()
+        self._timestamps = None
+        self._mmap.close()
+
+    @property
+    def size(self) -> int:
+        """Size of the archive file in bytes."""
+        return len(self._mmap)
+
+    @property
+    def day_fields(self) -> Dict[str, Any]:
+        """Day fields other than the events, e.g. total_time."""
+        return dict(self.header['day'])
+
+    def timestamps(self) -> Sequence[int]:
+        """
+        Get the timestamp column without copying it.
+
+        Returns:
+            Sequence[int]: Microseconds since the epoch in local time, valid
+            until the reader is closed
+        """
+        if self._timestamps is None:
+            raw = memoryview(self._mmap)[self._timestamps_offset:self._types_offset]
+            self._views.append(raw)
+            if sys.byteorder == 'little':
+                self._timestamps = raw.cast('q')
+                self._views.append(self._timestamps)
+            else:
+                self._timestamps = array('q', raw.tobytes())
+                self._timestamps.byteswap()
+        return self._timestamps
+
+    def type_codes(self) -> bytes:
+        """
+        Get the type column.
+
+        Returns:
+            bytes: One index into type_names per event
+        """
+        return self._mmap[self._types_offset:self._types_offset + self.count]
+
+    def slice_bounds(self, start: Optional[datetime] = None,
+                     end: Optional[datetime] = None) -> Tuple[int, int]:
+        """
+        Find the rows with start <= timestamp < end.
+
+        Only valid for archives whose timestamps are sorted.
+
+        Args:
+            start: Optional inclusive lower bound
+            end: Optional exclusive upper bound
+
+        Returns:
+            Tuple[int, int]: First row and the row after the last one
+        """
+        timestamps = self.timestamps()
+        low = bisect_left(timestamps, to_micros(start)) if start else 0
+        high = bisect_left(timestamps, to_micros(end)) if end else self.count
+        return low, max(low, high)
+
+    def events(self, start: Optional[datetime] = None, end: Optional[datetime] = None,
+               types: Optional[Iterable[str]] = None) -> List[Dict[str, Any]]:
+        """
+        Decode the events of a time slice, optionally of some types only.
+
+        Args:
+            start: Optional inclusive lower bound of the timestamps
+            end: Optional exclusive upper bound of the timestamps
+            types: Optional type names to keep
+
+        Returns:
+            List[Dict[str, Any]]: Events in the day file format
+        """
+        return [event for _, event in self.iter_events(start, end, types)]
+
+    def iter_events(self, start: Optional[datetime] = None, end: Optional[datetime] = None,
+                    types: Optional[Iterable[str]] = None,
+                    first_row: int = 0) -> Iterator[Tuple[int, Dict[str, Any]]]:
+        """
+        Decode the events of a time slice lazily, with their rows.
+
+        Callers that stop early, e.g. after a page of events, only pay for
+        the rows they consumed.
+
+        Args:
+            start: Optional inclusive lower bound of the timestamps
+            end: Optional exclusive upper bound of the timestamps
+            types: Optional type names to keep
+            first_row: Rows before this one are skipped
+
+        Yields:
+            Tuple[int, Dict[str, Any]]: Row and event in the day file format
+        """
+        timestamps = self.timestamps()
+        codes = self.type_codes()
+        if self.header['sorted']:
+            low, high = self.slice_bounds(start, end)
+            low = min(max(low, first_row), high)
+            rows: Iterable[int] = range(low, high)
+            stamps = timestamps[low:high].tolist()
+            codes = codes[low:high]
+        else:
+            start_micros = to_micros(start) if start else None
+            end_micros = to_micros(end) if end else None
+            rows = [row for row in range(first_row, self.count)
+                    if (start_micros is None or timestamps[row] >= start_micros) and
+                    (end_micros is None or timestamps[row] < end_micros)]
+            stamps = [timestamps[row] for row in rows]
+            codes = bytes(codes[row] for row in rows)
+
+        wanted = None
+        if types is not None:
+            names = set(types)
+            wanted = {code for code, name in enumerate(self.type_names) if name in names}
+        extras = self._extras
+        type_names = self.type_names
+        date = self.header['date']
+        day_start = to_micros(datetime.strptime(date, '%Y-%m-%d'))
+
+        for row, micros, code in zip(rows, stamps, codes):
+            if wanted is not None and code not in wanted:
+                continue
+            offset = micros - day_start
+            if 0 <= offset < MICROS_PER_DAY:
+                # Same output as isoformat(), without building a datetime
+                seconds, fraction = divmod(offset, 1000000)
+                minutes, seconds = divmod(seconds, 60)
+                hours, minutes = divmod(minutes, 60)
+                if fraction:
+                    timestamp = f"{date}T{hours:02d}:{minutes:02d}:{seconds:02d}.{fraction:06d}"
+                else:
+                    timestamp = f"{date}T{hours:02d}:{minutes:02d}:{seconds:02d}"
+            else:
+                timestamp = from_micros(micros).isoformat()
+            event = {'type': type_names[code], 'timestamp': timestamp}
+            if extras and row in extras:
+                event.update(extras[row])
+            yield row, event
+
+    def load(self) -> Dict[str, Any]:
+        """
+        Decode the whole day.
+
+        Returns:
+            Dict[str, Any]: Day data in the day file format
+        """
+        data = self.day_fields
+        data['events'] = self.events()
+        return data
@@ -0,0 +1,174 @@
+"""
+Module defining the storage interface shared by the trackers and the server.
+"""
+
+from datetime import datetime, timedelta
+from typing import Any, Dict, Iterable, List, Optional, Tuple
+
+from .archive import ArchiveReader
+from ..events.event_types import EventType
+from ..utils.metrics import registry
+
+# Shared by the backends, labelled with their name
+events_written = registry.counter(
+    'chronos_events_written_total', "Events appended to storage", ('backend',))
+write_seconds = registry.histogram(
+    'chronos_storage_write_seconds', "Time spent writing a day file, journal record or "
+    "transaction to disk", ('backend',))
+
+
+class Storage:
+    """Base class for screen time storage backends."""
+
+    name = 'base'
+    # True when last_event() is answered by an index rather than a day scan
+    indexed_lookups = False
+
+    def start(self):
+        """Start background work such as writer or compaction threads."""
+
+    def close(self):
+        """Flush pending data and release resources."""
+
+    def append_event(self, date: str, event: Dict[str, Any],
+                     state: Optional[Dict[str, Any]] = None):
+        """
+        Persist a new event and optionally updated day fields.
+
+        Args:
+            date: Date string of the day the event belongs to
+            event: Event dictionary
+            state: Optional day fields to overwrite, e.g. total_time
+        """
+        raise NotImplementedError
+
+    def save_state(self, date: str, state: Dict[str, Any]):
+        """
+        Persist updated day fields such as total_time or current_session.
+
+        Args:
+            date: Date string in YYYY-MM-DD format
+            state: Day fields to overwrite
+        """
+        raise NotImplementedError
+
+    def load_day(self, date: str) -> Optional[Dict[str, Any]]:
+        """
+        Load one day.
+
+        Args:
+            date: Date string in YYYY-MM-DD format
+
+        Returns:
+            Optional[Dict[str, Any]]: Day data or None if nothing is stored
+        """
+        raise NotImplementedError
+
+    def load_tail(self, date: str) -> Optional[Dict[str, Any]]:
+        """
+        Load the fields and at least the latest events of one day.
+
+        Used at startup, which only looks at the totals and the last events.
+        Backends that can read the end of a day cheaply may leave out earlier
+        events; by default the whole day is loaded. The returned data has only
+        the fields of the day file format.
+
+        Args:
+            date: Date string in YYYY-MM-DD format
+
+        Returns:
+            Optional[Dict[str, Any]]: Day data or None if nothing is stored
+        """
+        return self.load_day(date)
+
+    def day_signature(self, date: str) -> Optional[Tuple]:
+        """
+        Get a value that changes whenever a stored day changes.
+
+        Args:
+            date: Date string in YYYY-MM-DD format
+
+        Returns:
+            Optional[Tuple]: Signature of the day, or None if nothing is stored
+        """
+        raise NotImplementedError
+
+    def open_archive(self, date: str) -> Optional[ArchiveReader]:
+        """
+        Open a closed day for reading slices without decoding all of it.
+
+        Args:
+            date: Date string in YYYY-MM-DD format
+
+        Returns:
+            Optional[ArchiveReader]: Reader the caller closes, or None if the
+            day is not stored as an archive alone
+        """
+        return None
+
+    def load_range(self, start_date: str, days: int) -> List[Tuple[str, Optional[Dict[str, Any]]]]:
+        """
+        Load consecutive days.
+
+        Args:
+            start_date: First date in YYYY-MM-DD format
+            days: Number of days
+
+        Returns:
+            List[Tuple[str, Optional[Dict[str, Any]]]]: (date, data) pairs in date order
+        """
+        return [(date, self.load_day(date)) for date in date_range(start_date, days)]
+
+    def last_event(self, types: Optional[Iterable[str]] = None,
+                   max_days: int = 7) -> Optional[Dict[str, Any]]:
+        """
+        Find the most recent event, optionally of the given types.
+
+        Args:
+            types: Optional event types to match, in any spelling EventType.parse accepts
+            max_days: Number of days to look back
+
+        Returns:
+            Optional[Dict[str, Any]]: Most recent matching event
+        """
+        wanted = {EventType.parse(event_type) for event_type in types} if types else None
+        today = datetime.now()
+        for offset in range(max_days):
+            data = self.load_day((today - timedelta(days=offset)).strftime('%Y-%m-%d'))
+            if not data:
+                continue
+            for event in reversed(data.get('events', [])):
+                if wanted is None or parse_event_type(event) in wanted:
+                    return event
+        return None
+
+
+def parse_event_type(event: Dict[str, Any]) -> Optional[EventType]:
+    """
+    Get the type of a stored event.
+
+    Args:
+        event: Event in the day file format
+
+    Returns:
+        Optional[EventType]: Event type, or None if it is unknown
+    """
+    try:
+        return EventType.parse(event.get('type'))
+    except KeyError:
+        return None
+
+
+def date_range(start_date: str, days: int) -> List[str]:
+    """
+    List consecutive date strings.
+
+    Args:
+        start_date: First date in YYYY-MM-DD format
+        days: Number of days
+
+    Returns:
+        List[str]: Date strings
+    """
+    start = datetime.strptime(start_date, '%Y-%m-%d')
+    return [(start + timedelta(days=i)).strftime('%Y-%m-%d') for i in range(days)]
@@ -0,0 +1,502 @@
+"""
+Module for locating, reading and writing per-day screen time files.
+
+A day is stored as ``screen_time_YYYY-MM-DD.json`` and, when journaling is
+enabled, an append-only ``screen_time_YYYY-MM-DD.jsonl`` journal whose records
+are replayed on top of the JSON file. Each JSON file written here is followed
+by a small ``screen_time_YYYY-MM-DD.tail`` file with the day fields and the
+latest events, which startup reads instead of the whole day. Closed days may be converted into a
+columnar ``screen_time_YYYY-MM-DD.bin`` archive (see ``archive.py``), which is
+read whenever the JSON file is absent.
+"""
+
+import os
+import json
+import logging
+import tempfile
+from datetime import datetime
+from enum import Enum
+from pathlib import Path
+from typing import Any, Dict, Iterator, List, Optional, Tuple, Union
+
+from .archive import ArchiveReader, write_archive
+from ..utils.metrics import registry
+
+# Latest events kept in a day's tail file
+TAIL_EVENTS = 100
+
+read_bytes = registry.counter(
+    'chronos_storage_read_bytes_total', "Bytes of day files read, by file format", ('format',))
+
+PathLike = Union[str, Path]
+
+DAY_FILE_PREFIX = 'screen_time_'
+JSON_SUFFIX = '.json'
+JOURNAL_SUFFIX = '.jsonl'
+ARCHIVE_SUFFIX = '.bin'
+TAIL_SUFFIX = '.tail'
+# Day file field naming the journal records a compaction already folded in
+COMPACTED_JOURNAL_KEY = 'compacted_journal'
+
+
+def day_file_path(data_dir: PathLike, date: str) -> Path:
+    """
+    Get the path of a day's JSON file.
+
+    Args:
+        data_dir: Data directory
+        date: Date string in YYYY-MM-DD format
+
+    Returns:
+        Path: Path of the JSON file
+    """
+    return Path(data_dir) / f"{DAY_FILE_PREFIX}{date}{JSON_SUFFIX}"
+
+
+def journal_path(data_dir: PathLike, date: str) -> Path:
+    """
+    Get the path of a day's journal file.
+
+    Args:
+        data_dir: Data directory
+        date: Date string in YYYY-MM-DD format
+
+    Returns:
+        Path: Path of the JSONL journal
+    """
+    return Path(data_dir) / f"{DAY_FILE_PREFIX}{date}{JOURNAL_SUFFIX}"
+
+
+def archive_path(data_dir: PathLike, date: str) -> Path:
+    """
+    Get the path of a day's columnar archive.
+
+    Args:
+        data_dir: Data directory
+        date: Date string in YYYY-MM-DD format
+
+    Returns:
+        Path: Path of the archive
+    """
+    return Path(data_dir) / f"{DAY_FILE_PREFIX}{date}{ARCHIVE_SUFFIX}"
+
+
+def tail_path(data_dir: PathLike, date: str) -> Path:
+    """
+    Get the path of a day's tail file.
+
+    Args:
+        data_dir: Data directory
+        date: Date string in YYYY-MM-DD format
+
+    Returns:
+        Path: Path of the tail file
+    """
+    return Path(data_dir) / f"{DAY_FILE_PREFIX}{date}{TAIL_SUFFIX}"
+
+
+def date_from_path(path: PathLike) -> Optional[str]:
+    """
+    Extract the date from a day file or journal path.
+
+    Args:
+        path: Path of a day file or journal
+
+    Returns:
+        Optional[str]: Date string or None if the name does not match
+    """
+    name = Path(path).name
+    if not name.startswith(DAY_FILE_PREFIX):
+        return None
+    stem = name[len(DAY_FILE_PREFIX):]
+    for suffix in (JOURNAL_SUFFIX, JSON_SUFFIX, ARCHIVE_SUFFIX):
+        if stem.endswith(suffix):
+            return stem[:-len(suffix)]
+    return None
+
+
+def stored_dates(data_dir: PathLike) -> List[str]:
+    """
+    List the dates that have day files, journals or archives.
+
+    Args:
+        data_dir: Data directory
+
+    Returns:
+        List[str]: Sorted date strings
+    """
+    dates = set()
+    for suffix in (JSON_SUFFIX, JOURNAL_SUFFIX, ARCHIVE_SUFFIX):
+        pattern = f"{DAY_FILE_PREFIX}*{suffix}"
+        for path in Path(data_dir).glob(pattern):
+            date = date_from_path(path)
+            if date:
+                dates.add(date)
+    return sorted(dates)
+
+
+def day_signature(data_dir: PathLike, date: str) -> Optional[Tuple]:
+    """
+    Get a value that changes whenever a day's files change.
+
+    Args:
+        data_dir: Data directory
+        date: Date string in YYYY-MM-DD format
+
+    Returns:
+        Optional[Tuple]: (name, mtime_ns, size) of each existing file, or
+        None if the day has no files
+    """
+    signature = []
+    for path in (day_file_path(data_dir, date), journal_path(data_dir, date),
+                 archive_path(data_dir, date)):
+        try:
+            stat = os.stat(path)
+        except FileNotFoundError:
+            continue
+        signature.append((path.name, stat.st_mtime_ns, stat.st_size))
+    return tuple(signature) or None
+
+
+def empty_day() -> Dict[str, Any]:
+    """Create the structure of a day without events."""
+    return {'events': [], 'total_time': 0}
+
+
+def encode_value(value: Any) -> Any:
+    """
+    JSON fallback encoder for values stored in day files.
+
+    Args:
+        value: Value the json module cannot encode
+
+    Returns:
+        Any: Encodable representation
+    """
+    if isinstance(value, Enum):
+        return value.name
+    raise TypeError(f"Object of type {type(value).__name__} is not JSON serializable")
+
+
+def iter_journal(path: PathLike) -> Iterator[Dict[str, Any]]:
+    """
+    Iterate over the records of a journal file.
+
+    A torn final line left by a crash is skipped.
+
+    Args:
+        path: Journal path
+
+    Yields:
+        Dict[str, Any]: Journal records
+    """
+    with open(path, 'r') as f:
+        for line in f:
+            line = line.strip()
+            if not line:
+                continue
+            try:
+                yield json.loads(line)
+            except ValueError:
+                continue
+
+
+def journal_marker(path: PathLike, records: int) -> Dict[str, int]:
+    """
+    Describe a journal whose first records were folded into the day file.
+
+    Args:
+        path: Journal path
+        records: Number of records folded
+
+    Returns:
+        Dict[str, int]: Inode, size and record count of the journal
+    """
+    stat = os.stat(path)
+    return {'inode': stat.st_ino, 'size': stat.st_size, 'records': records}
+
+
+def folded_records(path: PathLike, marker: Optional[Dict[str, int]]) -> int:
+    """
+    Count the leading journal records already contained in the day file.
+
+    A compaction writes the day file before it removes the journal. If it
+    is interrupted in between, the marker it left in the day file names the
+    records to skip when the journal is replayed. A marker of an earlier
+    journal does not match a journal created since.
+
+    Args:
+        path: Journal path
+        marker: Marker read from the day file, if any
+
+    Returns:
+        int: Number of records to skip
+    """
+    if not marker:
+        return 0
+    stat = os.stat(path)
+    if stat.st_ino != marker.get('inode') or stat.st_size < marker.get('size', 0):
+        return 0
+    return marker.get('records', 0)
+
+
+def apply_journal_record(data: Dict[str, Any], record: Dict[str, Any]):
+    """
+    Apply one journal record to a day structure.
+
+    Args:
+        data: Day structure to update
+        record: Journal record with optional 'event' and 'state' keys
+    """
+    if 'event' in record:
+        data['events'].append(record['event'])
+    if 'state' in record:
+        data.update(record['state'])
+
+
+def load_day(data_dir: PathLike, date: str) -> Optional[Dict[str, Any]]:
+    """
+    Load a day from its JSON file or archive and its journal.
+
+    Args:
+        data_dir: Data directory
+        date: Date string in YYYY-MM-DD format
+
+    Returns:
+        Optional[Dict[str, Any]]: Day data or None if nothing is stored
+    """
+    journal_file = journal_path(data_dir, date)
+    data = empty_day()
+    found = False
+
+    try:
+        with open(day_file_path(data_dir, date), 'r') as f:
+            read_bytes.inc(os.fstat(f.fileno()).st_size, format='json')
+            data.update(json.load(f))
+        found = True
+    except FileNotFoundError:
+        # Closed days may only exist as an archive, which is written before
+        # the JSON file is removed
+        try:
+            with ArchiveReader(archive_path(data_dir, date)) as reader:
+                read_bytes.inc(reader.size, format='archive')
+                data.update(reader.load())
+            found = True
+        except FileNotFoundError:
+            pass
+
+    marker = data.pop(COMPACTED_JOURNAL_KEY, None)
+    if journal_file.exists():
+        found = True
+        read_bytes.inc(journal_file.stat().st_size, format='journal')
+        skip = folded_records(journal_file, marker)
+        for index, record in enumerate(iter_journal(journal_file)):
+            if index >= skip:
+                apply_journal_record(data, record)
+    return data if found else None
+
+
+def open_archive(data_dir: PathLike, date: str) -> Optional[ArchiveReader]:
+    """
+    Open a day that is stored only as an archive.
+
+    Args:
+        data_dir: Data directory
+        date: Date string in YYYY-MM-DD format
+
+    Returns:
+        Optional[ArchiveReader]: Reader of the archive, or None if the day
+        has a JSON file or journal, or no archive
+    """
+    if day_file_path(data_dir, date).exists() or journal_path(data_dir, date).exists():
+        return None
+    try:
+        reader = ArchiveReader(archive_path(data_dir, date))
+    except FileNotFoundError:
+        return None
+    read_bytes.inc(reader.size, format='archive')
+    return reader
+
+
+def load_day_tail(data_dir: PathLike, date: str) -> Optional[Dict[str, Any]]:
+    """
+    Load the day fields and the latest events of a day from its tail file.
+
+    Startup only needs the totals and the last events, so large day files
+    are not parsed whole. The tail is only used if it was written for the
+    current version of the JSON file; days with a journal or archive, and
+    days whose tail is missing or stale, are loaded with load_day.
+
+    Args:
+        data_dir: Data directory
+        date: Date string in YYYY-MM-DD format
+
+    Returns:
+        Optional[Dict[str, Any]]: Day data with at least the latest
+        TAIL_EVENTS events, or None if nothing is stored
+    """
+    if journal_path(data_dir, date).exists():
+        return load_day(data_dir, date)
+    try:
+        stat = os.stat(day_file_path(data_dir, date))
+        with open(tail_path(data_dir, date), 'r') as f:
+            read_bytes.inc(os.fstat(f.fileno()).st_size, format='tail')
+            tail = json.load(f)
+    except (OSError, ValueError):
+        return load_day(data_dir, date)
+
+    if tail.get('day_file') != _file_identity(stat):
+        return load_day(data_dir, date)
+    data = empty_day()
+    data.update(tail['fields'])
+    data['events'] = tail['events']
+    return data
+
+
+def write_day_tail(path: PathLike, data: Dict[str, Any]):
+    """
+    Write the tail file of a day file that was just written.
+
+    The tail records the size, mtime and inode of the day file, so a day file
+    rewritten without its tail is detected and read whole. It is not synced:
+    a lost tail only costs a full read.
+
+    Args:
+        path: Path of the day's JSON file
+        data: Data the day file holds
+    """
+    path = Path(path)
+    tail = {
+        'day_file': _file_identity(os.stat(path)),
+        'fields': {key: value for key, value in data.items()
+                   if key not in ('events', COMPACTED_JOURNAL_KEY)},
+        'events': data.get('events', [])[-TAIL_EVENTS:]
+    }
+    destination = path.with_suffix(TAIL_SUFFIX)
+    fd, tmp_path = tempfile.mkstemp(dir=path.parent, prefix=f".{destination.name}.", suffix='.tmp')
+    try:
+        with os.fdopen(fd, 'w') as f:
+            json.dump(tail, f, default=encode_value)
+        os.replace(tmp_path, destination)
+    except BaseException:
+        try:
+            os.unlink(tmp_path)
+        except OSError:
+            pass
+        raise
+
+
+def write_day_file(path: PathLike, data: Dict[str, Any], indent: Optional[int] = 2):
+    """
+    Write a day's JSON file atomically, followed by its tail file.
+
+    Args:
+        path: Path of the day's JSON file
+        data: Day data
+        indent: JSON indentation
+    """
+    write_json_atomic(path, data, indent=indent)
+    write_day_tail(path, data)
+
+
+def _file_identity(stat: os.stat_result) -> List[int]:
+    """Get the values that change whenever a file is replaced or rewritten."""
+    return [stat.st_size, stat.st_mtime_ns, stat.st_ino]
+
+
+def archive_day(data_dir: PathLike, date: str) -> bool:
+    """
+    Convert a closed day's JSON file into a columnar archive.
+
+    The archive is read back and compared with the JSON data before the JSON
+    file is removed. Days with a pending journal are left alone.
+
+    Args:
+        data_dir: Data directory
+        date: Date string in YYYY-MM-DD format
+
+    Returns:
+        bool: True if the day was archived
+    """
+    json_file = day_file_path(data_dir, date)
+    if journal_path(data_dir, date).exists():
+        return False
+    try:
+        before = os.stat(json_file)
+    except FileNotFoundError:
+        return False
+
+    data = load_day(data_dir, date)
+    archive_file = archive_path(data_dir, date)
+    write_archive(archive_file, date, data)
+    with ArchiveReader(archive_file) as reader:
+        archived = reader.load()
+    if archived != data:
+        archive_file.unlink()
+        raise ValueError(f"Archive of {date} does not match its day file")
+
+    # A late write to the day wins; the JSON file is preferred while it exists
+    after = os.stat(json_file)
+    if (after.st_mtime_ns, after.st_size) != (before.st_mtime_ns, before.st_size):
+        return False
+    json_file.unlink()
+    try:
+        tail_path(data_dir, date).unlink()
+    except FileNotFoundError:
+        pass
+    return True
+
+
+def archive_closed_days(data_dir: PathLike, today: Optional[str] = None,
+                        logger: Optional[logging.Logger] = None) -> List[str]:
+    """
+    Archive the JSON files of all days before today.
+
+    Args:
+        data_dir: Data directory
+        today: Optional date string treated as the open day
+        logger: Optional logger
+
+    Returns:
+        List[str]: Dates that were archived
+    """
+    logger = logger or logging.getLogger(__name__)
+    today = today or datetime.now().strftime('%Y-%m-%d')
+    archived = []
+    for path in sorted(Path(data_dir).glob(f"{DAY_FILE_PREFIX}*{JSON_SUFFIX}")):
+        date = date_from_path(path)
+        if not date or date >= today:
+            continue
+        try:
+            if archive_day(data_dir, date):
+                archived.append(date)
+        except Exception as e:
+            logger.error(f"Error archiving {date}: {e}")
+    if archived:
+        logger.info(f"Archived {len(archived)} closed days")
+    return archived
+
+
+def write_json_atomic(path: PathLike, data: Dict[str, Any], indent: Optional[int] = 2):
+    """
+    Write JSON data so readers never observe a partially written file.
+
+    Args:
+        path: Destination path
+        data: Data to write
+        indent: JSON indentation
+    """
+    path = Path(path)
+    fd, tmp_path = tempfile.mkstemp(dir=path.parent, prefix=f".{path.name}.", suffix='.tmp')
+    try:
+        with os.fdopen(fd, 'w') as f:
+            json.dump(data, f, indent=indent, default=encode_value)
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(tmp_path, path)
+    except BaseException:
+        try:
+            os.unlink(tmp_path)
+        except OSError:
+            pass
+        raise
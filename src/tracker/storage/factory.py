@@ -0,0 +1,70 @@
+"""
+Module for creating the configured storage backend.
+"""
+
+import logging
+from pathlib import Path
+from typing import Optional
+
+from .base import Storage
+from .day_files import PathLike
+from .file_storage import JournalStorage, JsonFileStorage
+from .journal import EventJournal
+from .sqlite_storage import DEFAULT_DB_NAME, SQLiteStorage
+from .writer import BatchedWriter
+from ..utils.config import Config
+
+BACKENDS = ('json', 'journal', 'sqlite')
+
+
+def create_storage(config: Config, data_dir: Optional[PathLike] = None,
+                   json_indent: Optional[int] = 2,
+                   logger: Optional[logging.Logger] = None) -> Storage:
+    """
+    Create the storage backend selected in the configuration.
+
+    The storage is returned unstarted; writers call start() while read-only
+    users such as the server do not need to.
+
+    Args:
+        config: Configuration object containing settings
+        data_dir: Optional data directory overriding config.data_dir
+        json_indent: JSON indentation of day files written by the json backend
+        logger: Optional logger
+
+    Returns:
+        Storage: Storage backend
+    """
+    storage = config.storage
+    backend = storage.get('backend', 'json')
+    data_dir = Path(data_dir or config.data_dir)
+
+    if backend == 'journal':
+        journal = EventJournal(
+            data_dir,
+            fsync=storage.get('fsync', 'always'),
+            fsync_interval=storage.get('fsync_interval', 1.0),
+            archive=storage.get('archive', False),
+            logger=logger
+        )
+        return JournalStorage(data_dir, journal)
+
+    if backend == 'sqlite':
+        return SQLiteStorage(storage.get('path') or data_dir / DEFAULT_DB_NAME, logger=logger)
+
+    if backend != 'json':
+        raise ValueError(f"Unknown storage backend: {backend}")
+
+    writer = config.writer
+    return JsonFileStorage(
+        data_dir,
+        BatchedWriter(
+            max_latency=writer.get('max_latency', 0.5),
+            max_batch=writer.get('max_batch', 32),
+            max_queue=writer.get('max_queue', 256),
+            logger=logger
+        ),
+        indent=json_indent,
+        archive=storage.get('archive', False),
+        logger=logger
+    )
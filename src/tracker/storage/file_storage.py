@@ -0,0 +1,171 @@
+"""
+Module implementing the per-day file storage backends.
+"""
+
+import logging
+from threading import Thread
+from typing import Any, Dict, Optional, Tuple
+
+from .base import Storage, events_written
+from .archive import ArchiveReader
+from .day_files import (
+    PathLike, archive_closed_days, day_file_path, day_signature, empty_day, load_day,
+    load_day_tail, open_archive
+)
+from .journal import EventJournal
+from .writer import BatchedWriter
+
+
+class JsonFileStorage(Storage):
+    """Storage writing whole ``screen_time_YYYY-MM-DD.json`` snapshots."""
+
+    name = 'json'
+
+    def __init__(self, data_dir: PathLike, writer: BatchedWriter, indent: Optional[int] = 2,
+                 archive: bool = False, logger: Optional[logging.Logger] = None):
+        """
+        Initialize the storage.
+
+        Args:
+            data_dir: Data directory holding the day files
+            writer: Writer used to persist snapshots
+            indent: JSON indentation of the day files
+            archive: Convert closed days into columnar archives
+            logger: Optional logger
+        """
+        self.data_dir = data_dir
+        self.writer = writer
+        self.indent = indent
+        self.archive = archive
+        self.logger = logger or logging.getLogger(__name__)
+        self._date: Optional[str] = None
+        self._data: Optional[Dict[str, Any]] = None
+
+    def start(self):
+        self.writer.start()
+        if self.archive:
+            self._archive_closed_days()
+
+    def close(self):
+        self.writer.close()
+
+    def append_event(self, date: str, event: Dict[str, Any],
+                     state: Optional[Dict[str, Any]] = None):
+        data = self._open_day(date)
+        data['events'].append(event)
+        if state:
+            data.update(state)
+        self._submit(date, data)
+        events_written.inc(backend=self.name)
+
+    def save_state(self, date: str, state: Dict[str, Any]):
+        data = self._open_day(date)
+        data.update(state)
+        self._submit(date, data)
+
+    def load_day(self, date: str) -> Optional[Dict[str, Any]]:
+        if date == self._date:
+            return self._snapshot(self._data)
+        return load_day(self.data_dir, date)
+
+    def load_tail(self, date: str) -> Optional[Dict[str, Any]]:
+        if date == self._date:
+            return self._snapshot(self._data)
+        return load_day_tail(self.data_dir, date)
+
+    def day_signature(self, date: str) -> Optional[Tuple]:
+        return day_signature(self.data_dir, date)
+
+    def open_archive(self, date: str) -> Optional[ArchiveReader]:
+        if date == self._date:
+            return None
+        return open_archive(self.data_dir, date)
+
+    def _open_day(self, date: str) -> Dict[str, Any]:
+        """
+        Get the in-memory copy of the day being written.
+
+        Args:
+            date: Date string in YYYY-MM-DD format
+
+        Returns:
+            Dict[str, Any]: Day data
+        """
+        if self._date != date:
+            # Make sure the previous day is on disk before it leaves memory
+            self.writer.flush()
+            rolled_over = self._date is not None
+            self._data = load_day(self.data_dir, date) or empty_day()
+            self._date = date
+            if rolled_over and self.archive:
+                self._archive_closed_days()
+        return self._data
+
+    def _archive_closed_days(self):
+        """Archive closed days in the background."""
+        Thread(
+            target=archive_closed_days,
+            args=(self.data_dir,),
+            kwargs={'logger': self.logger},
+            name='day-archiver',
+            daemon=True
+        ).start()
+
+    def _submit(self, date: str, data: Dict[str, Any]):
+        """Queue a snapshot of the day for writing."""
+        self.writer.submit(day_file_path(self.data_dir, date), self._snapshot(data), indent=self.indent)
+
+    @staticmethod
+    def _snapshot(data: Dict[str, Any]) -> Dict[str, Any]:
+        """
+        Copy a day so later mutations do not leak into queued writes.
+
+        Events are never modified once stored, so the list is copied shallowly.
+        """
+        snapshot = {key: dict(value) if isinstance(value, dict) else value
+                    for key, value in data.items()}
+        snapshot['events'] = list(data['events'])
+        return snapshot
+
+
+class JournalStorage(Storage):
+    """Storage appending events to ``screen_time_YYYY-MM-DD.jsonl`` journals."""
+
+    name = 'journal'
+
+    def __init__(self, data_dir: PathLike, journal: EventJournal):
+        """
+        Initialize the storage.
+
+        Args:
+            data_dir: Data directory holding the day files
+            journal: Journal receiving the records
+        """
+        self.data_dir = data_dir
+        self.journal = journal
+
+    def start(self):
+        self.journal.start()
+
+    def close(self):
+        self.journal.close()
+
+    def append_event(self, date: str, event: Dict[str, Any],
+                     state: Optional[Dict[str, Any]] = None):
+        self.journal.append(date, event=event, state=state)
+        events_written.inc(backend=self.name)
+
+    def save_state(self, date: str, state: Dict[str, Any]):
+        self.journal.append(date, state=state)
+
+    def load_day(self, date: str) -> Optional[Dict[str, Any]]:
+        return load_day(self.data_dir, date)
+
+    def load_tail(self, date: str) -> Optional[Dict[str, Any]]:
+        return load_day_tail(self.data_dir, date)
+
+    def day_signature(self, date: str) -> Optional[Tuple]:
+        return day_signature(self.data_dir, date)
+
+    def open_archive(self, date: str) -> Optional[ArchiveReader]:
+        return open_archive(self.data_dir, date)
@@ -0,0 +1,236 @@
+"""
+Module implementing the append-only JSONL event journal.
+
+Each record is one JSON line holding an ``event`` to append and/or ``state``
+fields (``total_time``, ``current_session``) that overwrite the day's values.
+Journals of closed days are compacted in the background into the regular
+``screen_time_YYYY-MM-DD.json`` files, and optionally archived afterwards.
+"""
+
+import os
+import json
+import time
+import logging
+from datetime import datetime
+from pathlib import Path
+from threading import Event, Lock, Thread, Timer
+from typing import Any, Dict, IO, List, Optional
+
+from .base import write_seconds
+from .day_files import (
+    PathLike, COMPACTED_JOURNAL_KEY, JOURNAL_SUFFIX, DAY_FILE_PREFIX, archive_closed_days,
+    date_from_path, day_file_path, encode_value, iter_journal, journal_marker, journal_path,
+    load_day, write_day_file
+)
+
+FSYNC_POLICIES = ('always', 'interval', 'never')
+
+
+class EventJournal:
+    """Append-only journal of screen time events."""
+
+    def __init__(self, data_dir: PathLike, fsync: str = 'always',
+                 fsync_interval: float = 1.0, archive: bool = False,
+                 logger: Optional[logging.Logger] = None):
+        """
+        Initialize the journal.
+
+        Args:
+            data_dir: Data directory holding the day files
+            fsync: 'always' after every record, 'interval' at most once per
+                fsync_interval seconds, or 'never' to leave it to the OS
+            fsync_interval: Seconds between fsyncs for the 'interval' policy,
+                and the longest a record stays unsynced under it
+            archive: Convert closed days into columnar archives after
+                compacting them
+            logger: Optional logger
+        """
+        if fsync not in FSYNC_POLICIES:
+            raise ValueError(f"Unknown fsync policy: {fsync}")
+
+        self.data_dir = Path(data_dir)
+        self.fsync = fsync
+        self.fsync_interval = fsync_interval
+        self.archive = archive
+        self.logger = logger or logging.getLogger(__name__)
+
+        self._lock = Lock()
+        self._file: Optional[IO[str]] = None
+        self._file_date: Optional[str] = None
+        self._last_fsync = 0.0
+        self._dirty = False
+        self._flush_timer: Optional[Timer] = None
+
+        self._compact_requested = Event()
+        self._stop_event = Event()
+        self._compactor: Optional[Thread] = None
+
+    def start(self):
+        """Start the background compactor and compact days already closed."""
+        self._stop_event.clear()
+        self._compactor = Thread(target=self._compact_loop, daemon=True)
+        self._compactor.start()
+        self._compact_requested.set()
+
+    def close(self):
+        """Flush and close the journal and stop the compactor."""
+        with self._lock:
+            if self._flush_timer is not None:
+                self._flush_timer.cancel()
+                self._flush_timer = None
+            self._close_file()
+        self._stop_event.set()
+        self._compact_requested.set()
+        if self._compactor:
+            self._compactor.join()
+            self._compactor = None
+
+    def append(self, date: str, event: Optional[Dict[str, Any]] = None,
+               state: Optional[Dict[str, Any]] = None):
+        """
+        Append one record to a day's journal.
+
+        Args:
+            date: Date string in YYYY-MM-DD format
+            event: Optional event to append to the day
+            state: Optional day fields to overwrite
+        """
+        record: Dict[str, Any] = {}
+        if event is not None:
+            record['event'] = event
+        if state is not None:
+            record['state'] = state
+        if not record:
+            return
+
+        line = json.dumps(record, default=encode_value, separators=(',', ':')) + '\n'
+        with self._lock, write_seconds.time(backend='journal'):
+            f = self._open_for(date)
+            f.write(line)
+            f.flush()
+            self._dirty = True
+            self._maybe_fsync()
+
+    def flush(self):
+        """Force journaled records to disk."""
+        with self._lock:
+            if self._file and self._dirty:
+                os.fsync(self._file.fileno())
+                self._dirty = False
+                self._last_fsync = time.monotonic()
+
+    def compact(self, date: str) -> bool:
+        """
+        Fold a day's journal into its JSON file and remove the journal.
+
+        The JSON file records which journal it absorbed, so a crash before
+        the journal is removed does not replay its events a second time.
+
+        Args:
+            date: Date string in YYYY-MM-DD format
+
+        Returns:
+            bool: True if a journal was compacted
+        """
+        journal_file = journal_path(self.data_dir, date)
+        if not journal_file.exists():
+            return False
+
+        data = load_day(self.data_dir, date)
+        records = sum(1 for _ in iter_journal(journal_file))
+        data[COMPACTED_JOURNAL_KEY] = journal_marker(journal_file, records)
+        write_day_file(day_file_path(self.data_dir, date), data)
+        journal_file.unlink()
+        self.logger.info(f"Compacted journal for {date} ({len(data['events'])} events)")
+        return True
+
+    def compact_closed_days(self, today: Optional[str] = None) -> List[str]:
+        """
+        Compact the journals of all days before today.
+
+        Args:
+            today: Optional date string treated as the open day
+
+        Returns:
+            List[str]: Dates that were compacted
+        """
+        today = today or datetime.now().strftime('%Y-%m-%d')
+        with self._lock:
+            open_date = self._file_date
+        compacted = []
+        for path in sorted(self.data_dir.glob(f"{DAY_FILE_PREFIX}*{JOURNAL_SUFFIX}")):
+            date = date_from_path(path)
+            if not date or date >= today or date == open_date:
+                continue
+            try:
+                if self.compact(date):
+                    compacted.append(date)
+            except Exception as e:
+                self.logger.error(f"Error compacting journal for {date}: {e}")
+        return compacted
+
+    def _open_for(self, date: str) -> IO[str]:
+        """
+        Get the journal file for a date, rolling over if the date changed.
+
+        Args:
+            date: Date string in YYYY-MM-DD format
+
+        Returns:
+            IO[str]: Open journal file
+        """
+        if self._file and self._file_date == date:
+            return self._file
+
+        rolled_over = self._file is not None
+        self._close_file()
+        self._file = open(journal_path(self.data_dir, date), 'a')
+        self._file_date = date
+        if rolled_over:
+            self._compact_requested.set()
+        return self._file
+
+    def _close_file(self):
+        """Close the current journal file, syncing unless fsync is disabled."""
+        if not self._file:
+            return
+        self._file.flush()
+        if self._dirty and self.fsync != 'never':
+            os.fsync(self._file.fileno())
+        self._file.close()
+        self._file = None
+        self._file_date = None
+        self._dirty = False
+
+    def _maybe_fsync(self):
+        """Sync the journal according to the fsync policy."""
+        if self.fsync == 'never':
+            return
+        now = time.monotonic()
+        if self.fsync == 'always' or now - self._last_fsync >= self.fsync_interval:
+            os.fsync(self._file.fileno())
+            self._dirty = False
+            self._last_fsync = now
+        elif self._flush_timer is None:
+            # Sync the record later even if no further append comes to do it
+            delay = self._last_fsync + self.fsync_interval - now
+            self._flush_timer = Timer(delay, self._deferred_flush)
+            self._flush_timer.daemon = True
+            self._flush_timer.start()
+
+    def _deferred_flush(self):
+        """Sync records left dirty by the 'interval' policy."""
+        with self._lock:
+            self._flush_timer = None
+        self.flush()
+
+    def _compact_loop(self):
+        """Compact closed days whenever a rollover is signalled."""
+        while not self._stop_event.is_set():
+            self._compact_requested.wait()
+            self._compact_requested.clear()
+            if self._stop_event.is_set():
+                break
+            self.compact_closed_days()
+            if self.archive:
+                archive_closed_days(self.data_dir, logger=self.logger)
@@ -0,0 +1,46 @@
+"""
+Command line tool migrating per-day JSON files into the SQLite backend or
+into columnar archives.
+"""
+
+import sys
+import argparse
+from pathlib import Path
+
+from .day_files import archive_closed_days
+from .sqlite_storage import DEFAULT_DB_NAME, SQLiteStorage, migrate_json_files
+from ..utils.config import Config
+from ..utils.logger import setup_logger
+
+
+def main(argv=None):
+    """Migrate existing day files into a SQLite database."""
+    config = Config()
+    parser = argparse.ArgumentParser(description=__doc__.strip())
+    parser.add_argument('--data-dir', default=config.data_dir,
+                        help="directory holding screen_time_YYYY-MM-DD.json files")
+    parser.add_argument('--db', default=config.storage.get('path'),
+                        help=f"database path (default: <data-dir>/{DEFAULT_DB_NAME})")
+    parser.add_argument('--archive', action='store_true',
+                        help="convert closed days into .bin archives instead of a database")
+    args = parser.parse_args(argv)
+
+    logger = setup_logger('migrate')
+    if args.archive:
+        archived = archive_closed_days(args.data_dir, logger=logger)
+        logger.info(f"Archived {len(archived)} days in {args.data_dir}")
+        return 0
+
+    db_path = args.db or Path(args.data_dir) / DEFAULT_DB_NAME
+    storage = SQLiteStorage(db_path, logger=logger)
+    try:
+        imported = migrate_json_files(args.data_dir, storage, logger=logger)
+    finally:
+        storage.close()
+
+    logger.info(f"Migrated {len(imported)} days into {db_path}")
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
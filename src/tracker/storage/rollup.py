@@ -0,0 +1,263 @@
+"""
+Module maintaining the daily rollup index.
+
+The index stores one small summary per day (total time, session count, first
+and last activity, active seconds per hour) together with the signature of
+the stored day it was computed from.  Range summaries are answered from the
+index, and a day is only re-read when its signature changes.
+"""
+
+import sys
+import json
+import argparse
+import logging
+from datetime import datetime, timedelta
+from pathlib import Path
+from threading import Lock
+from typing import Any, Dict, List, Optional, Tuple
+
+from .base import Storage, date_range
+from .day_files import PathLike, stored_dates, write_json_atomic
+from .factory import create_storage
+from ..core.day_state import SESSION_END_TYPES, SESSION_START_TYPES, DayState
+from ..utils.config import Config
+from ..utils.logger import setup_logger
+
+ROLLUP_FILE_NAME = 'rollup_index.json'
+# Version 2 leaves idle time out of the hourly buckets
+ROLLUP_VERSION = 2
+
+
+def empty_summary(date: str) -> Dict[str, Any]:
+    """
+    Create the summary of a day without events.
+
+    Args:
+        date: Date string in YYYY-MM-DD format
+
+    Returns:
+        Dict[str, Any]: Summary with zero totals
+    """
+    return {
+        'date': date,
+        'total_time': 0,
+        'session_count': 0,
+        'event_count': 0,
+        'first_activity': None,
+        'last_activity': None,
+        'hourly': [0.0] * 24
+    }
+
+
+def add_hourly(hourly: List[float], start: datetime, end: datetime):
+    """
+    Spread an active interval over hour-of-day buckets.
+
+    Args:
+        hourly: 24 buckets of active seconds to update
+        start: Interval start
+        end: Interval end
+    """
+    current = start
+    while current < end:
+        next_hour = current.replace(minute=0, second=0, microsecond=0) + timedelta(hours=1)
+        chunk_end = min(next_hour, end)
+        hourly[current.hour] += (chunk_end - current).total_seconds()
+        current = chunk_end
+
+
+def add_active_hourly(hourly: List[float], start: datetime, end: datetime,
+                      idle: List[Tuple[datetime, datetime]]):
+    """
+    Spread a session over hour-of-day buckets, leaving out its idle stretches.
+
+    Args:
+        hourly: 24 buckets of active seconds to update
+        start: Session start
+        end: Session end
+        idle: Idle stretches within the session, in time order
+    """
+    current = start
+    for idle_start, idle_end in idle:
+        add_hourly(hourly, current, idle_start)
+        current = max(current, idle_start, idle_end)
+    add_hourly(hourly, current, end)
+
+
+def summarize_day(date: str, data: Dict[str, Any]) -> Dict[str, Any]:
+    """
+    Compute the summary of one day.
+
+    Args:
+        date: Date string in YYYY-MM-DD format
+        data: Day data in the day file format
+
+    Returns:
+        Dict[str, Any]: Day summary
+    """
+    summary = empty_summary(date)
+    events = data.get('events', [])
+    state = DayState(date)
+    # Idle stretches of the open session, which DayState leaves out of its total
+    idle: List[Tuple[datetime, datetime]] = []
+
+    for event in events:
+        session_start = state.session_start
+        idle_start = state.idle_start
+        duration = state.apply(event)
+        if session_start is None or state.last_type in SESSION_START_TYPES:
+            # No session was open, or a new one replaced it
+            idle = []
+            continue
+        if idle_start is not None and state.idle_start is None:
+            idle.append((max(idle_start, session_start), state.last_time))
+        if state.last_type in SESSION_END_TYPES:
+            if duration:
+                summary['session_count'] += 1
+                add_active_hourly(summary['hourly'], session_start, state.last_time, idle)
+            idle = []
+
+    summary['total_time'] = data.get('total_time', state.total_time)
+    summary['event_count'] = state.event_count
+    if events:
+        summary['first_activity'] = events[0]['timestamp']
+        summary['last_activity'] = events[-1]['timestamp']
+    return summary
+
+
+class RollupIndex:
+    """Persisted index of per-day summaries."""
+
+    def __init__(self, path: PathLike, storage: Storage,
+                 logger: Optional[logging.Logger] = None):
+        """
+        Initialize the index, loading it from disk if it exists.
+
+        Args:
+            path: Path of the index file
+            storage: Storage the summaries are computed from
+            logger: Optional logger
+        """
+        self.path = Path(path)
+        self.storage = storage
+        self.logger = logger or logging.getLogger(__name__)
+        self._lock = Lock()
+        self._days: Dict[str, Dict[str, Any]] = self._load()
+        self._dirty = False
+
+    def summary(self, date: str) -> Dict[str, Any]:
+        """
+        Get the summary of a day, recomputing it if the day changed.
+
+        Args:
+            date: Date string in YYYY-MM-DD format
+
+        Returns:
+            Dict[str, Any]: Day summary
+        """
+        signature = self.storage.day_signature(date)
+        if signature is None:
+            return empty_summary(date)
+        # Signatures are stored as JSON, so compare them in their JSON form
+        signature = json.loads(json.dumps(signature))
+
+        with self._lock:
+            entry = self._days.get(date)
+            if entry and entry['signature'] == signature:
+                return entry['summary']
+
+        data = self.storage.load_day(date)
+        summary = summarize_day(date, data) if data else empty_summary(date)
+        with self._lock:
+            self._days[date] = {'signature': signature, 'summary': summary}
+            self._dirty = True
+        return summary
+
+    def summarize_range(self, start_date: str, days: int) -> List[Dict[str, Any]]:
+        """
+        Get the summaries of consecutive days.
+
+        Args:
+            start_date: First date in YYYY-MM-DD format
+            days: Number of days
+
+        Returns:
+            List[Dict[str, Any]]: Summaries in date order
+        """
+        summaries = [self.summary(date) for date in date_range(start_date, days)]
+        self.save()
+        return summaries
+
+    def rebuild(self, dates: List[str]) -> int:
+        """
+        Recompute the summaries of the given days from scratch.
+
+        Args:
+            dates: Date strings to summarize
+
+        Returns:
+            int: Number of days summarized
+        """
+        with self._lock:
+            for date in dates:
+                self._days.pop(date, None)
+        for date in dates:
+            self.summary(date)
+        self.save()
+        return len(dates)
+
+    def save(self):
+        """Write the index to disk if it changed."""
+        with self._lock:
+            if not self._dirty:
+                return
+            snapshot = {'version': ROLLUP_VERSION, 'days': dict(self._days)}
+            self._dirty = False
+        try:
+            write_json_atomic(self.path, snapshot, indent=None)
+        except Exception as e:
+            self.logger.error(f"Error saving rollup index: {e}")
+
+    def _load(self) -> Dict[str, Dict[str, Any]]:
+        """Read the index file, starting over if it is missing or outdated."""
+        try:
+            with open(self.path, 'r') as f:
+                index = json.load(f)
+            if index.get('version') == ROLLUP_VERSION:
+                return index.get('days', {})
+        except FileNotFoundError:
+            pass
+        except ValueError as e:
+            self.logger.warning(f"Ignoring unreadable rollup index {self.path}: {e}")
+        return {}
+
+
+def main(argv=None):
+    """Rebuild the rollup index from the stored days."""
+    config = Config()
+    parser = argparse.ArgumentParser(description="Rebuild the daily rollup index.")
+    parser.add_argument('--start', help="first date to rebuild (YYYY-MM-DD)")
+    parser.add_argument('--days', type=int, help="number of days to rebuild from --start")
+    args = parser.parse_args(argv)
+
+    logger = setup_logger('rollup')
+    storage = create_storage(config, logger=logger)
+    index = RollupIndex(Path(config.data_dir) / ROLLUP_FILE_NAME, storage, logger=logger)
+
+    if args.start:
+        dates = date_range(args.start, args.days or 1)
+    else:
+        dates = stored_dates(config.data_dir)
+        if not dates and storage.indexed_lookups:
+            # Day files are absent with the database backend, so walk the last year
+            today = datetime.now()
+            dates = date_range((today - timedelta(days=365)).strftime('%Y-%m-%d'), 366)
+
+    count = index.rebuild(dates)
+    storage.close()
+    logger.info(f"Rebuilt rollup index for {count} days at {index.path}")
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,437 @@
+"""
+Module reconstructing screen time sessions across days.
+
+A session runs from a STARTUP/UNLOCK event to the next LOCK/SHUTDOWN/LOGOUT,
+possibly on a later day. Each stored day is paired into sessions once per
+version of the day and cached; the pairings of consecutive days are then
+stitched into one sorted list of non-overlapping intervals, which is
+cached per span of days and searched by bisection.
+
+A session that sees a new start event before any end event lost its end
+event, e.g. because the machine crashed. It is closed at the last event seen
+before the new start and marked incomplete.
+
+Like the day totals, sessions leave out their idle stretches, which run from
+an IDLE event to the next ACTIVE event or the end of the session.
+"""
+
+import logging
+from bisect import bisect_left, bisect_right
+from collections import OrderedDict
+from datetime import datetime, timedelta
+from threading import Lock
+from typing import Any, Dict, Iterable, List, NamedTuple, Optional, Tuple
+
+from .base import Storage, date_range
+from ..core.day_state import SESSION_END_TYPES, SESSION_START_TYPES
+from ..events.event_types import EventType
+
+# Stitched spans of days kept before the least recently used ones are evicted
+DEFAULT_MAX_SPANS = 32
+
+# Idle stretch of a session, from its IDLE event to the next ACTIVE event
+IdleStretch = Tuple[datetime, datetime]
+
+
+class Session(NamedTuple):
+    """One session of screen use."""
+
+    start: datetime
+    # None while the session is still open
+    end: Optional[datetime]
+    start_type: EventType
+    # None when the session is open or its end event is missing
+    end_type: Optional[EventType] = None
+    # Idle stretches that ended within the session, in time order
+    idle: Tuple[IdleStretch, ...] = ()
+    # Start of an idle stretch still running at the end of the session
+    idle_since: Optional[datetime] = None
+
+    @property
+    def complete(self) -> bool:
+        """Check whether the session was ended by an end event."""
+        return self.end_type is not None
+
+    def went_idle(self, when: datetime) -> 'Session':
+        """Start an idle stretch unless one is running."""
+        if self.idle_since is not None:
+            return self
+        return self._replace(idle_since=when)
+
+    def became_active(self, when: datetime) -> 'Session':
+        """End the running idle stretch, if any."""
+        if self.idle_since is None:
+            return self
+        return self._replace(idle=self.idle + ((self.idle_since, when),), idle_since=None)
+
+    def idle_stretches(self, end: Optional[datetime] = None) -> List[IdleStretch]:
+        """
+        Get the idle stretches of the session.
+
+        Args:
+            end: End of a running idle stretch, by default the session end
+
+        Returns:
+            List[IdleStretch]: Idle stretches in time order
+        """
+        stretches = list(self.idle)
+        if self.idle_since is not None:
+            end = end or self.end or datetime.now()
+            stretches.append((self.idle_since, max(self.idle_since, end)))
+        return stretches
+
+    def covers(self, when: datetime) -> bool:
+        """
+        Check whether the session was running at a time.
+
+        Args:
+            when: Local time
+
+        Returns:
+            bool: True if start <= when < end, open sessions run until now
+        """
+        end = self.end if self.end is not None else datetime.now()
+        return self.start <= when < end
+
+    def to_dict(self) -> Dict[str, Any]:
+        """
+        Convert the session to its API form.
+
+        Returns:
+            Dict[str, Any]: Start and end as ISO timestamps, the event types,
+            the duration and the idle time within it in seconds (duration is
+            None while open) and whether the session is complete or still active
+        """
+        idle_time = sum((end - start).total_seconds() for start, end in self.idle_stretches())
+        return {
+            'start': self.start.isoformat(),
+            'end': self.end.isoformat() if self.end is not None else None,
+            'start_type': self.start_type.name,
+            'end_type': self.end_type.name if self.end_type is not None else None,
+            'duration': (self.end - self.start).total_seconds() if self.end is not None else None,
+            'idle_time': idle_time,
+            'complete': self.complete,
+            'active': self.end is None
+        }
+
+
+class DaySessions(NamedTuple):
+    """Sessions of one day, with what is needed to join it to its neighbours."""
+
+    # Sessions started on the day and ended by a later event of the day
+    sessions: List[Session]
+    # First session event of the day if it is an end event; it ends the
+    # session carried over from the day before
+    lead_end: Optional[Tuple[datetime, EventType]]
+    # Last event before the first session event of the day
+    lead_seen: Optional[datetime]
+    # Whether the day has any session event
+    has_session_events: bool
+    # Session still open at the end of the day, ending at the last event
+    open_session: Optional[Session]
+    # IDLE and ACTIVE events before the first session event of the day; they
+    # belong to the session carried over from the day before
+    lead_idle: Tuple[Tuple[datetime, EventType], ...] = ()
+
+
+def pair_day(events: Iterable[Dict[str, Any]]) -> DaySessions:
+    """
+    Pair the events of one day into sessions.
+
+    Args:
+        events: Events in the day file format
+
+    Returns:
+        DaySessions: Sessions of the day
+    """
+    parsed = []
+    for event in events:
+        try:
+            event_type = EventType.parse(event['type'])
+        except KeyError:
+            # Unknown types still show the machine was in use
+            event_type = None
+        parsed.append((datetime.fromisoformat(event['timestamp']), event_type))
+    # Stable, so events with equal timestamps keep their stored order
+    parsed.sort(key=lambda item: item[0])
+
+    sessions: List[Session] = []
+    lead_end = None
+    lead_seen = None
+    lead_idle = []
+    has_session_events = False
+    current: Optional[Session] = None
+    for timestamp, event_type in parsed:
+        if event_type in SESSION_START_TYPES:
+            if current is not None and current.end > current.start:
+                sessions.append(current)
+            has_session_events = True
+            current = Session(timestamp, timestamp, event_type)
+        elif event_type in SESSION_END_TYPES:
+            if not has_session_events:
+                lead_end = (timestamp, event_type)
+            elif current is not None:
+                sessions.append(end_session(current, timestamp, event_type))
+            has_session_events = True
+            current = None
+        elif not has_session_events:
+            lead_seen = timestamp
+            if event_type in (EventType.IDLE, EventType.ACTIVE):
+                lead_idle.append((timestamp, event_type))
+        elif current is not None:
+            current = track_idle(current._replace(end=timestamp), timestamp, event_type)
+
+    return DaySessions(sessions, lead_end, lead_seen, has_session_events, current,
+                       tuple(lead_idle))
+
+
+def track_idle(session: Session, timestamp: datetime,
+               event_type: Optional[EventType]) -> Session:
+    """
+    Start or end an idle stretch of a session on an IDLE or ACTIVE event.
+
+    Args:
+        session: Open session
+        timestamp: Time of the event
+        event_type: Type of the event, None for unknown types
+
+    Returns:
+        Session: The session with its idle stretches updated
+    """
+    if event_type == EventType.IDLE:
+        return session.went_idle(timestamp)
+    if event_type == EventType.ACTIVE:
+        return session.became_active(timestamp)
+    return session
+
+
+def end_session(session: Session, end: datetime, end_type: EventType) -> Session:
+    """End a session at an end event, closing its running idle stretch."""
+    return session.became_active(end)._replace(end=end, end_type=end_type)
+
+
+def stitch(days: Iterable[Optional[DaySessions]],
+           carry: Optional[Session] = None) -> Tuple[List[Session], Optional[Session]]:
+    """
+    Join the sessions of consecutive days.
+
+    Args:
+        days: Sessions of consecutive days, None for days without events
+        carry: Session still open before the first day, ending at the last
+            event seen
+
+    Returns:
+        Tuple[List[Session], Optional[Session]]: Sessions in time order and
+        the session still open after the last day
+    """
+    sessions: List[Session] = []
+    for day in days:
+        if day is None:
+            continue
+        if carry is not None:
+            for timestamp, event_type in day.lead_idle:
+                carry = track_idle(carry, timestamp, event_type)
+            if day.lead_end is not None:
+                end, end_type = day.lead_end
+                sessions.append(end_session(carry, end, end_type))
+                carry = None
+            else:
+                if day.lead_seen is not None:
+                    carry = carry._replace(end=max(carry.end, day.lead_seen))
+                if day.has_session_events:
+                    # A new session started without the carried one ending
+                    if carry.end > carry.start:
+                        sessions.append(carry)
+                    carry = None
+        sessions.extend(day.sessions)
+        if day.open_session is not None:
+            carry = day.open_session
+    return sessions, carry
+
+
+class StitchedSpan(NamedTuple):
+    """Sessions of a span of days with their bounds, ready for bisection."""
+
+    sessions: List[Session]
+    starts: List[datetime]
+    # Sessions do not overlap, so their ends are sorted like their starts;
+    # open sessions end at datetime.max
+    ends: List[datetime]
+
+
+class SessionIndex:
+    """Per-day cache of paired sessions answering range and point queries."""
+
+    def __init__(self, storage: Storage, lookback_days: int = 7,
+                 max_spans: int = DEFAULT_MAX_SPANS, logger: Optional[logging.Logger] = None):
+        """
+        Initialize the index.
+
+        Args:
+            storage: Storage the days are read from
+            lookback_days: Days searched before and after a queried range for
+                the start or end of sessions crossing its bounds
+            max_spans: Stitched spans of days kept for repeated queries
+            logger: Optional logger
+        """
+        self.storage = storage
+        self.lookback_days = lookback_days
+        self.max_spans = max_spans
+        self.logger = logger or logging.getLogger(__name__)
+        self._lock = Lock()
+        self._days: Dict[str, Tuple[Tuple, DaySessions]] = {}
+        self._spans: 'OrderedDict[Tuple[str, int], Tuple[Tuple, StitchedSpan]]' = OrderedDict()
+
+    def day(self, date: str) -> Optional[DaySessions]:
+        """
+        Get the sessions of a day, pairing it again only if it changed.
+
+        Args:
+            date: Date string in YYYY-MM-DD format
+
+        Returns:
+            Optional[DaySessions]: Sessions of the day, None if nothing is stored
+        """
+        signature = self.storage.day_signature(date)
+        if signature is None:
+            with self._lock:
+                self._days.pop(date, None)
+            return None
+
+        with self._lock:
+            entry = self._days.get(date)
+            if entry is not None and entry[0] == signature:
+                return entry[1]
+
+        data = self.storage.load_day(date)
+        if data is None:
+            return None
+        try:
+            day = pair_day(data.get('events', []))
+        except (KeyError, ValueError) as e:
+            self.logger.error(f"Error pairing sessions of {date}: {e}")
+            return None
+        with self._lock:
+            self._days[date] = (signature, day)
+        return day
+
+    def sessions(self, start_date: str, days: int) -> List[Session]:
+        """
+        Get the sessions overlapping consecutive days.
+
+        Sessions crossing the bounds of the range are returned whole.
+
+        Args:
+            start_date: First date in YYYY-MM-DD format
+            days: Number of days
+
+        Returns:
+            List[Session]: Sessions in time order
+        """
+        start = datetime.strptime(start_date, '%Y-%m-%d')
+        end = start + timedelta(days=days)
+        span = self._span(start, days)
+        return span.sessions[bisect_right(span.ends, start):bisect_left(span.starts, end)]
+
+    def active_at(self, when: datetime) -> Optional[Session]:
+        """
+        Find the session running at a time.
+
+        Args:
+            when: Local time
+
+        Returns:
+            Optional[Session]: Session covering the time, None if the screen
+            was not in use
+        """
+        span = self._span(datetime.combine(when.date(), datetime.min.time()), 1)
+        position = bisect_right(span.starts, when) - 1
+        if position >= 0 and span.sessions[position].covers(when):
+            return span.sessions[position]
+        return None
+
+    def _span(self, start: datetime, days: int) -> StitchedSpan:
+        """
+        Get the stitched sessions around consecutive days.
+
+        The span reaches lookback_days before and after the days. It is
+        stitched again only if one of its days changed.
+
+        Args:
+            start: Midnight of the first day
+            days: Number of days
+
+        Returns:
+            StitchedSpan: Sessions of the span in time order
+        """
+        end = start + timedelta(days=days)
+        today = datetime.now().strftime('%Y-%m-%d')
+        scan_start = (start - timedelta(days=self.lookback_days)).strftime('%Y-%m-%d')
+        dates = date_range(scan_start, self.lookback_days + days)
+        following = date_range(end.strftime('%Y-%m-%d'), self.lookback_days)
+
+        # Whether a span reaches today decides if its last session is open
+        key = (scan_start, len(dates))
+        signature = (today,) + tuple(self.storage.day_signature(date)
+                                     for date in dates + following)
+        with self._lock:
+            entry = self._spans.get(key)
+            if entry is not None and entry[0] == signature:
+                self._spans.move_to_end(key)
+                return entry[1]
+
+        sessions, carry = stitch(self.day(date) for date in dates)
+
+        # Follow a session left open at the end of the range to its end
+        last_date = dates[-1] if dates else scan_start
+        for date in following:
+            if carry is None or last_date >= today:
+                break
+            last_date = date
+            more, carry = stitch([self.day(date)], carry)
+            sessions.extend(more)
+
+        if carry is not None:
+            if last_date >= today:
+                sessions.append(carry._replace(end=None))
+            elif carry.end > carry.start:
+                sessions.append(carry)
+
+        span = StitchedSpan(
+            sessions,
+            [session.start for session in sessions],
+            [session.end if session.end is not None else datetime.max for session in sessions]
+        )
+        with self._lock:
+            self._spans[key] = (signature, span)
+            self._spans.move_to_end(key)
+            while len(self._spans) > self.max_spans:
+                self._spans.popitem(last=False)
+        return span
+
+
+def total_time(sessions: Iterable[Session], start: datetime, end: datetime) -> float:
+    """
+    Sum the time sessions were in use within a window.
+
+    Idle stretches are left out, like in the day totals.
+
+    Args:
+        sessions: Sessions to count
+        start: Window start
+        end: Window end; open sessions are counted until now
+
+    Returns:
+        float: Seconds of use within the window
+    """
+    def overlap(first: datetime, last: datetime) -> float:
+        return max((min(last, end) - max(first, start)).total_seconds(), 0.0)
+
+    now = datetime.now()
+    total = 0.0
+    for session in sessions:
+        session_end = session.end if session.end is not None else now
+        total += overlap(session.start, session_end)
+        for idle_start, idle_end in session.idle_stretches(session_end):
+            total -= overlap(max(idle_start, session.start), min(idle_end, session_end))
+    return total
@@ -0,0 +1,260 @@
+"""
+Module implementing the SQLite storage backend.
+
+Events live in one table indexed on ``(timestamp)`` and ``(type, timestamp)``
+so range and "last event of type" lookups are index scans.  Day level fields
+(``total_time``, ``current_session``) live in a small ``days`` table.  The
+database runs in WAL mode so the server can read while the tracker writes.
+"""
+
+import json
+import sqlite3
+import logging
+import threading
+from enum import Enum
+from datetime import datetime, timedelta
+from pathlib import Path
+from typing import Any, Dict, Iterable, List, Optional, Tuple
+
+from .base import Storage, date_range, events_written, write_seconds
+from .day_files import PathLike, empty_day, encode_value, load_day, stored_dates
+from ..events.event_types import EventType
+
+DEFAULT_DB_NAME = 'screen_time.db'
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS events (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    timestamp TEXT NOT NULL,
+    type TEXT NOT NULL,
+    extra TEXT
+);
+CREATE INDEX IF NOT EXISTS idx_events_timestamp ON events (timestamp);
+CREATE INDEX IF NOT EXISTS idx_events_type_timestamp ON events (type, timestamp);
+CREATE TABLE IF NOT EXISTS days (
+    date TEXT PRIMARY KEY,
+    total_time REAL NOT NULL DEFAULT 0,
+    state TEXT
+);
+"""
+
+
+class SQLiteStorage(Storage):
+    """Storage keeping all events in a single SQLite database."""
+
+    name = 'sqlite'
+    indexed_lookups = True
+
+    def __init__(self, db_path: PathLike, logger: Optional[logging.Logger] = None):
+        """
+        Initialize the storage and create the schema if needed.
+
+        Args:
+            db_path: Path of the database file
+            logger: Optional logger
+        """
+        self.db_path = Path(db_path)
+        self.db_path.parent.mkdir(parents=True, exist_ok=True)
+        self.logger = logger or logging.getLogger(__name__)
+        self._local = threading.local()
+        self._connect().executescript(SCHEMA)
+
+    def close(self):
+        conn = getattr(self._local, 'conn', None)
+        if conn is not None:
+            conn.close()
+            self._local.conn = None
+
+    def append_event(self, date: str, event: Dict[str, Any],
+                     state: Optional[Dict[str, Any]] = None):
+        conn = self._connect()
+        with write_seconds.time(backend=self.name), conn:
+            self._insert_events(conn, [event])
+            if state:
+                self._update_day(conn, date, state)
+        events_written.inc(backend=self.name)
+
+    def save_state(self, date: str, state: Dict[str, Any]):
+        conn = self._connect()
+        with conn:
+            self._update_day(conn, date, state)
+
+    def load_day(self, date: str) -> Optional[Dict[str, Any]]:
+        return self.load_range(date, 1)[0][1]
+
+    def day_signature(self, date: str) -> Optional[Tuple]:
+        end_date = (datetime.strptime(date, '%Y-%m-%d') + timedelta(days=1)).strftime('%Y-%m-%d')
+        conn = self._connect()
+        count, max_id = conn.execute(
+            "SELECT COUNT(*), MAX(id) FROM events WHERE timestamp >= ? AND timestamp < ?",
+            (date, end_date)
+        ).fetchone()
+        day = conn.execute("SELECT total_time, state FROM days WHERE date = ?", (date,)).fetchone()
+        if not count and day is None:
+            return None
+        return (count, max_id) + (tuple(day) if day else ())
+
+    def load_range(self, start_date: str, days: int) -> List[Tuple[str, Optional[Dict[str, Any]]]]:
+        dates = date_range(start_date, days)
+        if not dates:
+            return []
+        end_date = (datetime.strptime(dates[-1], '%Y-%m-%d') + timedelta(days=1)).strftime('%Y-%m-%d')
+        conn = self._connect()
+
+        result: Dict[str, Dict[str, Any]] = {}
+        rows = conn.execute(
+            "SELECT date, total_time, state FROM days WHERE date >= ? AND date < ?",
+            (dates[0], end_date)
+        )
+        for date, total_time, state in rows:
+            data = result.setdefault(date, empty_day())
+            data.update(json.loads(state) if state else {})
+            data['total_time'] = total_time
+
+        rows = conn.execute(
+            "SELECT timestamp, type, extra FROM events "
+            "WHERE timestamp >= ? AND timestamp < ? ORDER BY timestamp, id",
+            (dates[0], end_date)
+        )
+        for row in rows:
+            event = self._row_to_event(row)
+            result.setdefault(event['timestamp'][:10], empty_day())['events'].append(event)
+
+        return [(date, result.get(date)) for date in dates]
+
+    def last_event(self, types: Optional[Iterable[str]] = None,
+                   max_days: int = 7) -> Optional[Dict[str, Any]]:
+        since = (datetime.now() - timedelta(days=max_days - 1)).strftime('%Y-%m-%d')
+        conn = self._connect()
+        if types:
+            # Both trackers' spellings are stored; one index probe per spelling
+            names = {name for event_type in types
+                     for name in EventType.parse(event_type).stored_names}
+            rows = [
+                conn.execute(
+                    "SELECT timestamp, type, extra FROM events "
+                    "WHERE type = ? AND timestamp >= ? ORDER BY timestamp DESC, id DESC LIMIT 1",
+                    (name, since)
+                ).fetchone()
+                for name in names
+            ]
+            rows = [row for row in rows if row]
+            row = max(rows, key=lambda r: r[0]) if rows else None
+        else:
+            row = conn.execute(
+                "SELECT timestamp, type, extra FROM events "
+                "WHERE timestamp >= ? ORDER BY timestamp DESC, id DESC LIMIT 1",
+                (since,)
+            ).fetchone()
+        return self._row_to_event(row) if row else None
+
+    def has_day(self, date: str) -> bool:
+        """
+        Check whether day fields are stored for a date.
+
+        Args:
+            date: Date string in YYYY-MM-DD format
+
+        Returns:
+            bool: True if the date has a row in the days table
+        """
+        row = self._connect().execute("SELECT 1 FROM days WHERE date = ?", (date,)).fetchone()
+        return row is not None
+
+    def import_day(self, date: str, data: Dict[str, Any]):
+        """
+        Insert a complete day in one transaction.
+
+        Args:
+            date: Date string in YYYY-MM-DD format
+            data: Day data in the day file format
+        """
+        state = {key: value for key, value in data.items() if key != 'events'}
+        conn = self._connect()
+        with conn:
+            self._insert_events(conn, data.get('events', []))
+            self._update_day(conn, date, state)
+
+    def _connect(self) -> sqlite3.Connection:
+        """Get the connection of the calling thread."""
+        conn = getattr(self._local, 'conn', None)
+        if conn is None:
+            conn = sqlite3.connect(str(self.db_path), timeout=10)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            self._local.conn = conn
+        return conn
+
+    @staticmethod
+    def _insert_events(conn: sqlite3.Connection, events: Iterable[Dict[str, Any]]):
+        """Insert events, keeping keys other than type and timestamp as JSON."""
+        rows = []
+        for event in events:
+            event_type = event['type']
+            if isinstance(event_type, Enum):
+                event_type = event_type.name
+            extra = {key: value for key, value in event.items() if key not in ('type', 'timestamp')}
+            rows.append((
+                event['timestamp'],
+                str(event_type),
+                json.dumps(extra, default=encode_value) if extra else None
+            ))
+        conn.executemany("INSERT INTO events (timestamp, type, extra) VALUES (?, ?, ?)", rows)
+
+    @staticmethod
+    def _update_day(conn: sqlite3.Connection, date: str, state: Dict[str, Any]):
+        """Merge day fields into the days table."""
+        row = conn.execute("SELECT total_time, state FROM days WHERE date = ?", (date,)).fetchone()
+        total_time = row[0] if row else 0
+        fields = json.loads(row[1]) if row and row[1] else {}
+        for key, value in state.items():
+            if key == 'total_time':
+                total_time = value
+            else:
+                fields[key] = value
+        conn.execute(
+            "INSERT OR REPLACE INTO days (date, total_time, state) VALUES (?, ?, ?)",
+            (date, total_time, json.dumps(fields, default=encode_value) if fields else None)
+        )
+
+    @staticmethod
+    def _row_to_event(row: Tuple[str, str, Optional[str]]) -> Dict[str, Any]:
+        """Convert an events row back to the day file event format."""
+        timestamp, event_type, extra = row
+        event = {'type': event_type, 'timestamp': timestamp}
+        if extra:
+            event.update(json.loads(extra))
+        return event
+
+
+def migrate_json_files(data_dir: PathLike, storage: SQLiteStorage,
+                       logger: Optional[logging.Logger] = None) -> List[str]:
+    """
+    Import existing day files and journals into a SQLite database.
+
+    Days that already have a row in the database are skipped, so running the
+    migration twice does not duplicate events.
+
+    Args:
+        data_dir: Data directory holding the day files
+        storage: Destination storage
+        logger: Optional logger
+
+    Returns:
+        List[str]: Dates that were imported
+    """
+    logger = logger or logging.getLogger(__name__)
+    imported = []
+    for date in stored_dates(data_dir):
+        if storage.has_day(date):
+            logger.info(f"Skipping {date}, already migrated")
+            continue
+        try:
+            data = load_day(data_dir, date)
+        except ValueError as e:
+            logger.error(f"Skipping unreadable day {date}: {e}")
+            continue
+        storage.import_day(date, data)
+        imported.append(date)
+        logger.info(f"Migrated {date} ({len(data.get('events', []))} events)")
+    return imported
@@ -0,0 +1,202 @@
+"""
+Module for watching today's stored data and fanning changes out to listeners.
+
+One thread polls the storage signature of the current day, which is a couple
+of ``stat`` calls for the file backends and one indexed query for SQLite.
+When it changes, only the events that were appended since the last check are
+applied to a running DayState, and every subscriber receives the new events
+and any change of the session state.
+"""
+
+import logging
+from datetime import datetime
+from queue import Empty, Full, Queue
+from threading import Event, Lock, Thread
+from typing import Any, Dict, List, Optional, Tuple
+
+from .base import Storage
+from ..core.day_state import DayState
+
+Message = Tuple[str, Dict[str, Any]]
+
+
+class Subscription:
+    """Queue of messages for one listener."""
+
+    def __init__(self, max_pending: int):
+        """
+        Initialize the subscription.
+
+        Args:
+            max_pending: Messages kept for a slow listener before it is dropped
+        """
+        self.closed = False
+        self._queue: 'Queue[Message]' = Queue(maxsize=max_pending)
+
+    def get(self, timeout: Optional[float] = None) -> Optional[Message]:
+        """
+        Wait for the next message.
+
+        Args:
+            timeout: Seconds to wait
+
+        Returns:
+            Optional[Message]: (kind, data) or None if the timeout expired
+        """
+        try:
+            return self._queue.get(timeout=timeout)
+        except Empty:
+            return None
+
+    def put(self, message: Message) -> bool:
+        """Queue a message, returning False if the listener fell behind."""
+        try:
+            self._queue.put_nowait(message)
+            return True
+        except Full:
+            return False
+
+
+class DayWatcher:
+    """Shared watcher pushing today's new events and session changes."""
+
+    def __init__(self, storage: Storage, interval: float = 1.0, max_pending: int = 256,
+                 logger: Optional[logging.Logger] = None):
+        """
+        Initialize the watcher. The thread runs only while there are subscribers.
+
+        Args:
+            storage: Storage to watch
+            interval: Seconds between signature checks
+            max_pending: Messages queued per subscriber
+            logger: Optional logger
+        """
+        self.storage = storage
+        self.interval = interval
+        self.max_pending = max_pending
+        self.logger = logger or logging.getLogger(__name__)
+        self._lock = Lock()
+        self._subscribers: List[Subscription] = []
+        self._thread: Optional[Thread] = None
+        self._stop_event = Event()
+        self._date: Optional[str] = None
+        self._signature = None
+        self._state: Optional[DayState] = None
+
+    def subscribe(self) -> Subscription:
+        """
+        Register a listener. Its first message is the current session state.
+
+        Returns:
+            Subscription: Queue of messages for the listener
+        """
+        subscription = Subscription(self.max_pending)
+        with self._lock:
+            # Existing listeners must not miss what this check picks up
+            for message in self._refresh():
+                self._publish(message)
+            subscription.put(('session', self._session_message()))
+            self._subscribers.append(subscription)
+            if self._thread is None:
+                # Each thread gets its own stop event so a thread that is
+                # still winding down cannot be revived
+                self._stop_event = Event()
+                self._thread = Thread(target=self._run, args=(self._stop_event,),
+                                      name='day-watcher', daemon=True)
+                self._thread.start()
+        return subscription
+
+    def unsubscribe(self, subscription: Subscription):
+        """
+        Remove a listener, stopping the thread after the last one leaves.
+
+        Args:
+            subscription: Subscription returned by subscribe()
+        """
+        with self._lock:
+            subscription.closed = True
+            if subscription in self._subscribers:
+                self._subscribers.remove(subscription)
+            if not self._subscribers and self._thread is not None:
+                self._stop_event.set()
+                self._thread = None
+
+    @property
+    def subscriber_count(self) -> int:
+        """Number of registered listeners."""
+        with self._lock:
+            return len(self._subscribers)
+
+    def _run(self, stop_event: Event):
+        """Check the storage every interval until the last listener leaves."""
+        while not stop_event.wait(self.interval):
+            try:
+                with self._lock:
+                    if stop_event.is_set():
+                        break
+                    for message in self._refresh():
+                        self._publish(message)
+            except Exception as e:
+                self.logger.error(f"Error watching day data: {e}")
+
+    def _refresh(self) -> List[Message]:
+        """
+        Bring the running state up to date with storage.
+
+        Must be called with the lock held.
+
+        Returns:
+            List[Message]: Messages describing what changed
+        """
+        date = datetime.now().strftime('%Y-%m-%d')
+        signature = self.storage.day_signature(date)
+        if date == self._date and signature == self._signature:
+            return []
+
+        messages = []
+        data = self.storage.load_day(date) if signature is not None else None
+        events = data.get('events', []) if data else []
+        was_active = self._state.session_active if self._state else None
+        previous_start = self._state.session_start if self._state else None
+
+        if date != self._date or self._state is None or len(events) < self._state.event_count:
+            # New day or rewritten file: start over from the stored events
+            if self._date is not None:
+                messages.append(('reset', {'date': date}))
+            self._state = DayState.from_events(date, events)
+        else:
+            for event in events[self._state.event_count:]:
+                self._state.apply(event)
+                messages.append(('event', dict(event, date=date)))
+
+        self._date = date
+        self._signature = signature
+        if (self._state.session_active != was_active or
+                self._state.session_start != previous_start):
+            messages.append(('session', self._session_message()))
+        return messages
+
+    def _session_message(self) -> Dict[str, Any]:
+        """Describe the current session state."""
+        start = self._state.session_start
+        return {
+            'date': self._date,
+            'is_active': start is not None,
+            'start_time': start.isoformat() if start else None,
+            'total_time': self._state.total_time
+        }
+
+    def _publish(self, message: Message):
+        """
+        Send a message to every subscriber, dropping those that fell behind.
+
+        Must be called with the lock held.
+        """
+        for subscription in list(self._subscribers):
+            if not subscription.put(message):
+                self.logger.warning("Dropping a live update subscriber that stopped reading")
+                subscription.closed = True
+                self._subscribers.remove(subscription)
+        if not self._subscribers and self._thread is not None:
+            self._stop_event.set()
+            self._thread = None
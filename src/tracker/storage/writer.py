@@ -0,0 +1,135 @@
+"""
+Module implementing the batched day file writer.
+
+Trackers hand complete day snapshots to the writer thread, which waits up to
+``max_latency`` seconds (or until ``max_batch`` snapshots arrived) and then
+writes only the newest snapshot of each file with an atomic rename.
+"""
+
+import time
+import logging
+from pathlib import Path
+from queue import Empty, Queue
+from threading import Event, Thread
+from typing import Any, Dict, Optional, Tuple
+
+from .base import write_seconds
+from .day_files import PathLike, write_day_file
+
+_STOP = object()
+
+
+class BatchedWriter:
+    """Background writer that coalesces day file snapshots."""
+
+    def __init__(self, max_latency: float = 0.5, max_batch: int = 32,
+                 max_queue: int = 256, logger: Optional[logging.Logger] = None):
+        """
+        Initialize the writer.
+
+        Args:
+            max_latency: Longest time in seconds a snapshot waits before it
+                is written
+            max_batch: Number of snapshots that triggers an early write
+            max_queue: Queue capacity; submit() blocks when it is full
+            logger: Optional logger
+        """
+        self.max_latency = max_latency
+        self.max_batch = max_batch
+        self.logger = logger or logging.getLogger(__name__)
+        self.queue: Queue = Queue(maxsize=max_queue)
+        self.writes = 0
+        self.submitted = 0
+        self._thread: Optional[Thread] = None
+
+    def start(self):
+        """Start the writer thread."""
+        self._thread = Thread(target=self._run, daemon=True)
+        self._thread.start()
+
+    def submit(self, path: PathLike, data: Dict[str, Any], indent: Optional[int] = 2):
+        """
+        Queue a snapshot of a day file.
+
+        The snapshot must not be mutated after it is submitted.
+
+        Args:
+            path: Destination path
+            data: Complete content of the file
+            indent: JSON indentation
+        """
+        self.submitted += 1
+        self.queue.put((Path(path), data, indent))
+
+    def flush(self, timeout: Optional[float] = None) -> bool:
+        """
+        Write all queued snapshots now.
+
+        Args:
+            timeout: Optional seconds to wait for the write
+
+        Returns:
+            bool: True if the queued snapshots were written
+        """
+        if not self._thread:
+            return True
+        done = Event()
+        self.queue.put(done)
+        return done.wait(timeout)
+
+    def close(self):
+        """Write all queued snapshots and stop the writer thread."""
+        if not self._thread:
+            return
+        self.queue.put(_STOP)
+        self._thread.join()
+        self._thread = None
+
+    def _run(self):
+        """Collect snapshots into batches and write them."""
+        while True:
+            pending: Dict[Path, Tuple[Dict[str, Any], Optional[int]]] = {}
+            waiters = []
+            stop = False
+
+            item = self.queue.get()
+            deadline = time.monotonic() + self.max_latency
+            count = 0
+            while True:
+                if item is _STOP:
+                    stop = True
+                    break
+                if isinstance(item, Event):
+                    waiters.append(item)
+                    break
+                path, data, indent = item
+                pending[path] = (data, indent)
+                count += 1
+                remaining = deadline - time.monotonic()
+                if count >= self.max_batch or remaining <= 0:
+                    break
+                try:
+                    item = self.queue.get(timeout=remaining)
+                except Empty:
+                    break
+
+            self._write_batch(pending)
+            for waiter in waiters:
+                waiter.set()
+            if stop:
+                return
+
+    def _write_batch(self, pending: Dict[Path, Tuple[Dict[str, Any], Optional[int]]]):
+        """
+        Write the newest snapshot of each file.
+
+        Args:
+            pending: Snapshots keyed by destination path
+        """
+        for path, (data, indent) in pending.items():
+            try:
+                with write_seconds.time(backend='json'):
+                    write_day_file(path, data, indent=indent)
+                self.writes += 1
+            except Exception as e:
+                self.logger.error(f"Error writing {path}: {e}")
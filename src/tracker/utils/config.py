@@ -7,6 +7,9 @@ import json
 from pathlib import Path
 from typing import Dict, Any
 
+# Environment variable naming an alternative configuration file
+CONFIG_ENV_VAR = 'SCREEN_TIME_CONFIG'
+
 class Config:
     """Class for managing configuration settings."""
 
@@ -15,9 +18,10 @@ class Config:
         Initialize the configuration.
 
         Args:
-            config_file: Optional path to configuration file
+            config_file: Optional path to configuration file, by default
+                $SCREEN_TIME_CONFIG or config.json in the src directory
         """
-        self.config_file = config_file or os.path.join(
+        self.config_file = config_file or os.environ.get(CONFIG_ENV_VAR) or os.path.join(
             os.path.dirname(os.path.dirname(os.path.dirname(__file__))),
             'config.json'
         )
@@ -34,10 +38,57 @@ class Config:
             'data_dir': os.path.join(os.path.expanduser('~'), '.screen_time'),
             'log_dir': os.path.join(os.path.expanduser('~'), '.screen_time', 'logs'),
             'idle_threshold': 300,  # 5 minutes
+            'idle': {
+                'source': 'auto',  # auto, logind, interrupts or none
+                'confirm_checks': 2,  # checks with input that end idleness
+                'min_dwell': 30  # seconds between idle/active transitions
+            },
+            'state_source': 'auto',  # auto, logind or polling
+            'polling': {
+                'interval': 2.0,  # seconds between checks while the user is active
+                'min_interval': 1.0,  # after a state change
+                'max_interval': 10.0,  # longest wait while locked or idle
+                'backoff': 1.5,
+                'fast_polls': 5
+            },
+            'lock_probes': {
+                'reprobe_interval': 300,  # seconds before a missing or failing method is retried
+                'max_failures': 3,  # consecutive failures before a method is benched
+                'timeout': 2.0
+            },
             'debug': False,
+            'logging': {
+                'level': 'INFO',
+                'max_bytes': 5 * 1024 * 1024,  # size at which a log file is rotated
+                'backup_count': 5,
+                'rotate_when': None,  # e.g. 'midnight' to rotate by time instead of size
+                'rate_limit_interval': 60  # seconds a repeated warning is dropped
+            },
+            'storage': {
+                'backend': 'json',  # json or journal
+                'fsync': 'always',  # always, interval or never
+                'fsync_interval': 1.0,
+                'archive': False  # convert closed days into .bin archives
+            },
+            'writer': {
+                'max_latency': 0.5,  # seconds a snapshot may wait
+                'max_batch': 32,
+                'max_queue': 256
+            },
             'server': {
                 'host': 'localhost',
-                'port': 5000
+                'port': 5000,
+                'cache_max_bytes': 64 * 1024 * 1024,
+                'gzip_cache_max_bytes': 16 * 1024 * 1024,
+                'loader_workers': 8,
+                'query_index_max_days': 64,
+                'session_lookback_days': 7,  # days searched for sessions crossing a range
+                'stream_interval': 1.0  # seconds between checks of today's data
+            },
+            'metrics': {
+                'listen': None,  # host:port of the trackers' /metrics listener
+                'textfile': None,  # path rewritten for node_exporter's textfile collector
+                'textfile_interval': 15.0
             }
         }
 
@@ -100,12 +151,52 @@ class Config:
         """Get the idle threshold in seconds."""
         return self.get('idle_threshold')
 
+    @property
+    def idle(self) -> Dict[str, Any]:
+        """Get the idle detection configuration."""
+        return self.get('idle', {})
+
+    @property
+    def state_source(self) -> str:
+        """Get the preferred lock/session state source."""
+        return self.get('state_source', 'auto')
+
+    @property
+    def polling(self) -> Dict[str, Any]:
+        """Get the adaptive polling configuration."""
+        return self.get('polling', {})
+
+    @property
+    def lock_probes(self) -> Dict[str, Any]:
+        """Get the screen lock probe configuration."""
+        return self.get('lock_probes', {})
+
+    @property
+    def logging(self) -> Dict[str, Any]:
+        """Get the logging configuration."""
+        return self.get('logging', {})
+
     @property
     def debug(self) -> bool:
         """Get the debug mode setting."""
         return self.get('debug', False)
 
+    @property
+    def storage(self) -> Dict[str, Any]:
+        """Get the storage configuration."""
+        return self.get('storage', {})
+
+    @property
+    def writer(self) -> Dict[str, Any]:
+        """Get the batched writer configuration."""
+        return self.get('writer', {})
+
     @property
     def server(self) -> Dict[str, Any]:
         """Get the server configuration."""
-        return self.get('server', {}) 
\ No newline at end of file
+        return self.get('server', {})
+
+    @property
+    def metrics(self) -> Dict[str, Any]:
+        """Get the metrics export configuration."""
+        return self.get('metrics', {}) 
\ No newline at end of file
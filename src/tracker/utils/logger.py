@@ -1,50 +1,204 @@
 """
 Module for setting up logging.
+
+Every process logs through one pipeline: the root logger gets a
+``QueueHandler`` that only hands records to a queue, and a ``QueueListener``
+thread formats them and writes them to the console and to rotating log
+files.  Tracker and request threads therefore never wait for the disk.
+Repeats of the same warning from the same line are dropped for a while and
+counted in the next one that gets through.
 """
 
-import os
+import time
+import atexit
 import logging
-from datetime import datetime
+import threading
+from logging.handlers import (
+    QueueHandler, QueueListener, RotatingFileHandler, TimedRotatingFileHandler
+)
 from pathlib import Path
-from typing import Optional
+from queue import SimpleQueue
+from typing import Any, Dict, List, Optional, Tuple
+
+FILE_FORMAT = '%(asctime)s - %(name)s - %(levelname)s - %(message)s'
+CONSOLE_FORMAT = '%(asctime)s - %(levelname)s - %(message)s'
+
+DEFAULT_MAX_BYTES = 5 * 1024 * 1024
+DEFAULT_BACKUP_COUNT = 5
+DEFAULT_RATE_LIMIT_INTERVAL = 60.0
+# Messages remembered by the rate limit before quiet ones are forgotten
+MAX_RATE_LIMITED = 1024
+
+_lock = threading.Lock()
+_queue_handler: Optional[QueueHandler] = None
+_listener: Optional[QueueListener] = None
+_handlers: List[logging.Handler] = []
+_log_files: Dict[Path, logging.Handler] = {}
+
+
+class RateLimitFilter(logging.Filter):
+    """Drops repeats of a warning from the same call site within an interval."""
+
+    def __init__(self, interval: float = DEFAULT_RATE_LIMIT_INTERVAL,
+                 level: int = logging.WARNING, clock=time.monotonic):
+        """
+        Initialize the filter.
+
+        Args:
+            interval: Seconds during which repeats of a call site are dropped,
+                0 to keep every record
+            level: Lowest level that is rate limited
+            clock: Monotonic clock
+        """
+        super().__init__()
+        self.interval = interval
+        self.level = level
+        self.clock = clock
+        # Call site and message -> [time it last got through, records dropped since]
+        self._seen: Dict[Tuple[str, str, int, str], List] = {}
+        self._lock = threading.Lock()
+
+    def filter(self, record: logging.LogRecord) -> bool:
+        if record.levelno < self.level or self.interval <= 0:
+            return True
+        # One line logs different errors, e.g. one per scheduler job, so only
+        # the same message from the same line counts as a repeat
+        key = (record.name, record.pathname, record.lineno, record.getMessage())
+        now = self.clock()
+        with self._lock:
+            entry = self._seen.get(key)
+            if entry is not None and now - entry[0] < self.interval:
+                entry[1] += 1
+                return False
+            suppressed = entry[1] if entry is not None else 0
+            self._seen[key] = [now, 0]
+            if len(self._seen) > MAX_RATE_LIMITED:
+                self._forget(now)
+        if suppressed:
+            record.msg = f"{record.getMessage()} ({suppressed} similar messages suppressed)"
+            record.args = None
+        return True
+
+    def _forget(self, now: float):
+        """Forget messages past their interval that had no repeats dropped."""
+        for key, (last, suppressed) in list(self._seen.items()):
+            if not suppressed and now - last >= self.interval:
+                del self._seen[key]
+
+
+def _parse_level(level: Any) -> int:
+    """Convert a level name such as 'INFO' or a number to a level number."""
+    if isinstance(level, int):
+        return level
+    value = logging.getLevelName(str(level).upper())
+    return value if isinstance(value, int) else logging.INFO
+
+
+def _file_handler(path: Path, settings: Dict[str, Any]) -> logging.Handler:
+    """
+    Create a rotating handler for one log file.
+
+    Args:
+        path: Log file
+        settings: ``logging`` configuration section
+
+    Returns:
+        logging.Handler: Handler rotating by time if ``rotate_when`` is set,
+        by size otherwise
+    """
+    backup_count = settings.get('backup_count', DEFAULT_BACKUP_COUNT)
+    when = settings.get('rotate_when')
+    if when:
+        handler = TimedRotatingFileHandler(path, when=when, backupCount=backup_count)
+    else:
+        handler = RotatingFileHandler(path, maxBytes=settings.get('max_bytes', DEFAULT_MAX_BYTES),
+                                      backupCount=backup_count)
+    handler.setFormatter(logging.Formatter(FILE_FORMAT))
+    return handler
+
+
+def start_logging(log_dir: Optional[str] = None, filename: str = 'chronos.log',
+                  settings: Optional[Dict[str, Any]] = None) -> logging.Logger:
+    """
+    Route the process's log records through the background writer.
+
+    The first call installs the queue on the root logger and starts the
+    writer thread with a console handler. Later calls only add log files
+    that are not written yet, so calling this again never duplicates output.
+
+    Args:
+        log_dir: Optional directory of the log file
+        filename: Name of the log file in log_dir
+        settings: Optional ``logging`` configuration section with ``level``,
+            ``max_bytes``, ``backup_count``, ``rotate_when`` and
+            ``rate_limit_interval``
+
+    Returns:
+        logging.Logger: The root logger
+    """
+    global _queue_handler, _listener
+    settings = settings or {}
+    root = logging.getLogger()
+    with _lock:
+        handlers = list(_handlers)
+        if _queue_handler is None:
+            console = logging.StreamHandler()
+            console.setLevel(logging.INFO)
+            console.setFormatter(logging.Formatter(CONSOLE_FORMAT))
+            handlers.append(console)
+
+            _queue_handler = QueueHandler(SimpleQueue())
+            _queue_handler.addFilter(RateLimitFilter(
+                settings.get('rate_limit_interval', DEFAULT_RATE_LIMIT_INTERVAL)))
+            root.addHandler(_queue_handler)
+            root.setLevel(_parse_level(settings.get('level', 'INFO')))
+            atexit.register(stop_logging)
+
+        if log_dir:
+            path = Path(log_dir).expanduser() / filename
+            if path not in _log_files:
+                path.parent.mkdir(parents=True, exist_ok=True)
+                _log_files[path] = _file_handler(path, settings)
+                handlers.append(_log_files[path])
+
+        if handlers != _handlers or _listener is None:
+            # The listener's handlers are fixed, so it is replaced; stop()
+            # writes out what the old one had queued
+            if _listener is not None:
+                _listener.stop()
+            _handlers[:] = handlers
+            _listener = QueueListener(_queue_handler.queue, *_handlers,
+                                      respect_handler_level=True)
+            _listener.start()
+    return root
 
-def setup_logger(name: str, log_dir: Optional[str] = None) -> logging.Logger:
+
+def stop_logging():
+    """Write out queued records and stop the background writer."""
+    global _listener
+    with _lock:
+        if _listener is not None:
+            _listener.stop()
+            _listener = None
+        for handler in _handlers:
+            handler.close()
+
+
+def setup_logger(name: str, log_dir: Optional[str] = None,
+                 settings: Optional[Dict[str, Any]] = None) -> logging.Logger:
     """
-    Set up a logger with file and console handlers.
+    Get a logger writing through the shared background pipeline.
+
+    Safe to call repeatedly for the same name: handlers are only added to
+    the root logger, once per process and log file.
 
     Args:
         name: Name of the logger
-        log_dir: Optional directory for log files
+        log_dir: Optional directory for the ``<name>.log`` file
+        settings: Optional ``logging`` configuration section
 
     Returns:
-        logging.Logger: Configured logger instance
+        logging.Logger: Logger instance
     """
-    logger = logging.getLogger(name)
-    logger.setLevel(logging.DEBUG)
-
-    # Create formatters
-    file_formatter = logging.Formatter(
-        '%(asctime)s - %(name)s - %(levelname)s - %(message)s'
-    )
-    console_formatter = logging.Formatter(
-        '%(asctime)s - %(levelname)s - %(message)s'
-    )
-
-    # Set up file handler
-    if log_dir:
-        log_dir = Path(log_dir)
-        log_dir.mkdir(parents=True, exist_ok=True)
-        
-        log_file = log_dir / f"{name}_{datetime.now().strftime('%Y%m%d')}.log"
-        file_handler = logging.FileHandler(log_file)
-        file_handler.setLevel(logging.DEBUG)
-        file_handler.setFormatter(file_formatter)
-        logger.addHandler(file_handler)
-
-    # Set up console handler
-    console_handler = logging.StreamHandler()
-    console_handler.setLevel(logging.INFO)
-    console_handler.setFormatter(console_formatter)
-    logger.addHandler(console_handler)
-
-    return logger 
\ No newline at end of file
+    start_logging(log_dir, f"{name}.log", settings)
+    return logging.getLogger(name)
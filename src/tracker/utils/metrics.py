@@ -0,0 +1,450 @@
+"""
+Module implementing an in-process metrics registry.
+
+Counters, gauges and histograms are kept in a ``MetricsRegistry`` and
+rendered in the Prometheus text exposition format. The server serves them
+at ``/metrics``; the trackers expose them through a small local listener or
+a textfile read by node_exporter's textfile collector.
+
+Only the standard library is used so that ``serve_viewer.py`` and the legacy
+tracker can import it without extra packages.
+"""
+
+import os
+import time
+import logging
+import tempfile
+import threading
+from bisect import bisect_left
+from contextlib import contextmanager
+from pathlib import Path
+from typing import Any, Callable, Dict, Iterator, List, Optional, Sequence, Tuple, Union
+
+from .scheduler import PeriodicScheduler
+
+CONTENT_TYPE = 'text/plain; version=0.0.4; charset=utf-8'
+# Upper bounds in seconds, from sub-millisecond writes to slow process spawns
+DEFAULT_BUCKETS = (0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1,
+                   0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+
+LabelKey = Tuple[str, ...]
+
+
+def _escape(value: str) -> str:
+    """Escape a label value for the text format."""
+    return value.replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n')
+
+
+def _format_value(value: float) -> str:
+    """Format a sample value for the text format."""
+    if value == float('inf'):
+        return '+Inf'
+    if isinstance(value, int) or float(value).is_integer():
+        return str(int(value))
+    return repr(float(value))
+
+
+def _format_labels(names: Sequence[str], values: Sequence[str]) -> str:
+    """Format a label set, empty if there are no labels."""
+    if not names:
+        return ''
+    pairs = ','.join(f'{name}="{_escape(value)}"' for name, value in zip(names, values))
+    return '{' + pairs + '}'
+
+
+class Metric:
+    """Base class of the metric types."""
+
+    type_name = 'untyped'
+
+    def __init__(self, name: str, help_text: str, labelnames: Sequence[str] = ()):
+        """
+        Initialize the metric.
+
+        Args:
+            name: Metric name
+            help_text: Description shown in the exposition
+            labelnames: Names of the labels every sample carries
+        """
+        self.name = name
+        self.help = help_text
+        self.labelnames = tuple(labelnames)
+        self._values: Dict[LabelKey, Any] = {}
+        self._functions: Dict[LabelKey, Callable[[], float]] = {}
+        self._lock = threading.Lock()
+
+    def _key(self, labels: Dict[str, Any]) -> LabelKey:
+        """Get the label values of a sample in label name order."""
+        if set(labels) != set(self.labelnames):
+            raise ValueError(f"{self.name} expects labels {self.labelnames}, got {tuple(labels)}")
+        return tuple(str(labels[name]) for name in self.labelnames)
+
+    def set_function(self, func: Callable[[], float], **labels):
+        """
+        Read the value of a sample from a function when metrics are collected.
+
+        Args:
+            func: Function returning the current value
+            **labels: Label values of the sample
+        """
+        with self._lock:
+            self._functions[self._key(labels)] = func
+
+    def samples(self) -> List[Tuple[str, LabelKey, float]]:
+        """
+        Get the current samples.
+
+        Returns:
+            List[Tuple[str, LabelKey, float]]: Sample name suffix, label
+            values and value of each sample
+        """
+        with self._lock:
+            values = dict(self._values)
+            functions = dict(self._functions)
+        samples = [('', key, value) for key, value in values.items()]
+        for key, func in functions.items():
+            try:
+                samples.append(('', key, float(func())))
+            except Exception:
+                # A failing callback must not break the whole exposition
+                continue
+        return samples
+
+    def render(self) -> List[str]:
+        """Render the metric in the text exposition format."""
+        lines = [f'# HELP {self.name} {self.help}', f'# TYPE {self.name} {self.type_name}']
+        for suffix, key, value in sorted(self.samples(), key=lambda sample: sample[1]):
+            lines.append(f'{self.name}{suffix}{_format_labels(self.labelnames, key)} '
+                         f'{_format_value(value)}')
+        return lines
+
+
+class Counter(Metric):
+    """Monotonically increasing count."""
+
+    type_name = 'counter'
+
+    def inc(self, amount: float = 1.0, **labels):
+        """
+        Increase the counter.
+
+        Args:
+            amount: Non-negative increment
+            **labels: Label values of the sample
+        """
+        if amount < 0:
+            raise ValueError("Counters can only increase")
+        key = self._key(labels)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0) + amount
+
+    def value(self, **labels) -> float:
+        """Get the current count of a sample."""
+        with self._lock:
+            return self._values.get(self._key(labels), 0)
+
+
+class Gauge(Metric):
+    """Value that can go up and down."""
+
+    type_name = 'gauge'
+
+    def set(self, value: float, **labels):
+        """
+        Set the gauge.
+
+        Args:
+            value: New value
+            **labels: Label values of the sample
+        """
+        key = self._key(labels)
+        with self._lock:
+            self._values[key] = value
+
+    def inc(self, amount: float = 1.0, **labels):
+        """Increase the gauge by amount."""
+        key = self._key(labels)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0) + amount
+
+    def dec(self, amount: float = 1.0, **labels):
+        """Decrease the gauge by amount."""
+        self.inc(-amount, **labels)
+
+    def value(self, **labels) -> float:
+        """Get the current value of a sample."""
+        with self._lock:
+            return self._values.get(self._key(labels), 0)
+
+
+class Histogram(Metric):
+    """Distribution of observed values in cumulative buckets."""
+
+    type_name = 'histogram'
+
+    def __init__(self, name: str, help_text: str, labelnames: Sequence[str] = (),
+                 buckets: Sequence[float] = DEFAULT_BUCKETS):
+        """
+        Initialize the histogram.
+
+        Args:
+            name: Metric name
+            help_text: Description shown in the exposition
+            labelnames: Names of the labels every sample carries
+            buckets: Sorted upper bounds of the buckets
+        """
+        super().__init__(name, help_text, labelnames)
+        self.buckets = tuple(sorted(buckets))
+
+    def set_function(self, func: Callable[[], float], **labels):
+        raise TypeError("Histograms cannot be read from a function")
+
+    def observe(self, value: float, **labels):
+        """
+        Record one observation.
+
+        Args:
+            value: Observed value, e.g. a duration in seconds
+            **labels: Label values of the sample
+        """
+        key = self._key(labels)
+        with self._lock:
+            state = self._values.get(key)
+            if state is None:
+                state = self._values[key] = [[0] * len(self.buckets), 0.0, 0]
+            index = bisect_left(self.buckets, value)
+            if index < len(self.buckets):
+                state[0][index] += 1
+            state[1] += value
+            state[2] += 1
+
+    @contextmanager
+    def time(self, **labels) -> Iterator[None]:
+        """Observe the wall time of a block in seconds."""
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.observe(time.perf_counter() - start, **labels)
+
+    def count(self, **labels) -> int:
+        """Get the number of observations of a sample."""
+        with self._lock:
+            state = self._values.get(self._key(labels))
+            return state[2] if state else 0
+
+    def samples(self) -> List[Tuple[str, LabelKey, float]]:
+        with self._lock:
+            states = {key: (list(state[0]), state[1], state[2])
+                      for key, state in self._values.items()}
+        samples = []
+        for key, (counts, total, count) in sorted(states.items()):
+            cumulative = 0
+            for bound, bucket_count in zip(self.buckets, counts):
+                cumulative += bucket_count
+                samples.append(('_bucket', key + (_format_value(bound),), cumulative))
+            samples.append(('_bucket', key + ('+Inf',), count))
+            samples.append(('_sum', key, total))
+            samples.append(('_count', key, count))
+        return samples
+
+    def render(self) -> List[str]:
+        lines = [f'# HELP {self.name} {self.help}', f'# TYPE {self.name} {self.type_name}']
+        for suffix, key, value in self.samples():
+            # The bucket bound travels as an extra last label value
+            names = self.labelnames + ('le',) if suffix == '_bucket' else self.labelnames
+            lines.append(f'{self.name}{suffix}{_format_labels(names, key)} {_format_value(value)}')
+        return lines
+
+
+class MetricsRegistry:
+    """Named collection of metrics."""
+
+    def __init__(self):
+        """Initialize an empty registry."""
+        self._metrics: Dict[str, Metric] = {}
+        self._lock = threading.Lock()
+
+    def _get_or_create(self, cls, name: str, help_text: str, labelnames: Sequence[str],
+                       **kwargs) -> Metric:
+        """Return the metric of a name, creating it on first use."""
+        with self._lock:
+            metric = self._metrics.get(name)
+            if metric is None:
+                metric = self._metrics[name] = cls(name, help_text, labelnames, **kwargs)
+            elif type(metric) is not cls or metric.labelnames != tuple(labelnames):
+                raise ValueError(f"Metric {name} is already registered differently")
+            return metric
+
+    def counter(self, name: str, help_text: str, labelnames: Sequence[str] = ()) -> Counter:
+        """Get or create a counter."""
+        return self._get_or_create(Counter, name, help_text, labelnames)
+
+    def gauge(self, name: str, help_text: str, labelnames: Sequence[str] = ()) -> Gauge:
+        """Get or create a gauge."""
+        return self._get_or_create(Gauge, name, help_text, labelnames)
+
+    def histogram(self, name: str, help_text: str, labelnames: Sequence[str] = (),
+                  buckets: Sequence[float] = DEFAULT_BUCKETS) -> Histogram:
+        """Get or create a histogram."""
+        return self._get_or_create(Histogram, name, help_text, labelnames, buckets=buckets)
+
+    def render(self) -> str:
+        """
+        Render every metric in the text exposition format.
+
+        Returns:
+            str: Exposition text
+        """
+        with self._lock:
+            metrics = sorted(self._metrics.values(), key=lambda metric: metric.name)
+        lines = []
+        for metric in metrics:
+            lines.extend(metric.render())
+        return '\n'.join(lines) + '\n'
+
+    def write_textfile(self, path: Union[str, Path]):
+        """
+        Write the exposition to a file without exposing partial contents.
+
+        Args:
+            path: Destination, e.g. in node_exporter's textfile directory
+        """
+        path = Path(path)
+        fd, tmp_path = tempfile.mkstemp(dir=path.parent, prefix=f'.{path.name}.', suffix='.tmp')
+        try:
+            with os.fdopen(fd, 'w') as f:
+                f.write(self.render())
+            os.chmod(tmp_path, 0o644)
+            os.replace(tmp_path, path)
+        except BaseException:
+            try:
+                os.unlink(tmp_path)
+            except OSError:
+                pass
+            raise
+
+
+# Registry shared by everything running in one process
+registry = MetricsRegistry()
+
+
+class MetricsExporter:
+    """Exposes a registry over a local HTTP listener and/or a textfile."""
+
+    def __init__(self, registry: MetricsRegistry = registry, listen: Optional[str] = None,
+                 textfile: Optional[str] = None, textfile_interval: float = 15.0,
+                 logger: Optional[logging.Logger] = None,
+                 scheduler: Optional[PeriodicScheduler] = None):
+        """
+        Initialize the exporter.
+
+        Args:
+            registry: Registry to expose
+            listen: Optional ``host:port`` serving ``/metrics``
+            textfile: Optional path rewritten every textfile_interval seconds
+            textfile_interval: Seconds between textfile writes
+            logger: Optional logger
+            scheduler: Optional shared scheduler for the textfile writes,
+                by default a private one
+        """
+        self.registry = registry
+        self.listen = listen
+        self.textfile = textfile
+        self.textfile_interval = textfile_interval
+        self.logger = logger or logging.getLogger(__name__)
+        self._owns_scheduler = scheduler is None
+        self.scheduler = scheduler or PeriodicScheduler(name='metrics-textfile', logger=self.logger)
+        self._server = None
+        self._thread: Optional[threading.Thread] = None
+
+    @classmethod
+    def from_config(cls, settings: Dict[str, Any], logger: Optional[logging.Logger] = None,
+                    scheduler: Optional[PeriodicScheduler] = None) -> 'MetricsExporter':
+        """
+        Create an exporter from the ``metrics`` configuration section.
+
+        Args:
+            settings: Section with ``listen``, ``textfile`` and ``textfile_interval``
+            logger: Optional logger
+            scheduler: Optional shared scheduler
+
+        Returns:
+            MetricsExporter: Exporter, not started
+        """
+        return cls(
+            listen=settings.get('listen'),
+            textfile=settings.get('textfile'),
+            textfile_interval=settings.get('textfile_interval', 15.0),
+            logger=logger,
+            scheduler=scheduler
+        )
+
+    @property
+    def enabled(self) -> bool:
+        """Check whether any export is configured."""
+        return bool(self.listen or self.textfile)
+
+    def start(self):
+        """Start the configured listener and textfile writer."""
+        if self.listen:
+            # Imported here, http.server pulls in the email and ssl modules
+            from http.server import ThreadingHTTPServer
+            host, _, port = self.listen.rpartition(':')
+            self._server = ThreadingHTTPServer((host or '127.0.0.1', int(port)),
+                                               self._handler_class())
+            self._server.daemon_threads = True
+            self._thread = threading.Thread(target=self._server.serve_forever,
+                                            name='metrics-listener', daemon=True)
+            self._thread.start()
+            self.logger.info(f"Serving metrics at http://{self.listen}/metrics")
+        if self.textfile:
+            self.scheduler.add('metrics-textfile', self._write_textfile,
+                               self.textfile_interval, run_now=True)
+            if self._owns_scheduler:
+                self.scheduler.start()
+            self.logger.info(f"Writing metrics to {self.textfile}")
+
+    def stop(self):
+        """Stop exporting, writing the textfile a last time."""
+        if self._server is not None:
+            self._server.shutdown()
+            self._server.server_close()
+            self._thread.join()
+            self._server = None
+            self._thread = None
+        if self.textfile:
+            self.scheduler.remove('metrics-textfile')
+            if self._owns_scheduler:
+                self.scheduler.stop()
+            self._write_textfile()
+
+    def _write_textfile(self):
+        """Write the textfile, logging failures."""
+        try:
+            self.registry.write_textfile(self.textfile)
+        except OSError as e:
+            self.logger.warning(f"Error writing metrics textfile {self.textfile}: {e}")
+
+    def _handler_class(self):
+        """Build the request handler serving this exporter's registry."""
+        from http.server import BaseHTTPRequestHandler
+        registry = self.registry
+
+        class MetricsHandler(BaseHTTPRequestHandler):
+            def do_GET(self):
+                if self.path.split('?')[0] != '/metrics':
+                    self.send_error(404)
+                    return
+                body = registry.render().encode()
+                self.send_response(200)
+                self.send_header('Content-Type', CONTENT_TYPE)
+                self.send_header('Content-Length', str(len(body)))
+                self.end_headers()
+                self.wfile.write(body)
+
+            def log_message(self, format, *args):
+                # Scrapes every few seconds would flood the tracker log
+                pass
+
+        return MetricsHandler
@@ -0,0 +1,220 @@
+"""
+Module implementing the trackers' shared timer and adaptive poll intervals.
+
+Periodic work such as state polling and metrics exports runs as jobs on one
+``PeriodicScheduler`` thread instead of one sleeping thread per task.  When
+the thread wakes up, every job due within ``slack`` seconds runs in the same
+wakeup, so the process wakes the CPU once instead of once per task.
+
+``AdaptiveInterval`` decides how long a polling job waits: briefly after a
+state change, the base interval while the user is active and a growing
+interval while the screen is locked or idle.
+"""
+
+import time
+import logging
+import threading
+from typing import Any, Callable, Dict, Optional, Union
+
+Interval = Union[float, Callable[[], float]]
+
+
+class AdaptiveInterval:
+    """Poll interval that tightens after changes and backs off while quiet."""
+
+    def __init__(self, interval: float = 2.0, min_interval: Optional[float] = None,
+                 max_interval: Optional[float] = None, backoff: float = 1.5,
+                 fast_polls: int = 5):
+        """
+        Initialize the interval.
+
+        Args:
+            interval: Seconds between polls while the user is active
+            min_interval: Seconds between polls right after a change,
+                by default half the interval
+            max_interval: Longest wait while quiet, by default five intervals
+            backoff: Factor the wait grows by per quiet poll
+            fast_polls: Polls at min_interval after each change
+        """
+        self.interval = interval
+        self.min_interval = min_interval if min_interval is not None else interval / 2
+        self.max_interval = max_interval if max_interval is not None else interval * 5
+        self.backoff = backoff
+        self.fast_polls = fast_polls
+        self.quiet = False
+        self.current = interval
+        self._fast_left = 0
+
+    @classmethod
+    def from_config(cls, settings: Dict[str, Any], interval: float = 2.0) -> 'AdaptiveInterval':
+        """
+        Create an interval from the ``polling`` configuration section.
+
+        Args:
+            settings: Section with ``interval``, ``min_interval``,
+                ``max_interval``, ``backoff`` and ``fast_polls``
+            interval: Base interval if the section has none
+
+        Returns:
+            AdaptiveInterval: The interval
+        """
+        return cls(
+            interval=settings.get('interval', interval),
+            min_interval=settings.get('min_interval'),
+            max_interval=settings.get('max_interval'),
+            backoff=settings.get('backoff', 1.5),
+            fast_polls=settings.get('fast_polls', 5)
+        )
+
+    def changed(self):
+        """Poll quickly for a while because the state just changed."""
+        self._fast_left = self.fast_polls
+        self.current = self.interval
+
+    def set_quiet(self, quiet: bool):
+        """
+        Set whether nothing is expected to happen soon, e.g. while locked.
+
+        Args:
+            quiet: True while the screen is locked or the user is idle
+        """
+        if quiet != self.quiet:
+            self.quiet = quiet
+            self.current = self.interval
+
+    def next(self) -> float:
+        """
+        Get the wait before the next poll.
+
+        Returns:
+            float: Seconds to wait
+        """
+        if self._fast_left:
+            self._fast_left -= 1
+            return self.min_interval
+        if self.quiet:
+            self.current = min(self.max_interval, self.current * self.backoff)
+        else:
+            self.current = self.interval
+        return self.current
+
+
+class _Job:
+    """Periodic job of a scheduler."""
+
+    __slots__ = ('name', 'func', 'interval', 'due')
+
+    def __init__(self, name: str, func: Callable[[], Any], interval: Interval, due: float):
+        self.name = name
+        self.func = func
+        self.interval = interval
+        self.due = due
+
+    def next_interval(self) -> float:
+        return self.interval() if callable(self.interval) else self.interval
+
+
+class PeriodicScheduler:
+    """Single timer thread running periodic jobs."""
+
+    def __init__(self, slack: float = 0.5, name: str = 'scheduler',
+                 logger: Optional[logging.Logger] = None,
+                 clock: Callable[[], float] = time.monotonic):
+        """
+        Initialize the scheduler.
+
+        Args:
+            slack: Seconds a job may run early to share a wakeup with another
+            name: Name of the timer thread
+            logger: Optional logger
+            clock: Monotonic clock
+        """
+        self.slack = slack
+        self.name = name
+        self.logger = logger or logging.getLogger(__name__)
+        self.clock = clock
+        self._jobs: Dict[str, _Job] = {}
+        self._lock = threading.Lock()
+        self._wakeup = threading.Event()
+        self._stopping = False
+        self._thread: Optional[threading.Thread] = None
+        self.wakeups = 0
+
+    @property
+    def running(self) -> bool:
+        """Check whether the timer thread is running."""
+        return self._thread is not None
+
+    def add(self, name: str, func: Callable[[], Any], interval: Interval,
+            run_now: bool = False):
+        """
+        Run a function periodically, replacing any job of the same name.
+
+        Args:
+            name: Job name
+            func: Function to run
+            interval: Seconds between runs, or a function returning the
+                wait before the next run, called after each run
+            run_now: Run at the next wakeup instead of after one interval
+        """
+        job = _Job(name, func, interval, self.clock())
+        if not run_now:
+            job.due += job.next_interval()
+        with self._lock:
+            self._jobs[name] = job
+        self._wakeup.set()
+
+    def remove(self, name: str):
+        """Stop running a job."""
+        with self._lock:
+            self._jobs.pop(name, None)
+
+    def run_soon(self, name: str, delay: float = 0.0):
+        """
+        Bring the next run of a job forward.
+
+        Args:
+            name: Job name
+            delay: Seconds from now
+        """
+        with self._lock:
+            job = self._jobs.get(name)
+            if job is not None:
+                job.due = min(job.due, self.clock() + delay)
+        self._wakeup.set()
+
+    def start(self):
+        """Start the timer thread."""
+        if self._thread is not None:
+            return
+        self._stopping = False
+        self._thread = threading.Thread(target=self._run, name=self.name, daemon=True)
+        self._thread.start()
+
+    def stop(self):
+        """Stop the timer thread after the running job finishes."""
+        self._stopping = True
+        self._wakeup.set()
+        thread, self._thread = self._thread, None
+        if thread is not None and thread is not threading.current_thread():
+            thread.join()
+
+    def _run(self):
+        """Run due jobs and sleep until the next one is due."""
+        while not self._stopping:
+            now = self.clock()
+            with self._lock:
+                due = [job for job in self._jobs.values() if job.due <= now + self.slack]
+            for job in due:
+                try:
+                    job.func()
+                except Exception as e:
+                    self.logger.error(f"Error in periodic job {job.name}: {e}")
+                job.due = self.clock() + job.next_interval()
+
+            with self._lock:
+                next_due = min((job.due for job in self._jobs.values()), default=None)
+            timeout = None if next_due is None else max(0.0, next_due - self.clock())
+            self._wakeup.wait(timeout)
+            self._wakeup.clear()
+            self.wakeups += 1
@@ -0,0 +1,35 @@
+"""
+Module for reporting service state to systemd.
+"""
+
+import os
+
+
+def sd_notify(state: str) -> bool:
+    """
+    Send a state change such as ``READY=1`` to the service manager.
+
+    Does nothing when the process was not started by systemd with a
+    notification socket (``Type=notify``).
+
+    Args:
+        state: Newline separated assignments, e.g. ``READY=1``
+
+    Returns:
+        bool: True if the message was sent
+    """
+    address = os.environ.get('NOTIFY_SOCKET')
+    if not address:
+        return False
+    # Only needed under systemd, so kept off the import path
+    import socket
+    if address.startswith('@'):
+        # Abstract namespace socket
+        address = '\0' + address[1:]
+    try:
+        with socket.socket(socket.AF_UNIX, socket.SOCK_DGRAM) as sock:
+            sock.connect(address)
+            sock.sendall(state.encode())
+        return True
+    except OSError:
+        return False
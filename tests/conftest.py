@@ -0,0 +1,26 @@
+"""
+Shared fixtures of the test suite.
+"""
+
+import sys
+import json
+from pathlib import Path
+
+import pytest
+
+# The packages live in src/, like an installed checkout
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent / 'src'))
+
+from tracker.utils.config import Config
+
+
+@pytest.fixture
+def make_config(tmp_path):
+    """Create a Config reading a file with the given top-level settings."""
+    def make(**settings) -> Config:
+        settings.setdefault('data_dir', str(tmp_path / 'data'))
+        settings.setdefault('log_dir', str(tmp_path / 'logs'))
+        path = tmp_path / 'config.json'
+        path.write_text(json.dumps(settings))
+        return Config(str(path))
+    return make
@@ -0,0 +1,85 @@
+"""
+Tests that sessions, the heatmap and the rollup agree on active time.
+"""
+
+from datetime import datetime, timedelta
+
+import pytest
+
+from tracker.storage.rollup import summarize_day
+from tracker.storage.sessions import SessionIndex, total_time
+
+from .test_sessions import MemoryStorage
+
+np = pytest.importorskip('numpy')
+
+# The server modules reach the tracker package relatively, through src
+from src.server import analytics  # noqa: E402
+
+DAYS = {
+    '2024-03-04': [
+        ('UNLOCK', '08:30:00'), ('IDLE', '08:50:00'), ('IDLE', '09:05:00'),
+        ('ACTIVE', '09:40:00'), ('LOCK', '10:00:00'),
+        ('STARTUP', '13:00:00'), ('IDLE', '13:30:00'), ('SHUTDOWN', '14:15:00'),
+    ],
+    '2024-03-05': [
+        # IDLE outside a session and an ACTIVE without IDLE change nothing
+        ('IDLE', '07:00:00'), ('UNLOCK', '09:00:00'), ('ACTIVE', '09:10:00'),
+        ('IDLE', '10:00:00'), ('ACTIVE', '10:30:00'), ('IDLE', '11:00:00'),
+        ('ACTIVE', '11:20:00'), ('LOGOUT', '12:00:00'),
+    ],
+    '2024-03-06': [
+        ('UNLOCK', '22:00:00'), ('IDLE', '22:30:00'), ('ACTIVE', '23:00:00'),
+        ('LOCK', '23:45:00'),
+    ],
+}
+
+
+def storage():
+    days = MemoryStorage({})
+    for date, events in DAYS.items():
+        for event_type, clock in events:
+            days.add(date, event_type, clock)
+    return days
+
+
+def test_sessions_heatmap_and_rollup_agree():
+    days = storage()
+    index = SessionIndex(days, lookback_days=1)
+    summaries = [summarize_day(date, {'events': days.days[date]}) for date in DAYS]
+
+    result = analytics.heatmap('2024-03-04', len(DAYS), None,
+                               lambda dates: [(date, days.load_day(date)) for date in dates])
+
+    for day, (date, summary) in enumerate(zip(DAYS, summaries)):
+        start = datetime.strptime(date, '%Y-%m-%d')
+        sessions = index.sessions(date, 1)
+        assert total_time(sessions, start, start + timedelta(days=1)) == summary['total_time']
+        assert result['daily'][day] == summary['total_time']
+        assert result['heatmap'][start.weekday()] == summary['hourly']
+
+    expected = sum(summary['total_time'] for summary in summaries)
+    assert expected == (70 + 130 + 75) * 60
+    assert result['total_time'] == expected
+
+
+def test_idle_stretches_are_cut_out_of_active_intervals():
+    stamps = np.array([0, 10, 20, 25, 30, 40, 50, 60], dtype=np.int64)
+    kinds = np.array([analytics.START, analytics.IDLE, analytics.IDLE, 0, analytics.ACTIVE,
+                      analytics.IDLE, analytics.END, analytics.IDLE], dtype=np.int8)
+    starts, ends = analytics.active_intervals(stamps, kinds)
+    assert starts.tolist() == [0, 30]
+    assert ends.tolist() == [10, 40]
+
+
+def test_running_idle_stretch_of_an_open_session_lasts_until_now():
+    stamps = np.array([0, 10], dtype=np.int64)
+    kinds = np.array([analytics.START, analytics.IDLE], dtype=np.int8)
+    starts, ends = analytics.active_intervals(stamps, kinds, open_end=100)
+    assert (starts.tolist(), ends.tolist()) == ([0], [10])
+
+
+def test_sessions_report_their_idle_time():
+    session = SessionIndex(storage(), lookback_days=1).sessions('2024-03-04', 1)[0]
+    assert session.idle == ((datetime(2024, 3, 4, 8, 50), datetime(2024, 3, 4, 9, 40)),)
+    assert session.to_dict()['idle_time'] == 50 * 60
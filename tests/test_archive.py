@@ -0,0 +1,109 @@
+"""
+Tests for the columnar day archives and queries answered from them.
+"""
+
+import json
+from datetime import datetime
+
+# The server modules reach the tracker package relatively, through src
+from src.server.query import DayIndex, EventQuery, decode_cursor, select_archived
+from tracker.storage.archive import ArchiveReader, write_archive
+from tracker.storage.day_files import (
+    archive_path, day_file_path, journal_path, load_day, open_archive
+)
+
+DATE = '2024-03-05'
+
+
+def make_day(count=200):
+    types = ['UNLOCK', 'LOCK', 'IDLE', 'ACTIVE']
+    events = []
+    for index in range(count):
+        seconds = 6 * 3600 + index * 60
+        event = {'type': types[index % len(types)],
+                 'timestamp': f"{DATE}T{seconds // 3600:02d}:{seconds // 60 % 60:02d}:00"}
+        events.append(event)
+    # Fields and spellings the archive has to carry on the side
+    events[3]['timestamp'] = f"{DATE}T06:03:00.250000"
+    events[5]['source'] = 'dbus'
+    events[7]['timestamp'] = f"{DATE} 06:07:00"
+    events[9]['type'] = 'unlock'
+    return {'events': events, 'total_time': 1234.5, 'current_session': None}
+
+
+def test_round_trip_is_exact(tmp_path):
+    data = make_day()
+    path = archive_path(tmp_path, DATE)
+    write_archive(path, DATE, data)
+
+    with ArchiveReader(path) as reader:
+        assert reader.count == len(data['events'])
+        assert reader.load() == data
+    assert load_day(tmp_path, DATE) == data
+
+
+def test_slices_and_types(tmp_path):
+    data = make_day()
+    path = archive_path(tmp_path, DATE)
+    write_archive(path, DATE, data)
+    start, end = datetime(2024, 3, 5, 7, 0), datetime(2024, 3, 5, 8, 0)
+
+    with ArchiveReader(path) as reader:
+        assert reader.slice_bounds(start, end) == (60, 120)
+        expected = [event for event in data['events']
+                    if start <= datetime.fromisoformat(event['timestamp']) < end]
+        assert reader.events(start, end) == expected
+        assert reader.events(start, end, types=['LOCK']) == [
+            event for event in expected if event['type'] == 'LOCK']
+        rows = [row for row, _ in reader.iter_events(start, end, first_row=100)]
+        assert rows == list(range(100, 120))
+
+
+def test_unsorted_archive_slices_by_scanning(tmp_path):
+    data = make_day(20)
+    data['events'].reverse()
+    path = archive_path(tmp_path, DATE)
+    write_archive(path, DATE, data)
+
+    with ArchiveReader(path) as reader:
+        assert not reader.header['sorted']
+        assert reader.load() == data
+        events = reader.events(datetime(2024, 3, 5, 6, 10), datetime(2024, 3, 5, 6, 15))
+        assert [event['timestamp'][-8:] for event in events] == [
+            '06:14:00', '06:13:00', '06:12:00', '06:11:00', '06:10:00']
+
+
+def test_only_archived_days_are_opened(tmp_path):
+    write_archive(archive_path(tmp_path, DATE), DATE, make_day(10))
+    with open_archive(tmp_path, DATE) as reader:
+        assert reader.count == 10
+
+    journal_path(tmp_path, DATE).write_text('')
+    assert open_archive(tmp_path, DATE) is None
+    journal_path(tmp_path, DATE).unlink()
+    day_file_path(tmp_path, DATE).write_text(json.dumps(make_day(10)))
+    assert open_archive(tmp_path, DATE) is None
+    assert open_archive(tmp_path, '2024-03-06') is None
+
+
+def test_archived_pages_match_the_day_index(tmp_path):
+    data = make_day()
+    path = archive_path(tmp_path, DATE)
+    write_archive(path, DATE, data)
+    index = DayIndex(data['events'])
+    args = {'from': '06:30', 'to': '09:00', 'types': 'UNLOCK,IDLE', 'limit': '7'}
+
+    pages = 0
+    with ArchiveReader(path) as reader:
+        while True:
+            query = EventQuery.parse(DATE, args)
+            events, cursor = select_archived(reader, query)
+            assert (events, cursor) == index.select(query)
+            assert events and all(event['type'].upper() in ('UNLOCK', 'IDLE')
+                                  for event in events)
+            pages += 1
+            if cursor is None:
+                break
+            decode_cursor(cursor)
+            args['cursor'] = cursor
+    assert pages == 11
@@ -0,0 +1,94 @@
+"""
+Tests for the incremental per-day session accounting.
+"""
+
+from datetime import datetime
+
+from tracker.core.day_state import DayState
+from tracker.events.event import Event
+from tracker.events.event_types import EventType
+
+DATE = '2024-03-01'
+
+
+def event(event_type: str, time_of_day: str) -> dict:
+    return {'type': event_type, 'timestamp': f'{DATE}T{time_of_day}'}
+
+
+def test_sessions_count_from_start_to_end():
+    state = DayState.from_events(DATE, [
+        event('startup', '08:00:00'),
+        event('lock', '09:00:00'),
+        event('unlock', '09:30:00'),
+        event('SHUTDOWN', '10:00:00'),
+    ])
+    assert state.total_time == 90 * 60
+    assert not state.session_active
+    assert state.event_count == 4
+
+
+def test_open_session_is_not_counted_until_it_ends():
+    state = DayState(DATE)
+    assert state.apply(event('unlock', '08:00:00')) == 0.0
+    assert state.session_active
+    assert state.total_time == 0
+    assert state.apply(event('logout', '08:10:00')) == 600.0
+
+
+def test_repeated_start_restarts_the_session():
+    # Matches how day totals have always been counted: the latest start wins
+    state = DayState.from_events(DATE, [
+        event('startup', '08:00:00'),
+        event('unlock', '08:30:00'),
+        event('lock', '09:00:00'),
+    ])
+    assert state.total_time == 30 * 60
+
+
+def test_end_without_start_and_unknown_types_are_ignored():
+    state = DayState.from_events(DATE, [
+        event('lock', '07:00:00'),
+        event('mystery', '07:30:00'),
+    ])
+    assert state.total_time == 0
+    assert state.last_type is None
+    assert state.last_time == datetime(2024, 3, 1, 7, 30)
+
+
+def test_last_event_lookups_by_type():
+    state = DayState(DATE)
+    record = Event.at(EventType.STARTUP, datetime(2024, 3, 1, 8, 0))
+    state.apply(record)
+    state.apply(event('system_shutdown', '18:00:00'))
+
+    assert state.last_of(EventType.STARTUP) is record
+    assert state.last_time_of(EventType.SHUTDOWN) == datetime(2024, 3, 1, 18, 0)
+    assert state.last_time_of(EventType.LOCK) is None
+    assert state.total_time == 10 * 3600
+
+
+def test_idle_time_is_left_out_of_the_session():
+    state = DayState.from_events(DATE, [
+        event('unlock', '08:00:00'),
+        event('idle', '08:20:00'),
+        # A repeated IDLE keeps the first start
+        event('idle', '08:25:00'),
+        event('active', '08:50:00'),
+        event('idle', '09:30:00'),
+        # The session ends while idle
+        event('lock', '09:45:00'),
+    ])
+    assert state.idle_time == 45 * 60
+    assert state.total_time == 60 * 60
+
+
+def test_idle_outside_a_session_or_before_a_restart_is_ignored():
+    state = DayState.from_events(DATE, [
+        event('idle', '07:00:00'),
+        event('startup', '08:00:00'),
+        event('idle', '08:10:00'),
+        event('unlock', '08:30:00'),
+        event('lock', '09:00:00'),
+    ])
+    assert state.idle_time == 0
+    assert state.total_time == 30 * 60
@@ -0,0 +1,92 @@
+"""
+Tests for loading the latest events of a day at startup.
+"""
+
+import json
+import os
+
+from tracker.storage.day_files import (
+    TAIL_EVENTS, day_file_path, journal_path, load_day, load_day_tail, tail_path,
+    write_day_file
+)
+from tracker.storage.file_storage import JsonFileStorage
+from tracker.storage.writer import BatchedWriter
+
+DATE = '2024-03-01'
+
+
+def make_day(count):
+    events = []
+    for index in range(count):
+        event = {'type': 'unlock' if index % 2 else 'lock',
+                 'timestamp': f"{DATE}T{index // 3600 % 24:02d}:{index // 60 % 60:02d}:{index % 60:02d}"}
+        if index % 3 == 0:
+            # Nested objects and brackets inside strings
+            event['details'] = {'source': {'name': 'probe]{', 'tries': [1, {'ok': True}]},
+                                'note': '"}, {"timestamp": "x"'}
+        events.append(event)
+    return {'events': events, 'total_time': 3600.5,
+            'current_session': {'start_time': None, 'is_active': False}}
+
+
+def test_large_day_is_read_from_its_tail(tmp_path):
+    data = make_day(20000)
+    path = day_file_path(tmp_path, DATE)
+    write_day_file(path, data, indent=4)
+    assert tail_path(tmp_path, DATE).stat().st_size < path.stat().st_size // 50
+
+    tail = load_day_tail(tmp_path, DATE)
+    assert tail['events'] == data['events'][-TAIL_EVENTS:]
+    assert tail['total_time'] == 3600.5
+    assert tail['current_session'] == data['current_session']
+    # Only fields of the day file format reach the tracker
+    assert set(tail) == set(data)
+
+
+def test_small_day_tail_holds_every_event(tmp_path):
+    data = make_day(5)
+    write_day_file(day_file_path(tmp_path, DATE), data)
+    assert load_day_tail(tmp_path, DATE) == data
+
+
+def test_stale_or_missing_tail_falls_back_to_the_whole_day(tmp_path):
+    data = make_day(300)
+    path = day_file_path(tmp_path, DATE)
+    write_day_file(path, data)
+
+    # Rewritten by something that does not know about tails
+    data['events'].append({'type': 'lock', 'timestamp': f"{DATE}T23:59:59"})
+    path.write_text(json.dumps(data, indent=4))
+    assert load_day_tail(tmp_path, DATE) == data
+
+    tail_path(tmp_path, DATE).unlink()
+    assert load_day_tail(tmp_path, DATE) == data
+
+    tail_path(tmp_path, DATE).write_text('{"day_file": [1, 2')
+    assert load_day_tail(tmp_path, DATE) == data
+
+
+def test_days_with_a_journal_are_loaded_whole(tmp_path):
+    data = make_day(300)
+    write_day_file(day_file_path(tmp_path, DATE), data)
+    record = {'event': {'type': 'unlock', 'timestamp': f"{DATE}T23:00:00"}}
+    journal_path(tmp_path, DATE).write_text(json.dumps(record) + '\n')
+
+    tail = load_day_tail(tmp_path, DATE)
+    assert tail == load_day(tmp_path, DATE)
+    assert len(tail['events']) == 301
+
+
+def test_json_storage_writes_tails(tmp_path):
+    storage = JsonFileStorage(tmp_path, BatchedWriter(max_latency=0.05), indent=4)
+    storage.start()
+    for event in make_day(150)['events']:
+        storage.append_event(DATE, event, {'total_time': 10})
+    storage.close()
+
+    reopened = JsonFileStorage(tmp_path, BatchedWriter())
+    tail = reopened.load_tail(DATE)
+    assert len(tail['events']) == TAIL_EVENTS
+    assert tail['events'][-1] == load_day(tmp_path, DATE)['events'][-1]
+    assert tail['total_time'] == 10
+    assert not [name for name in os.listdir(tmp_path) if name.endswith('.tmp')]
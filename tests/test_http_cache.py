@@ -0,0 +1,28 @@
+"""
+Tests for the HTTP validator helpers.
+"""
+
+from server.http_cache import http_date, not_modified_since, signature_mtime
+from tracker.storage.day_files import day_file_path, day_signature
+
+
+def test_signature_mtime_of_day_files(tmp_path):
+    path = day_file_path(tmp_path, '2024-01-01')
+    path.write_text('{}')
+    signature = day_signature(tmp_path, '2024-01-01')
+
+    mtime = signature_mtime(signature)
+
+    assert mtime == path.stat().st_mtime_ns / 1e9
+    assert not_modified_since(http_date(mtime), mtime)
+    assert not not_modified_since(http_date(mtime - 10), mtime)
+
+
+def test_signature_mtime_of_ranges_and_databases():
+    older = (('2024-01-01.json', 1_000_000_000, 10),)
+    newer = (('2024-01-02.json', 5_000_000_000, 10), ('2024-01-02.jsonl', 3_000_000_000, 5))
+
+    assert signature_mtime(older, None, newer) == 5.0
+    assert signature_mtime(None) is None
+    # SQLite signatures carry counters, so there is no Last-Modified
+    assert signature_mtime((3, 17, 120, None)) is None
@@ -0,0 +1,88 @@
+"""
+Tests for turning activity readings into IDLE and ACTIVE transitions.
+"""
+
+from tracker.events.event_types import EventType
+from tracker.events.idle import ActivitySource, IdleDetector
+
+
+class FakeSource(ActivitySource):
+    """Source reporting input at times set by the test."""
+
+    name = 'fake'
+
+    def __init__(self, clock):
+        self.clock = clock
+        self.last_input = 0.0
+
+    def idle_seconds(self):
+        return self.clock.now - self.last_input
+
+
+class Clock:
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self):
+        return self.now
+
+
+def detector(threshold=300, confirm_checks=2, min_dwell=30):
+    clock = Clock()
+    source = FakeSource(clock)
+    return IdleDetector(source, threshold=threshold, confirm_checks=confirm_checks,
+                        min_dwell=min_dwell, clock=clock, wall_clock=clock), source, clock
+
+
+def check_at(idle, clock, now):
+    clock.now = now
+    return idle.check()
+
+
+def test_idle_is_dated_back_to_the_last_input():
+    idle, source, clock = detector()
+    source.last_input = 40
+    assert check_at(idle, clock, 300) is None
+    assert check_at(idle, clock, 345) == (EventType.IDLE, 40)
+    assert idle.idle
+
+
+def test_single_input_does_not_end_idleness():
+    idle, source, clock = detector()
+    assert check_at(idle, clock, 400) == (EventType.IDLE, 0)
+
+    # One bump of the mouse, then nothing
+    source.last_input = 410
+    assert check_at(idle, clock, 415) is None
+    assert idle.confirming
+    assert check_at(idle, clock, 420) is None
+    assert not idle.confirming
+
+    # Input in two consecutive checks confirms the return
+    source.last_input = 430
+    assert check_at(idle, clock, 435) is None
+    source.last_input = 440
+    assert check_at(idle, clock, 445) == (EventType.ACTIVE, 430)
+    assert not idle.idle
+
+
+def test_no_transition_within_the_dwell_time():
+    idle, source, clock = detector(threshold=5, confirm_checks=1, min_dwell=30)
+    assert check_at(idle, clock, 10) == (EventType.IDLE, 0)
+
+    source.last_input = 12
+    assert check_at(idle, clock, 13) is None
+    source.last_input = 39
+    # Dated to the first input that confirmed it
+    assert check_at(idle, clock, 40) == (EventType.ACTIVE, 12)
+
+    # Idle again at once, but only reported once the dwell time passed
+    assert check_at(idle, clock, 60) is None
+    assert check_at(idle, clock, 70) == (EventType.IDLE, 39)
+
+
+def test_unknown_readings_change_nothing():
+    idle, source, clock = detector()
+    source.idle_seconds = lambda: None
+    assert check_at(idle, clock, 1000) is None
+    assert not idle.idle
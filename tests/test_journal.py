@@ -0,0 +1,118 @@
+"""
+Tests for the event journal and its compaction.
+"""
+
+import json
+import time
+from pathlib import Path
+
+import pytest
+
+from tracker.storage.day_files import (
+    COMPACTED_JOURNAL_KEY, day_file_path, journal_path, load_day
+)
+from tracker.storage.journal import EventJournal
+
+DATE = '2024-03-01'
+
+
+def event(minute: int) -> dict:
+    return {'type': 'unlock' if minute % 2 else 'lock',
+            'timestamp': f'{DATE}T10:{minute:02d}:00'}
+
+
+@pytest.fixture
+def journal(tmp_path):
+    journal = EventJournal(tmp_path, fsync='never')
+    yield journal
+    journal.close()
+
+
+def write_day(journal, count: int):
+    for minute in range(count):
+        journal.append(DATE, event=event(minute), state={'total_time': minute * 60})
+    # Close the file so the day counts as closed
+    journal.close()
+
+
+def test_load_day_replays_the_journal(journal, tmp_path):
+    write_day(journal, 3)
+    data = load_day(tmp_path, DATE)
+    assert data['events'] == [event(0), event(1), event(2)]
+    assert data['total_time'] == 120
+
+
+def test_compaction_folds_the_journal_into_the_day_file(journal, tmp_path):
+    write_day(journal, 3)
+    assert journal.compact_closed_days(today='2024-03-02') == [DATE]
+
+    assert not journal_path(tmp_path, DATE).exists()
+    data = load_day(tmp_path, DATE)
+    assert data['events'] == [event(0), event(1), event(2)]
+    assert COMPACTED_JOURNAL_KEY not in data
+
+
+def test_crash_between_write_and_unlink_does_not_duplicate_events(journal, tmp_path,
+                                                                 monkeypatch):
+    write_day(journal, 4)
+    journal_file = journal_path(tmp_path, DATE)
+    unlink = Path.unlink
+
+    def crash(path, *args, **kwargs):
+        if path == journal_file:
+            raise OSError("simulated crash")
+        return unlink(path, *args, **kwargs)
+
+    monkeypatch.setattr(Path, 'unlink', crash)
+    with pytest.raises(OSError):
+        journal.compact(DATE)
+    monkeypatch.undo()
+
+    # Both files are left behind; the events are still counted once
+    assert journal_file.exists()
+    assert json.loads(day_file_path(tmp_path, DATE).read_text())['events'] == [
+        event(minute) for minute in range(4)]
+    assert load_day(tmp_path, DATE)['events'] == [event(minute) for minute in range(4)]
+
+    # A later compaction finishes the job without doubling anything
+    assert journal.compact(DATE)
+    assert not journal_file.exists()
+    assert load_day(tmp_path, DATE)['events'] == [event(minute) for minute in range(4)]
+
+
+def test_marker_of_a_removed_journal_does_not_skip_a_new_one(journal, tmp_path):
+    write_day(journal, 4)
+    journal.compact(DATE)
+
+    # A late record for the day starts a new, shorter journal
+    late = {'type': 'lock', 'timestamp': f'{DATE}T23:59:00'}
+    journal.append(DATE, event=late)
+    journal.close()
+
+    events = load_day(tmp_path, DATE)['events']
+    assert events == [event(minute) for minute in range(4)] + [late]
+
+
+def test_open_day_is_not_compacted(journal, tmp_path):
+    journal.append(DATE, event=event(0))
+    assert journal.compact_closed_days(today='2024-03-02') == []
+    assert journal_path(tmp_path, DATE).exists()
+
+
+def test_interval_policy_syncs_the_last_record_without_another_append(tmp_path, monkeypatch):
+    synced = []
+    monkeypatch.setattr('tracker.storage.journal.os.fsync', synced.append)
+    journal = EventJournal(tmp_path, fsync='interval', fsync_interval=0.05)
+    try:
+        journal.append(DATE, event=event(0))
+        journal.append(DATE, event=event(1))
+        # The first record is synced at once, the second one is left dirty
+        assert len(synced) == 1 and journal._dirty
+
+        deadline = time.monotonic() + 5
+        while journal._dirty and time.monotonic() < deadline:
+            time.sleep(0.01)
+        assert not journal._dirty
+        assert len(synced) == 2
+    finally:
+        journal.close()
@@ -0,0 +1,104 @@
+"""
+Tests for the adaptive chain of screen lock probes.
+"""
+
+from tracker.events.lock_probes import (
+    FAILED, LOCKED, MISSING, UNLOCKED, LockMethod, LockProbeChain, _loginctl_locked
+)
+
+
+class FakeMethod(LockMethod):
+    """Method answering from a script of outcomes instead of a command."""
+
+    def __init__(self, name, outcomes, binary='sh'):
+        super().__init__(name, [binary], lambda stdout: False)
+        self.outcomes = list(outcomes)
+        self.calls = 0
+
+    def run(self, timeout):
+        self.calls += 1
+        # The last outcome repeats
+        return self.outcomes.pop(0) if len(self.outcomes) > 1 else self.outcomes[0]
+
+
+class Clock:
+    def __init__(self):
+        self.now = 1000.0
+
+    def __call__(self):
+        return self.now
+
+
+def names(chain):
+    return [entry['method'] for entry in chain.profile()]
+
+
+def test_missing_binaries_are_skipped_until_reprobed():
+    clock = Clock()
+    missing = FakeMethod('missing', [UNLOCKED], binary='chronos-no-such-binary')
+    present = FakeMethod('present', [UNLOCKED])
+    chain = LockProbeChain([missing, present], reprobe_interval=60, clock=clock)
+
+    assert not chain.is_locked()
+    assert chain.profile()[-1] == {'method': 'missing', 'status': 'missing', 'runs': 0,
+                                   'failures': 0, 'hits': 0, 'mean_ms': 0.0}
+    assert names(chain) == ['present', 'missing']
+    assert missing.calls == 0
+
+
+def test_failing_method_is_benched_and_retried():
+    clock = Clock()
+    flaky = FakeMethod('flaky', [FAILED, FAILED, FAILED, LOCKED])
+    steady = FakeMethod('steady', [UNLOCKED])
+    chain = LockProbeChain([flaky, steady], reprobe_interval=60, max_failures=3, clock=clock)
+
+    for _ in range(3):
+        assert not chain.is_locked()
+    assert chain.profile()[-1]['status'] == 'benched'
+    assert names(chain) == ['steady', 'flaky']
+
+    # Benched methods are not run until the interval passed
+    chain.is_locked()
+    assert flaky.calls == 3
+    clock.now += 61
+    assert chain.is_locked()
+    assert flaky.calls == 4
+    assert chain.stats['flaky'].consecutive_failures == 0
+    entry = chain.profile()[0]
+    assert (entry['method'], entry['status'], entry['runs'], entry['failures'], entry['hits']) == (
+        'flaky', 'active', 4, 3, 1)
+
+
+def test_methods_that_detect_locks_run_first_and_stop_the_chain():
+    first = FakeMethod('first', [UNLOCKED])
+    second = FakeMethod('second', [LOCKED])
+    chain = LockProbeChain([first, second], clock=Clock())
+
+    assert chain.is_locked()
+    assert names(chain) == ['second', 'first']
+    assert chain.is_locked()
+    # The lock was found before the first method ran again
+    assert (first.calls, second.calls) == (1, 2)
+
+
+def test_calibrate_runs_every_method_once():
+    methods = [FakeMethod('a', [FAILED]), FakeMethod('b', [LOCKED]),
+               FakeMethod('c', [UNLOCKED], binary='chronos-no-such-binary')]
+    chain = LockProbeChain(methods, clock=Clock())
+
+    profile = chain.calibrate()
+    assert [(entry['method'], entry['status']) for entry in profile] == [
+        ('b', 'active'), ('a', 'active'), ('c', 'missing')]
+    assert [method.calls for method in methods] == [1, 1, 0]
+
+
+def test_commands_are_classified_by_exit_status_and_output():
+    locked = LockMethod('echo', ['sh', '-c', 'echo LockedHint=yes'], _loginctl_locked)
+    unlocked = LockMethod('echo', ['sh', '-c', 'echo LockedHint=no'], _loginctl_locked)
+    failing = LockMethod('exit', ['sh', '-c', 'exit 1'], _loginctl_locked)
+    missing = LockMethod('none', ['chronos-no-such-binary'], _loginctl_locked)
+
+    assert locked.run(5) == LOCKED
+    assert unlocked.run(5) == UNLOCKED
+    assert failing.run(5) == FAILED
+    assert missing.run(5) == MISSING
@@ -0,0 +1,124 @@
+"""
+Tests for the queued logging pipeline and its rate limit.
+"""
+
+import logging
+from logging.handlers import QueueHandler
+
+import pytest
+
+from tracker.utils import logger as logger_module
+from tracker.utils.logger import RateLimitFilter, setup_logger, stop_logging
+
+
+class Clock:
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self):
+        return self.now
+
+
+def record(message, level=logging.WARNING, lineno=10, name='chronos'):
+    return logging.LogRecord(name, level, '/src/module.py', lineno, message, None, None)
+
+
+def test_repeats_from_one_call_site_are_counted_and_dropped():
+    clock = Clock()
+    limit = RateLimitFilter(interval=60, clock=clock)
+
+    assert limit.filter(record('disk full'))
+    for _ in range(3):
+        clock.now += 10
+        assert not limit.filter(record('disk full'))
+    # Other call sites and levels below the limit are independent
+    assert limit.filter(record('other', lineno=11))
+    assert limit.filter(record('detail', level=logging.INFO))
+    assert limit.filter(record('detail', level=logging.INFO))
+
+    clock.now = 61
+    passed = record('disk full')
+    assert limit.filter(passed)
+    assert passed.getMessage() == "disk full (3 similar messages suppressed)"
+    clock.now = 200
+    assert limit.filter(record('disk full'))
+
+
+def test_different_messages_from_one_line_get_through():
+    clock = Clock()
+    limit = RateLimitFilter(interval=60, clock=clock)
+
+    # One line logging the errors of different scheduler jobs
+    assert limit.filter(record('Error in periodic job metrics-textfile', level=logging.ERROR))
+    assert limit.filter(record('Error in periodic job state-poll', level=logging.ERROR))
+    assert not limit.filter(record('Error in periodic job state-poll', level=logging.ERROR))
+
+
+def test_quiet_messages_are_forgotten(monkeypatch):
+    monkeypatch.setattr(logger_module, 'MAX_RATE_LIMITED', 3)
+    clock = Clock()
+    limit = RateLimitFilter(interval=60, clock=clock)
+    for day in range(3):
+        assert limit.filter(record(f'Error loading day {day}'))
+    assert not limit.filter(record('Error loading day 0'))
+
+    clock.now = 100
+    assert limit.filter(record('Error loading day 3'))
+    # Only the message with a dropped repeat is kept until it shows up again
+    assert len(limit._seen) == 2
+
+
+def test_zero_interval_keeps_every_record():
+    limit = RateLimitFilter(interval=0, clock=Clock())
+    assert all(limit.filter(record('again')) for _ in range(5))
+
+
+@pytest.fixture
+def pipeline(monkeypatch):
+    """Give the test a fresh pipeline and restore the process-wide one after."""
+    root = logging.getLogger()
+    installed = [handler for handler in root.handlers if isinstance(handler, QueueHandler)]
+    for handler in installed:
+        root.removeHandler(handler)
+    level = root.level
+    monkeypatch.setattr(logger_module, '_queue_handler', None)
+    monkeypatch.setattr(logger_module, '_listener', None)
+    monkeypatch.setattr(logger_module, '_handlers', [])
+    monkeypatch.setattr(logger_module, '_log_files', {})
+    yield
+    stop_logging()
+    if logger_module._queue_handler is not None:
+        root.removeHandler(logger_module._queue_handler)
+    for handler in installed:
+        root.addHandler(handler)
+    root.setLevel(level)
+
+
+def test_setup_logger_is_idempotent(pipeline, tmp_path):
+    settings = {'rate_limit_interval': 0}
+    log = setup_logger('chronos_test', str(tmp_path), settings)
+    assert setup_logger('chronos_test', str(tmp_path), settings) is log
+    setup_logger('chronos_test', str(tmp_path), settings)
+
+    root = logging.getLogger()
+    assert [handler for handler in root.handlers if isinstance(handler, QueueHandler)] == [
+        logger_module._queue_handler]
+    assert list(logger_module._log_files) == [tmp_path / 'chronos_test.log']
+
+    log.info("written once")
+    stop_logging()
+    assert (tmp_path / 'chronos_test.log').read_text().count("written once") == 1
+
+
+def test_each_log_file_is_added_once(pipeline, tmp_path):
+    first = setup_logger('chronos_one', str(tmp_path))
+    setup_logger('chronos_two', str(tmp_path))
+    setup_logger('chronos_one', str(tmp_path))
+    assert sorted(path.name for path in logger_module._log_files) == [
+        'chronos_one.log', 'chronos_two.log']
+
+    first.warning("shared pipeline")
+    stop_logging()
+    # Both files receive the root logger's records
+    for name in ('chronos_one.log', 'chronos_two.log'):
+        assert (tmp_path / name).read_text().count("shared pipeline") == 1
@@ -0,0 +1,104 @@
+"""
+Tests for time-window, type and paginated queries on one day.
+"""
+
+import pytest
+
+# The server modules reach the tracker package relatively, through src
+from src.server.query import DayIndex, DayIndexCache, EventQuery, decode_cursor, encode_cursor
+
+DATE = '2024-02-20'
+
+
+def event(event_type, clock):
+    return {'type': event_type, 'timestamp': f"{DATE}T{clock}"}
+
+
+EVENTS = [
+    event('STARTUP', '08:00:00'),
+    event('LOCK', '12:00:00'),
+    event('unlock', '12:30:00'),
+    event('LOCK', '17:00:00'),
+    event('UNLOCK', '17:00:00'),
+    event('IDLE', '17:10:00'),
+    event('ACTIVE', '17:20:00'),
+    event('LOCK', '23:59:59.500000'),
+]
+
+
+def page_through(index, args):
+    pages = []
+    while True:
+        events, cursor = index.select(EventQuery.parse(DATE, args))
+        pages.append(events)
+        if cursor is None:
+            return pages
+        args = dict(args, cursor=cursor)
+
+
+def test_parse_windows_types_and_limits():
+    query = EventQuery.parse(DATE, {'from': '17:00', 'to': '2024-02-20T18:00:00',
+                                    'types': 'unlock, LOCK,system_shutdown', 'limit': '2'})
+    assert query.end - query.start == 3600 * 1000000
+    assert query.types == ('LOCK', 'SHUTDOWN', 'UNLOCK')
+    assert query.limit == 2
+
+    with pytest.raises(ValueError):
+        EventQuery.parse(DATE, {'limit': '0'})
+    with pytest.raises(ValueError):
+        EventQuery.parse(DATE, {'from': '25:00'})
+    with pytest.raises(ValueError):
+        EventQuery.parse(DATE, {'cursor': '!!'})
+
+
+def test_window_is_inclusive_start_and_exclusive_end():
+    index = DayIndex(EVENTS)
+    events, cursor = index.select(EventQuery.parse(DATE, {'from': '12:30', 'to': '17:10'}))
+    assert events == EVENTS[2:5]
+    assert cursor is None
+
+
+def test_types_match_any_spelling_and_keep_time_order():
+    shuffled = EVENTS[4:] + EVENTS[:4]
+    index = DayIndex(shuffled)
+    events, _ = index.select(EventQuery.parse(DATE, {'types': 'UNLOCK,lock'}))
+    # Events with equal timestamps keep their stored order
+    assert events == [EVENTS[1], EVENTS[2], EVENTS[4], EVENTS[3], EVENTS[7]]
+
+
+def test_pages_cover_every_event_once():
+    index = DayIndex(EVENTS)
+    pages = page_through(index, {'limit': '3'})
+    assert [len(page) for page in pages] == [3, 3, 2]
+    assert [item for page in pages for item in page] == EVENTS
+
+    # Equal timestamps on a page boundary are neither skipped nor repeated
+    pages = page_through(index, {'types': 'LOCK,UNLOCK', 'limit': '2'})
+    assert [item for page in pages for item in page] == [
+        EVENTS[1], EVENTS[2], EVENTS[3], EVENTS[4], EVENTS[7]]
+
+
+def test_cursor_survives_a_rewritten_day():
+    index = DayIndex(EVENTS)
+    first, cursor = index.select(EventQuery.parse(DATE, {'limit': '2'}))
+    assert first == EVENTS[:2]
+
+    # An event before the cursor shifts every position
+    rewritten = DayIndex([event('SHUTDOWN', '07:00:00')] + EVENTS)
+    rest, _ = rewritten.select(EventQuery.parse(DATE, {'cursor': cursor}))
+    assert rest == EVENTS[2:]
+
+
+def test_cursor_round_trip():
+    assert decode_cursor(encode_cursor(12, 1708416000000000)) == (12, 1708416000000000)
+
+
+def test_index_cache_rebuilds_changed_days():
+    cache = DayIndexCache(max_days=1)
+    index = cache.get(DATE, ('a',), EVENTS)
+    assert cache.get(DATE, ('a',), []) is index
+    assert len(cache.get(DATE, ('b',), EVENTS[:2])) == 2
+    # Only one day is kept
+    cache.get('2024-02-21', ('c',), [])
+    assert cache.get(DATE, ('b',), EVENTS) is not index
+    assert len(cache.get(DATE, ('b',), EVENTS)) == len(EVENTS)
@@ -0,0 +1,45 @@
+"""
+Tests for the per-day summaries of the rollup index.
+"""
+
+from tracker.storage.rollup import summarize_day
+
+DATE = '2024-03-01'
+
+
+def event(event_type, clock):
+    return {'type': event_type, 'timestamp': f"{DATE}T{clock}"}
+
+
+def test_hourly_buckets_leave_out_idle_time():
+    data = {'events': [
+        event('UNLOCK', '08:30:00'),
+        event('IDLE', '08:50:00'),
+        event('ACTIVE', '09:40:00'),
+        event('LOCK', '10:00:00'),
+        event('STARTUP', '13:00:00'),
+        event('IDLE', '13:30:00'),
+        event('SHUTDOWN', '14:15:00'),
+    ]}
+    summary = summarize_day(DATE, data)
+
+    hourly = summary['hourly']
+    assert hourly[8] == 20 * 60
+    assert hourly[9] == 20 * 60
+    assert hourly[13] == 30 * 60
+    assert hourly[14] == 0
+    assert summary['session_count'] == 2
+    assert sum(hourly) == summary['total_time'] == 70 * 60
+
+
+def test_restarted_session_drops_its_idle_stretches():
+    data = {'events': [
+        event('UNLOCK', '08:00:00'),
+        event('IDLE', '08:10:00'),
+        event('ACTIVE', '08:20:00'),
+        event('UNLOCK', '09:00:00'),
+        event('LOCK', '09:30:00'),
+    ]}
+    summary = summarize_day(DATE, data)
+    assert summary['hourly'][8] == 0
+    assert sum(summary['hourly']) == summary['total_time'] == 30 * 60
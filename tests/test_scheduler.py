@@ -0,0 +1,62 @@
+"""
+Tests for the adaptive poll interval and the shared timer.
+"""
+
+import threading
+
+from tracker.events.event_handler import EventHandler
+from tracker.utils.scheduler import AdaptiveInterval, PeriodicScheduler
+
+
+def test_fast_polls_after_a_change_then_base_interval():
+    interval = AdaptiveInterval(2.0, min_interval=0.5, fast_polls=3)
+    assert interval.next() == 2.0
+
+    interval.changed()
+    assert [interval.next() for _ in range(5)] == [0.5, 0.5, 0.5, 2.0, 2.0]
+
+
+def test_quiet_backs_off_up_to_the_maximum():
+    interval = AdaptiveInterval(2.0, max_interval=10.0, backoff=2.0, fast_polls=1)
+    interval.set_quiet(True)
+    assert [interval.next() for _ in range(4)] == [4.0, 8.0, 10.0, 10.0]
+
+    # A change polls quickly once, then backs off from the base interval again
+    interval.changed()
+    assert [interval.next() for _ in range(3)] == [1.0, 4.0, 8.0]
+
+    interval.set_quiet(False)
+    assert interval.next() == 2.0
+
+
+def test_from_config_defaults():
+    interval = AdaptiveInterval.from_config({'max_interval': 30}, 1.0)
+    assert (interval.interval, interval.min_interval, interval.max_interval) == (1.0, 0.5, 30)
+    assert interval.fast_polls == 5 and interval.backoff == 1.5
+
+
+def test_event_checks_run_on_a_shared_scheduler(make_config):
+    config = make_config(idle={'source': 'none'}, polling={'interval': 0.05})
+    scheduler = PeriodicScheduler(slack=0)
+    handler = EventHandler(config, scheduler=scheduler)
+    checked = threading.Event()
+    handler._check_system_events = checked.set
+
+    handler.start()
+    # The owner of a shared scheduler starts it
+    assert not scheduler.running
+    scheduler.start()
+    try:
+        assert checked.wait(5)
+    finally:
+        scheduler.stop()
+        handler.stop()
+    assert handler.job_name not in scheduler._jobs
+
+
+def test_event_handler_runs_a_private_scheduler(make_config):
+    handler = EventHandler(make_config(idle={'source': 'none'}))
+    handler.start()
+    assert handler.scheduler.running
+    handler.stop()
+    assert not handler.scheduler.running
@@ -0,0 +1,49 @@
+"""
+Tests for the threaded viewer server.
+"""
+
+import socket
+import threading
+import http.client
+
+import pytest
+
+from server import serve_viewer
+
+
+@pytest.fixture
+def server(tmp_path, monkeypatch):
+    monkeypatch.setattr(serve_viewer.CORSRequestHandler, 'base_dir', tmp_path)
+    (tmp_path / 'data' / 'screen_time_data').mkdir(parents=True)
+    httpd = serve_viewer.make_server(port=0, workers=2, host='127.0.0.1')
+    thread = threading.Thread(target=httpd.serve_forever, daemon=True)
+    thread.start()
+    yield httpd
+    httpd.shutdown()
+    httpd.server_close()
+
+
+def open_stream(port):
+    sock = socket.create_connection(('127.0.0.1', port), timeout=5)
+    sock.sendall(b"GET /api/stream HTTP/1.1\r\nHost: localhost\r\n\r\n")
+    response = b''
+    while b'retry:' not in response:
+        response += sock.recv(4096)
+    assert response.startswith(b'HTTP/1.1 200')
+    return sock
+
+
+def test_streams_do_not_hold_pool_workers(server):
+    port = server.server_address[1]
+    # More streams than workers
+    streams = [open_stream(port) for _ in range(4)]
+    try:
+        connection = http.client.HTTPConnection('127.0.0.1', port, timeout=5)
+        connection.request('GET', '/metrics')
+        response = connection.getresponse()
+        assert response.status == 200
+        assert b'chronos_http_request_duration_seconds' in response.read()
+        connection.close()
+    finally:
+        for sock in streams:
+            sock.close()
@@ -0,0 +1,118 @@
+"""
+Tests for reconstructing sessions across days.
+"""
+
+from datetime import datetime
+
+from tracker.events.event_types import EventType
+from tracker.storage.base import Storage
+from tracker.storage import sessions as sessions_module
+from tracker.storage.sessions import SessionIndex, total_time
+
+
+class MemoryStorage(Storage):
+    """Days held in memory, with a version counter as signature."""
+
+    def __init__(self, days):
+        self.days = days
+        self.versions = {date: 0 for date in days}
+
+    def load_day(self, date):
+        if date not in self.days:
+            return None
+        return {'events': self.days[date], 'total_time': 0}
+
+    def day_signature(self, date):
+        return (self.versions[date],) if date in self.days else None
+
+    def add(self, date, event_type, clock):
+        self.days.setdefault(date, []).append(
+            {'type': event_type, 'timestamp': f"{date}T{clock}"})
+        self.versions[date] = self.versions.get(date, 0) + 1
+
+
+def at(date, clock):
+    return datetime.fromisoformat(f"{date}T{clock}")
+
+
+def test_session_crossing_midnight_is_returned_whole():
+    storage = MemoryStorage({})
+    storage.add('2024-01-01', 'UNLOCK', '23:00:00')
+    storage.add('2024-01-02', 'LOCK', '01:30:00')
+    index = SessionIndex(storage, lookback_days=2)
+
+    for date in ('2024-01-01', '2024-01-02'):
+        sessions = index.sessions(date, 1)
+        assert len(sessions) == 1
+        assert sessions[0].start == at('2024-01-01', '23:00:00')
+        assert sessions[0].end == at('2024-01-02', '01:30:00')
+        assert sessions[0].end_type is EventType.LOCK
+        assert sessions[0].complete
+
+    assert index.active_at(at('2024-01-02', '00:15:00')) == sessions[0]
+    assert index.active_at(at('2024-01-02', '02:00:00')) is None
+    assert total_time(sessions, at('2024-01-02', '00:00:00'), at('2024-01-03', '00:00:00')) == 5400
+
+
+def test_missing_end_event_closes_at_last_event_seen():
+    storage = MemoryStorage({})
+    storage.add('2024-01-01', 'UNLOCK', '09:00:00')
+    storage.add('2024-01-01', 'IDLE', '10:00:00')
+    # The machine crashed; the next session starts without a LOCK
+    storage.add('2024-01-01', 'STARTUP', '11:00:00')
+    storage.add('2024-01-01', 'lock', '12:00:00')
+    storage.add('2024-01-03', 'UNLOCK', '08:00:00')
+    storage.add('2024-01-03', 'ACTIVE', '08:45:00')
+    index = SessionIndex(storage, lookback_days=3)
+
+    first, second = index.sessions('2024-01-01', 1)
+    assert (first.start, first.end) == (at('2024-01-01', '09:00:00'), at('2024-01-01', '10:00:00'))
+    assert not first.complete
+    assert second.complete and second.start_type is EventType.STARTUP
+
+    # A past day's open session ends at its last event
+    last, = index.sessions('2024-01-03', 1)
+    assert last.end == at('2024-01-03', '08:45:00')
+    assert not last.complete and last.to_dict()['active'] is False
+
+
+def test_stitched_spans_are_reused_until_a_day_changes(monkeypatch):
+    stitches = []
+
+    def counting_stitch(days, carry=None):
+        stitches.append(1)
+        return stitch(days, carry)
+
+    stitch = sessions_module.stitch
+    monkeypatch.setattr(sessions_module, 'stitch', counting_stitch)
+    storage = MemoryStorage({})
+    storage.add('2024-01-01', 'UNLOCK', '09:00:00')
+    storage.add('2024-01-01', 'LOCK', '10:00:00')
+    index = SessionIndex(storage, lookback_days=2)
+
+    first = index.sessions('2024-01-01', 1)
+    stitched = len(stitches)
+    for minute in range(10):
+        assert index.active_at(at('2024-01-01', f"09:{minute:02d}:00")) == first[0]
+    assert index.sessions('2024-01-01', 1) == first
+    assert len(stitches) == stitched
+
+    storage.add('2024-01-02', 'UNLOCK', '00:30:00')
+    storage.add('2024-01-02', 'LOCK', '00:45:00')
+    sessions = index.sessions('2024-01-01', 2)
+    assert [session.start.hour for session in sessions] == [9, 0]
+    assert index.active_at(at('2024-01-02', '00:40:00')) == sessions[1]
+
+
+def test_idle_stretch_crossing_midnight_is_left_out():
+    storage = MemoryStorage({})
+    storage.add('2024-01-01', 'UNLOCK', '23:00:00')
+    storage.add('2024-01-01', 'IDLE', '23:30:00')
+    storage.add('2024-01-02', 'ACTIVE', '00:30:00')
+    storage.add('2024-01-02', 'LOCK', '01:00:00')
+    index = SessionIndex(storage, lookback_days=2)
+
+    session, = index.sessions('2024-01-01', 2)
+    assert session.idle == ((at('2024-01-01', '23:30:00'), at('2024-01-02', '00:30:00')),)
+    assert total_time([session], at('2024-01-01', '00:00:00'), at('2024-01-02', '00:00:00')) == 1800
+    assert total_time([session], at('2024-01-02', '00:00:00'), at('2024-01-03', '00:00:00')) == 1800
@@ -0,0 +1,98 @@
+"""
+Tests for the state sources and how the legacy tracker applies their changes.
+"""
+
+from datetime import datetime, timedelta
+
+import pytest
+
+from tracker.events.state_sources import (
+    LOCKED, LOGGED_OUT, SESSION_IFACE, SHUTTING_DOWN, FakeBusStateSource
+)
+from tracker.screen_time_tracker import ScreenTimeTracker
+
+
+def test_fake_bus_reports_lock_changes_once():
+    changes = []
+    source = FakeBusStateSource()
+    source.start(lambda key, value: changes.append((key, value)))
+
+    source.send('Lock')
+    source.send('Lock')
+    source.send('PropertiesChanged', SESSION_IFACE, {'LockedHint': False})
+    source.send('PropertiesChanged', 'org.example.Other', {'LockedHint': True})
+    source.send('PrepareForShutdown', True)
+
+    assert changes == [(LOCKED, True), (LOCKED, False), (SHUTTING_DOWN, True)]
+
+
+def test_fake_bus_reports_closing_session_as_logout():
+    changes = []
+    source = FakeBusStateSource(locked=True)
+    source.start(lambda key, value: changes.append((key, value)))
+    source.send('PropertiesChanged', SESSION_IFACE, {'State': 'closing'})
+    source.stop()
+    source.send('Unlock')
+
+    assert changes == [(LOGGED_OUT, True)]
+
+
+@pytest.fixture
+def tracker(tmp_path, make_config):
+    tracker = ScreenTimeTracker(make_config(), base_dir=tmp_path)
+    source = FakeBusStateSource()
+    tracker.state_source = source
+    source.start(tracker.handle_state_change)
+    yield tracker
+    tracker.close()
+
+
+def deliver(tracker):
+    """Apply the queued changes like the tracker's main loop."""
+    while not tracker.state_changes.empty():
+        # The tracker drops events less than a second apart
+        tracker.last_event_time = datetime.now() - timedelta(seconds=2)
+        tracker.apply_state_change(*tracker.state_changes.get_nowait())
+
+
+def test_lock_and_unlock_end_and_start_sessions(tracker):
+    source = tracker.state_source
+    tracker.log_event('startup')
+    started = tracker.current_session['start_time']
+    assert tracker.current_session['is_active']
+
+    source.send('Lock')
+    deliver(tracker)
+    assert not tracker.current_session['is_active']
+    assert tracker.data['total_time'] >= 0
+    assert [event['type'] for event in tracker.data['events']] == ['startup', 'lock']
+
+    source.send('Unlock')
+    deliver(tracker)
+    assert tracker.current_session['is_active']
+    assert tracker.current_session['start_time'] >= started
+    assert tracker.day_state.last_type.legacy_name == 'unlock'
+
+
+def test_shutdown_is_logged_once_and_ends_the_session(tracker):
+    source = tracker.state_source
+    tracker.log_event('startup')
+    source.send('PrepareForShutdown', True)
+    source.send('PrepareForShutdown', False)
+    source.send('PrepareForShutdown', True)
+    deliver(tracker)
+
+    types = [event['type'] for event in tracker.data['events']]
+    assert types == ['startup', 'system_shutdown']
+    assert tracker.shutdown_logged
+    assert not tracker.current_session['is_active']
+
+
+def test_logout_stops_the_source_and_exits(tracker):
+    source = tracker.state_source
+    tracker.log_event('startup')
+    source.send('SessionRemoved', '1', '/org/freedesktop/login1/session/_31')
+    with pytest.raises(SystemExit):
+        deliver(tracker)
+    assert not source.running
+    assert tracker.data['events'][-1]['type'] == 'logout'
@@ -0,0 +1,84 @@
+"""
+Tests for the storage backends, the SQLite backend and the JSON migration.
+"""
+
+import json
+from datetime import datetime
+
+import pytest
+
+from tracker.storage.day_files import day_file_path
+from tracker.storage.factory import BACKENDS, create_storage
+from tracker.storage.sqlite_storage import SQLiteStorage, migrate_json_files
+
+TODAY = datetime.now().strftime('%Y-%m-%d')
+
+
+def at(time_of_day: str) -> str:
+    return f'{TODAY}T{time_of_day}'
+
+
+@pytest.fixture(params=BACKENDS)
+def storage(request, tmp_path, make_config):
+    (tmp_path / 'data').mkdir()
+    storage = create_storage(make_config(storage={'backend': request.param,
+                                                  'fsync': 'never'}))
+    storage.start()
+    yield storage
+    storage.close()
+
+
+def test_backends_round_trip_events_and_state(storage):
+    storage.append_event(TODAY, {'type': 'startup', 'timestamp': at('08:00:00')},
+                         {'total_time': 0})
+    storage.append_event(TODAY, {'type': 'lock', 'timestamp': at('09:00:00'), 'note': 'x'},
+                         {'total_time': 3600.0})
+    storage.save_state(TODAY, {'current_session': {'is_active': False, 'start_time': None}})
+
+    data = storage.load_day(TODAY)
+    assert [event['type'] for event in data['events']] == ['startup', 'lock']
+    assert data['events'][1]['note'] == 'x'
+    assert data['total_time'] == 3600.0
+    assert data['current_session'] == {'is_active': False, 'start_time': None}
+    assert storage.load_day('1999-01-01') is None
+    # The json backend writes in the background; closing flushes it
+    storage.close()
+    assert storage.day_signature(TODAY) is not None
+
+
+def test_last_event_matches_legacy_and_core_spellings(storage):
+    storage.append_event(TODAY, {'type': 'startup', 'timestamp': at('08:00:00')})
+    storage.append_event(TODAY, {'type': 'unlock', 'timestamp': at('09:00:00')})
+    storage.append_event(TODAY, {'type': 'LOCK', 'timestamp': at('10:00:00')})
+
+    event = storage.last_event(types=['STARTUP', 'UNLOCK'], max_days=1)
+    assert event['type'] == 'unlock'
+    assert storage.last_event(types=['lock'], max_days=1)['timestamp'] == at('10:00:00')
+    assert storage.last_event(max_days=1)['type'] == 'LOCK'
+    assert storage.last_event(types=['SHUTDOWN'], max_days=1) is None
+
+
+def test_sqlite_load_range_splits_events_by_day(tmp_path):
+    storage = SQLiteStorage(tmp_path / 'db.sqlite')
+    storage.append_event('2024-03-01', {'type': 'lock', 'timestamp': '2024-03-01T23:59:00'},
+                         {'total_time': 5})
+    storage.append_event('2024-03-02', {'type': 'unlock', 'timestamp': '2024-03-02T00:01:00'})
+
+    days = dict(storage.load_range('2024-02-29', 4))
+    assert days['2024-02-29'] is None
+    assert days['2024-03-01']['total_time'] == 5
+    assert [event['type'] for event in days['2024-03-01']['events']] == ['lock']
+    assert [event['type'] for event in days['2024-03-02']['events']] == ['unlock']
+    storage.close()
+
+
+def test_migration_imports_each_day_once(tmp_path):
+    day = {'events': [{'type': 'startup', 'timestamp': '2024-03-01T08:00:00'}],
+           'total_time': 12, 'current_session': {'is_active': True}}
+    day_file_path(tmp_path, '2024-03-01').write_text(json.dumps(day))
+    storage = SQLiteStorage(tmp_path / 'db.sqlite')
+
+    assert migrate_json_files(tmp_path, storage) == ['2024-03-01']
+    assert migrate_json_files(tmp_path, storage) == []
+    assert storage.load_day('2024-03-01') == day
+    storage.close()
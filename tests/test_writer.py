@@ -0,0 +1,67 @@
+"""
+Tests for the batched day file writer and the JSON file storage using it.
+"""
+
+import json
+import time
+
+from tracker.storage.day_files import day_file_path, load_day
+from tracker.storage.file_storage import JsonFileStorage
+from tracker.storage.writer import BatchedWriter
+
+
+def test_snapshots_of_one_file_are_coalesced(tmp_path):
+    writer = BatchedWriter(max_latency=0.2)
+    writer.start()
+    path = tmp_path / 'day.json'
+    for count in range(5):
+        writer.submit(path, {'events': [], 'total_time': count})
+    assert writer.flush(timeout=5)
+    writer.close()
+
+    assert json.loads(path.read_text())['total_time'] == 4
+    assert writer.submitted == 5
+    assert writer.writes == 1
+
+
+def test_full_batch_is_written_before_the_latency_passes(tmp_path):
+    writer = BatchedWriter(max_latency=30, max_batch=3)
+    writer.start()
+    paths = [tmp_path / f'{index}.json' for index in range(3)]
+    for index, path in enumerate(paths):
+        writer.submit(path, {'index': index})
+
+    deadline = time.monotonic() + 5
+    while writer.writes < 3 and time.monotonic() < deadline:
+        time.sleep(0.01)
+    writer.close()
+    assert [json.loads(path.read_text())['index'] for path in paths] == [0, 1, 2]
+
+
+def test_close_writes_pending_snapshots(tmp_path):
+    writer = BatchedWriter(max_latency=30)
+    writer.start()
+    path = tmp_path / 'day.json'
+    writer.submit(path, {'total_time': 7})
+    writer.close()
+    assert json.loads(path.read_text()) == {'total_time': 7}
+
+
+def test_json_storage_keeps_existing_events_and_queues_copies(tmp_path):
+    date = '2024-03-01'
+    day_file_path(tmp_path, date).write_text(json.dumps(
+        {'events': [{'type': 'startup', 'timestamp': f'{date}T08:00:00'}], 'total_time': 0}))
+    storage = JsonFileStorage(tmp_path, BatchedWriter(max_latency=0.05))
+    storage.start()
+
+    unlock = {'type': 'unlock', 'timestamp': f'{date}T09:00:00'}
+    storage.append_event(date, unlock, {'total_time': 10})
+    storage.save_state(date, {'total_time': 20})
+    # What the storage hands out must not change under a queued write
+    snapshot = storage.load_day(date)
+    snapshot['events'].append({'type': 'bogus'})
+    storage.close()
+
+    data = load_day(tmp_path, date)
+    assert [event['type'] for event in data['events']] == ['startup', 'unlock']
+    assert data['total_time'] == 20